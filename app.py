@@ -1,17 +1,20 @@
 import gradio as gr
 import json
 import os
-import sqlite3
 import uuid
 from pathlib import Path
 from datetime import datetime
 
 from mcp_server import get_default_server
+from setup_database import ensure_database
 from utils.ai_service import AIService
+from utils.analytics_service import AnalyticsService
 from utils.session_service import SessionService
+from utils.session_sweeper import SessionSweeper
+from utils.tool_process_pool import get_tool_process_pool
+from utils.tool_telemetry import ToolTelemetry
 from utils.wiki_service import WikiService
 from utils.config import (
-    DB_PATH,
     DEFAULT_MODEL,
     DEFAULT_TEMPERATURE,
     DEFAULT_TOP_P,
@@ -19,7 +22,8 @@ from utils.config import (
     DEFAULT_MAX_TOKENS,
     APPLICATION_TITLE,
     APPLICATION_ICON,
-    APPLICATION_DESCRIPTION
+    APPLICATION_DESCRIPTION,
+    DYNAMIC_TOOL_ISOLATION
 )
 
 def get_response(session_id, user_message, use_agentic=False):
@@ -35,8 +39,8 @@ def get_response(session_id, user_message, use_agentic=False):
         str: Asistan yanıtı
     """
     try:
-        # Oturum bilgilerini al
-        session = SessionService.get_session(session_id)
+        # Oturum bilgilerini al (yazma yolunda okuma kopyası yerine birincilden)
+        session = SessionService.get_session(session_id, max_staleness=0)
         if not session:
             return "Oturum bulunamadı. Lütfen yeni bir oturum başlatın."
         
@@ -50,6 +54,18 @@ def get_response(session_id, user_message, use_agentic=False):
             content=user_message
         )
         
+        # Asistan mesajının ID'si önceden üretilir; araç çalıştırmaları (telemetri
+        # dahil) mesaj henüz yazılmadan ona bağlanır
+        assistant_message_id = str(uuid.uuid4())
+        tool_calls = []
+        
+        def run_tool(name, args):
+            result = get_default_server().execute_tool(
+                name, args, session_id=session_id, message_id=assistant_message_id
+            )
+            tool_calls.append({"tool_name": name, "args": dict(args), "result": result})
+            return result
+        
         # Agentic mod etkinse ve tool gerektiren bir istek varsa
         tool_info = None
         tool_name = None
@@ -75,10 +91,6 @@ def get_response(session_id, user_message, use_agentic=False):
             if success and tool_name:
                 print(f"Tool oluşturuldu ve kaydedildi: {tool_name}")
                 
-                # MCP sunucusundan tool'u al ve çalıştır
-                from mcp_server import get_default_server
-                mcp_server = get_default_server()
-                
                 # Tool parametrelerini belirle
                 tool_args = {}
                 
@@ -133,7 +145,7 @@ def get_response(session_id, user_message, use_agentic=False):
                 
                 # Tool'u çalıştır
                 try:
-                    tool_result = mcp_server.execute_tool(tool_name, tool_args)
+                    tool_result = run_tool(tool_name, tool_args)
                     print(f"Tool çalıştırıldı: {tool_name}, Sonuç: {tool_result}")
                 except Exception as e:
                     # Tool çalıştırma sırasında bir hata oluştu
@@ -146,19 +158,21 @@ def get_response(session_id, user_message, use_agentic=False):
                     error_message = tool_result["error"]
                     print(f"Tool çalıştırma hatası: {error_message}")
                     
-                    # Otomatik debug ve düzeltme dene
-                    print("Tool otomatik debug ve düzeltme deneniyor...")
-                    from utils.dynamic_tool_manager import DynamicToolManager
-                    debug_success, fixed_tool_name, fixed_tool_info = DynamicToolManager.debug_and_fix_tool(
-                        tool_name,
-                        error_message,
-                        tool_args
-                    )
+                    # Otomatik debug ve düzeltme dene (argüman doğrulama hataları kod hatası değildir)
+                    debug_success = False
+                    if tool_result.get("error_type") != "invalid_arguments":
+                        print("Tool otomatik debug ve düzeltme deneniyor...")
+                        from utils.dynamic_tool_manager import DynamicToolManager
+                        debug_success, fixed_tool_name, fixed_tool_info = DynamicToolManager.debug_and_fix_tool(
+                            tool_name,
+                            error_message,
+                            tool_args
+                        )
                     
                     if debug_success:
                         print(f"Tool başarıyla düzeltildi: {fixed_tool_name}")
                         # Düzeltilen tool'u çalıştır
-                        tool_result = mcp_server.execute_tool(fixed_tool_name, tool_args)
+                        tool_result = run_tool(fixed_tool_name, tool_args)
                         print(f"Düzeltilen tool çalıştırıldı: {fixed_tool_name}, Sonuç: {tool_result}")
                         # Tool adını güncelle
                         tool_name = fixed_tool_name
@@ -169,7 +183,7 @@ def get_response(session_id, user_message, use_agentic=False):
                         # Hata durumunda alternatif tool'ları dene
                         if "currency" in tool_name.lower() and tool_name != "currency_converter":
                             print("Alternatif olarak currency_converter aracı deneniyor...")
-                            tool_result = mcp_server.execute_tool("currency_converter", tool_args)
+                            tool_result = run_tool("currency_converter", tool_args)
                             print(f"Alternatif araç çalıştırıldı: currency_converter, Sonuç: {tool_result}")
                         
                         # Parametrelerde eksiklik varsa, varsayılan değerlerle tekrar dene
@@ -197,11 +211,11 @@ def get_response(session_id, user_message, use_agentic=False):
                                 }
                                 
                             # Varsayılan parametrelerle tekrar dene
-                            tool_result = mcp_server.execute_tool(tool_name, tool_args)
+                            tool_result = run_tool(tool_name, tool_args)
                             print(f"Varsayılan parametrelerle araç çalıştırıldı: {tool_name}, Sonuç: {tool_result}")
         
-        # Sohbet geçmişini al
-        history_text = SessionService.format_chat_history(session_id)
+        # Sohbet geçmişini al (az önce eklenen kullanıcı mesajı dahil olmalı)
+        history_text = SessionService.format_chat_history(session_id, max_staleness=0)
         
         # Sistem promptunu al
         system_prompt = session.get("system_prompt", "")
@@ -371,9 +385,7 @@ Asistan:"""
                         
                         if tool:
                             # MCP sunucusuna kaydet
-                            from mcp_server import get_default_server
-                            mcp_server = get_default_server()
-                            mcp_server.register_tool(tool)
+                            get_default_server().register_tool(tool)
                             
                             print(f"Validasyon sonucu tool oluşturuldu: {tool.name}")
                             
@@ -430,7 +442,7 @@ Asistan:"""
                             
                             # Tool'u çalıştır
                             try:
-                                tool_result = mcp_server.execute_tool(tool.name, tool_args)
+                                tool_result = run_tool(tool.name, tool_args)
                                 print(f"Validasyon sonucu oluşturulan tool çalıştırıldı: {tool.name}, Sonuç: {tool_result}")
                             except Exception as e:
                                 # Tool çalıştırma sırasında bir hata oluştu
@@ -443,19 +455,21 @@ Asistan:"""
                                 error_message = tool_result["error"]
                                 print(f"Validasyon sonucu oluşturulan tool çalıştırma hatası: {error_message}")
                                 
-                                # Otomatik debug ve düzeltme dene
-                                print("Tool otomatik debug ve düzeltme deneniyor...")
-                                from utils.dynamic_tool_manager import DynamicToolManager
-                                debug_success, fixed_tool_name, fixed_tool_info = DynamicToolManager.debug_and_fix_tool(
-                                    tool.name,
-                                    error_message,
-                                    tool_args
-                                )
+                                # Otomatik debug ve düzeltme dene (argüman doğrulama hataları kod hatası değildir)
+                                debug_success = False
+                                if tool_result.get("error_type") != "invalid_arguments":
+                                    print("Tool otomatik debug ve düzeltme deneniyor...")
+                                    from utils.dynamic_tool_manager import DynamicToolManager
+                                    debug_success, fixed_tool_name, fixed_tool_info = DynamicToolManager.debug_and_fix_tool(
+                                        tool.name,
+                                        error_message,
+                                        tool_args
+                                    )
                                 
                                 if debug_success:
                                     print(f"Tool başarıyla düzeltildi: {fixed_tool_name}")
                                     # Düzeltilen tool'u çalıştır
-                                    tool_result = mcp_server.execute_tool(fixed_tool_name, tool_args)
+                                    tool_result = run_tool(fixed_tool_name, tool_args)
                                     print(f"Düzeltilen tool çalıştırıldı: {fixed_tool_name}, Sonuç: {tool_result}")
                                     # Tool adını güncelle
                                     tool.name = fixed_tool_name
@@ -499,14 +513,16 @@ Asistan:"""
                     print(f"Validasyon yanıtı JSON formatında değil: {validation_response}")
         
         # Asistan yanıtını veritabanına ekle
-        assistant_message_id = SessionService.add_message(
+        SessionService.add_message(
             session_id=session_id,
             role="assistant",
             content=response_text,
             parent_message_id=user_message_id,
+            tool_calls=tool_calls,
             model_used=DEFAULT_MODEL,
             temperature=DEFAULT_TEMPERATURE,
-            processing_time_ms=processing_time_ms
+            processing_time_ms=processing_time_ms,
+            message_id=assistant_message_id
         )
         
         return response_text
@@ -573,13 +589,30 @@ def delete_dynamic_tool(tool_name):
         return False
 
 # Oturum listesini getir
-def get_session_list():
+def get_session_list(cursor=None, max_staleness=None):
+    """
+    Oturum listesinin bir sayfasını (etiket, oturum ID'si) çiftleri olarak getir.
+    
+    Aynı adı taşıyan oturumlar değerleri (ID) farklı olduğu için çakışmaz.
+    
+    Args:
+        cursor: Önceki sayfanın imleci (ilk sayfa için None)
+        max_staleness: Okuma kopyası için izin verilen gecikme (0: birincil veritabanı)
+        
+    Returns:
+        Tuple: (seçenekler, sonraki_sayfa_imleci)
+    """
     try:
-        sessions = SessionService.get_all_sessions(active_only=True)
-        return [session["session_name"] for session in sessions]
+        sessions, next_cursor = SessionService.list_sessions(
+            columns=["session_id", "session_name"],
+            status="active",
+            cursor=cursor,
+            max_staleness=max_staleness
+        )
+        return [(session["session_name"], session["session_id"]) for session in sessions], next_cursor
     except Exception as e:
         print(f"Oturum listesi alınırken hata oluştu: {str(e)}")
-        return []
+        return [], None
 
 # Oturum oluşturma fonksiyonu
 def create_session(name, system_prompt, wiki_info, use_agentic):
@@ -717,27 +750,97 @@ def list_tools():
         print(error_msg)
         return [], []
 
+# Sohbet geçmişinde arama fonksiyonu
+def search_history(query, session_id=None):
+    try:
+        if not query or not query.strip():
+            return "Lütfen arama terimini girin."
+        
+        results = SessionService.search_messages(query, session_id=session_id)
+        if not results:
+            return "Sonuç bulunamadı."
+        
+        role_labels = {"user": "Kullanıcı", "assistant": "Asistan", "system": "Sistem"}
+        lines = [f"### {len(results)} sonuç"]
+        for result in results:
+            role = role_labels.get(result["message_role"], result["message_role"])
+            lines.append(
+                f"**{result['session_name'] or result['session_id']}** · {role} · {result['created_at']}\n\n"
+                f"{result['snippet']}\n"
+            )
+        return "\n".join(lines)
+    except Exception as e:
+        error_msg = f"Arama sırasında hata oluştu: {str(e)}"
+        print(error_msg)
+        return error_msg
+
+def get_analytics_summary():
+    try:
+        daily_stats = AnalyticsService.get_daily_stats()
+        tool_performance = AnalyticsService.get_tool_performance()
+        
+        lines = ["### Günlük Kullanım"]
+        if daily_stats:
+            lines.append("| Tarih | Oturum | Mesaj | Araç Çağrısı | Ort. Token | Ort. Süre (ms) |")
+            lines.append("|---|---|---|---|---|---|")
+            for stat in daily_stats:
+                summary = stat["performance_summary"]
+                avg_tokens = summary.get("avg_tokens_per_message")
+                avg_ms = summary.get("avg_processing_time_ms")
+                lines.append(
+                    f"| {stat['date_period']} | {stat['total_sessions']} | {stat['total_messages']} | "
+                    f"{stat['total_tool_calls']} | {round(avg_tokens, 1) if avg_tokens is not None else '-'} | "
+                    f"{round(avg_ms, 1) if avg_ms is not None else '-'} |"
+                )
+        else:
+            lines.append("Henüz özetlenmiş veri yok.")
+        
+        lines.append("\n### Araç Performansı")
+        if tool_performance:
+            lines.append("| Araç | Çalıştırma | Başarı (%) | Ort. Süre (ms) | p95 (ms) |")
+            lines.append("|---|---|---|---|---|")
+            for tool in tool_performance:
+                avg_ms = tool["avg_execution_time_ms"]
+                p95_ms = ToolTelemetry.get_latency_percentiles(tool["tool_name"], (95,)).get("p95")
+                lines.append(
+                    f"| {tool['tool_name']} | {tool['total_executions']} | {tool['success_rate_percent']} | "
+                    f"{round(avg_ms, 1) if avg_ms is not None else '-'} | "
+                    f"{p95_ms if p95_ms is not None else '-'} |"
+                )
+        else:
+            lines.append("Henüz araç kaydı yok.")
+        
+        cache_stats = get_default_server().get_cache_stats()
+        lines.append("\n### Araç Önbelleği (bu süreç)")
+        if cache_stats:
+            lines.append("| Araç | İsabet | Bayat İsabet | Veritabanı İsabeti | Iska | İsabet Oranı (%) |")
+            lines.append("|---|---|---|---|---|---|")
+            for tool_name, stats in sorted(cache_stats.items()):
+                lines.append(
+                    f"| {tool_name} | {stats['hits']} | {stats['stale_hits']} | {stats['l2_hits']} | "
+                    f"{stats['misses']} | {round(stats['hit_rate'] * 100, 1)} |"
+                )
+        else:
+            lines.append("Henüz önbelleklenmiş araç çağrısı yok.")
+        
+        return "\n".join(lines)
+    except Exception as e:
+        error_msg = f"Analitik veriler alınırken hata oluştu: {str(e)}"
+        print(error_msg)
+        return error_msg
+
 # Oturum bilgilerini getirme fonksiyonu
-def get_session_info(session_name):
-    if not session_name:
+def get_session_info(session_id):
+    if not session_id:
         return None, None, None, None
     
     try:
-        # Oturum adından ID'yi bul
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM sessions WHERE session_name = ?", (session_name,))
-        session = cursor.fetchone()
-        conn.close()
+        # Oturumu birincil anahtar üzerinden getir
+        session_dict = SessionService.get_session(session_id)
         
-        if not session:
+        if not session_dict:
             return None, None, None, None
         
-        # sqlite3.Row nesnesini dict'e dönüştür
-        session_dict = dict(session)
-        
         return (
             session_dict["session_id"],
             session_dict.get("system_prompt", ""),
@@ -758,6 +861,11 @@ def create_gradio_interface():
         current_session_id = gr.State(None)
         wiki_info_state = gr.State(None)
         
+        # Kenar çubuğundaki oturumların ilk sayfası ve sonraki sayfanın imleci
+        initial_session_choices, initial_session_cursor = get_session_list()
+        session_choices_state = gr.State(initial_session_choices)
+        session_cursor_state = gr.State(initial_session_cursor)
+        
         with gr.Tabs() as tabs:
             # Sohbet sekmesi
             with gr.Tab("Sohbet"):
@@ -765,12 +873,13 @@ def create_gradio_interface():
                     with gr.Column(scale=1):
                         # Oturum seçimi - Dropdown yerine Radio kullanarak liste görünümü sağlıyoruz
                         session_dropdown = gr.Radio(
-                            choices=get_session_list(),
+                            choices=initial_session_choices,
                             label="Oturum Seçin",
                             interactive=True,
                             type="value"
                         )
                         
+                        load_more_btn = gr.Button("Daha Fazla Oturum Yükle", visible=initial_session_cursor is not None)
                         refresh_btn = gr.Button("Oturum Listesini Yenile")
                         
                         # Oturum bilgileri
@@ -840,22 +949,40 @@ def create_gradio_interface():
                         
                         # Sonuç mesajı
                         create_result = gr.Textbox(label="Sonuç", interactive=False)
+            
+            # Sohbet geçmişinde arama sekmesi
+            with gr.Tab("Arama"):
+                with gr.Row():
+                    search_query = gr.Textbox(
+                        label="Mesajlarda Ara",
+                        placeholder="Aranacak kelimeleri yazın...",
+                        scale=4
+                    )
+                    search_current_only = gr.Checkbox(label="Sadece seçili oturumda ara", value=False, scale=1)
+                
+                search_btn = gr.Button("Ara")
+                search_results_md = gr.Markdown()
+            
+            # Kullanım özetleri sekmesi (usage_analytics özetlerinden okunur)
+            with gr.Tab("Analitik"):
+                refresh_analytics_btn = gr.Button("Analitiği Yenile")
+                analytics_md = gr.Markdown()
         
         # Fonksiyon bağlantıları
         
         # Oturum seçimi değiştiğinde
-        def on_session_select(session_name):
-            if not session_name:
+        def on_session_select(selected_session_id):
+            if not selected_session_id:
                 return None, "", "", False, []
             
             # Debug bilgisi yazdır
-            print(f"Oturum seçildi: '{session_name}'")
+            print(f"Oturum seçildi: '{selected_session_id}'")
             
             try:
-                session_id, system_prompt, wiki_info, agentic = get_session_info(session_name)
+                session_id, system_prompt, wiki_info, agentic = get_session_info(selected_session_id)
                 
                 if not session_id:
-                    print(f"Oturum bilgileri yüklenemedi: '{session_name}'")
+                    print(f"Oturum bilgileri yüklenemedi: '{selected_session_id}'")
                     return None, "", "", False, []
                 
                 # Sohbet geçmişini yükle
@@ -891,10 +1018,29 @@ def create_gradio_interface():
             outputs=[current_session_id, session_system_prompt, session_wiki, session_agentic, chatbot]
         )
         
-        # Oturum listesini yenileme
+        # Oturum listesini yenileme (ilk sayfaya döner)
+        def on_refresh_sessions():
+            choices, next_cursor = get_session_list()
+            return gr.update(choices=choices), choices, next_cursor, gr.update(visible=next_cursor is not None)
+        
         refresh_btn.click(
-            lambda: gr.update(choices=get_session_list()),
-            outputs=[session_dropdown]
+            on_refresh_sessions,
+            outputs=[session_dropdown, session_choices_state, session_cursor_state, load_more_btn]
+        )
+        
+        # Sonraki oturum sayfasını mevcut listeye ekle
+        def on_load_more_sessions(loaded_choices, cursor):
+            if cursor is None:
+                return gr.update(), loaded_choices, None, gr.update(visible=False)
+            
+            page, next_cursor = get_session_list(cursor)
+            choices = list(loaded_choices or []) + page
+            return gr.update(choices=choices), choices, next_cursor, gr.update(visible=next_cursor is not None)
+        
+        load_more_btn.click(
+            on_load_more_sessions,
+            inputs=[session_choices_state, session_cursor_state],
+            outputs=[session_dropdown, session_choices_state, session_cursor_state, load_more_btn]
         )
         
         # Araçları yenileme
@@ -1004,6 +1150,28 @@ def create_gradio_interface():
             show_progress=True
         )
         
+        # Sohbet geçmişinde arama
+        def on_search(query, current_only, session_id):
+            return search_history(query, session_id if current_only else None)
+        
+        search_btn.click(
+            on_search,
+            inputs=[search_query, search_current_only, current_session_id],
+            outputs=[search_results_md]
+        )
+        
+        search_query.submit(
+            on_search,
+            inputs=[search_query, search_current_only, current_session_id],
+            outputs=[search_results_md]
+        )
+        
+        # Analitik özetleri
+        refresh_analytics_btn.click(
+            get_analytics_summary,
+            outputs=[analytics_md]
+        )
+        
         # Wikipedia'dan bilgi çekme
         wiki_fetch_btn.click(
             lambda query: fetch_wiki_info(query),
@@ -1016,23 +1184,24 @@ def create_gradio_interface():
             try:
                 result, session_id = create_session(name, system_prompt, wiki_info, use_agentic)
                 
-                # Oturum listesini güncelle
+                # Oturum listesini güncelle (yeni oturum ilk sayfada yer alır)
                 try:
-                    updated_dropdown = gr.update(choices=get_session_list(), value=name if session_id else None)
-                    return result, updated_dropdown
+                    choices, next_cursor = get_session_list(max_staleness=0)
+                    updated_dropdown = gr.update(choices=choices, value=session_id)
+                    return result, updated_dropdown, choices, next_cursor, gr.update(visible=next_cursor is not None)
                 except Exception as e:
                     error_msg = f"Oturum listesi güncellenirken hata oluştu: {str(e)}"
                     print(error_msg)
-                    return f"{result}\n{error_msg}", gr.update()
+                    return f"{result}\n{error_msg}", gr.update(), gr.update(), gr.update(), gr.update()
             except Exception as e:
                 error_msg = f"Oturum oluşturulurken hata oluştu: {str(e)}"
                 print(error_msg)
-                return error_msg, gr.update()
+                return error_msg, gr.update(), gr.update(), gr.update(), gr.update()
         
         create_btn.click(
             on_create_session,
             inputs=[new_session_name, new_system_prompt, wiki_info_box, new_session_agentic],
-            outputs=[create_result, session_dropdown]
+            outputs=[create_result, session_dropdown, session_choices_state, session_cursor_state, load_more_btn]
         )
         
         # Sayfa yüklendiğinde araçları göster
@@ -1045,6 +1214,16 @@ def create_gradio_interface():
 
 # Ana fonksiyon
 def main():
+    # Bekleyen şema migration'larını uygula (şema güncelse sadece sürüm tablosu okunur)
+    ensure_database()
+    
+    # Süresi dolan oturumları ve saklama politikasını arka planda uygula
+    SessionSweeper.start()
+    
+    # Dinamik araç işçi süreçlerini ilk çağrıyı beklemeden başlat
+    if DYNAMIC_TOOL_ISOLATION:
+        get_tool_process_pool()
+    
     app = create_gradio_interface()
     app.launch(share=False)
 
@@ -6,15 +6,5 @@ based on user needs. These tools are automatically registered with the MCP serve
 and can be used by agentic characters.
 """
 
-# Import example tools
-try:
-    from .currency_converter_tool import CurrencyConverterTool
-except ImportError:
-    pass
-
-try:
-    from .weather_forecast_tool import WeatherForecastTool
-except ImportError:
-    pass
-
-# The rest of the tools will be dynamically imported at runtime
\ No newline at end of file
+# Tool modules are not imported here: the MCP server registers them from a
+# cached manifest (.tool_manifest.json) and imports each one on first use.
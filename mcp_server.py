@@ -1,28 +1,110 @@
+import asyncio
 import json
 import os
-import requests
 import datetime
-import wikipedia
-import re
 import webbrowser
 import importlib
 import inspect
 import pkgutil
+import sys
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+from utils.http_client import HttpClient, get_http_client
+from utils.geocoder import get_geocoder
+from utils.math_evaluator import MathEvaluationError, evaluate_expression
+from utils.tool_cache import ToolResultCache
+from utils.tool_executor import ToolExecutor, ToolTimeout, current_cancel_event
+from utils.tool_process_pool import get_tool_process_pool
+from utils.tool_manifest import ToolManifest
+from utils.tool_schema import CompiledSchema, ToolArgumentError, schema_from_parameters
+from utils.config import (
+    TOOL_EXECUTION_TIMEOUT,
+    TOOL_BATCH_MAX_CONCURRENCY,
+    DYNAMIC_TOOL_ISOLATION,
+    LAZY_TOOL_LOADING,
+    TOOL_MANIFEST_PATH
+)
+from utils.tool_telemetry import ToolTelemetry
 
 class MCPTool:
     """Base class for MCP tools that characters can use"""
+    # Seconds a successful result stays fresh in the server's result cache
+    # (None falls back to TOOL_CACHE_TTLS, 0 disables caching), and how much
+    # longer a stale result may be served while it is refreshed in the background
+    cache_ttl: Optional[float] = None
+    cache_stale_ttl: float = 0
+    # Seconds the server waits for execute() (None falls back to
+    # TOOL_EXECUTION_TIMEOUT, 0 waits indefinitely)
+    timeout: Optional[float] = None
+    # JSON Schema of the arguments; the server validates and coerces
+    # arguments against it before execute() is called
+    input_schema: Optional[Dict[str, Any]] = None
+    # Whether the tool acts on the machine running the server (e.g. opens a
+    # browser window); such tools are not served to remote MCP clients
+    host_ui: bool = False
+    
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
     
+    @property
+    def http(self) -> HttpClient:
+        """
+        Shared pooled HTTP client for network calls
+        
+        Reuses keep-alive connections and applies default connect/read
+        timeouts, retries for idempotent requests and per-host concurrency
+        limits. Tools should use it instead of calling requests directly.
+        """
+        return get_http_client()
+    
+    @property
+    def cancelled(self) -> bool:
+        """
+        Whether the current call has timed out and should stop
+        
+        The server cannot interrupt a running thread, so long-running tools
+        should check this between steps and return early.
+        """
+        cancel_event = current_cancel_event()
+        return cancel_event is not None and cancel_event.is_set()
+    
+    @property
+    def is_async(self) -> bool:
+        """Whether the tool implements aexecute natively"""
+        return type(self).aexecute is not MCPTool.aexecute
+    
     def execute(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the tool and return results"""
+        if self.is_async:
+            return asyncio.run(self.aexecute(args))
         raise NotImplementedError("Subclasses must implement execute method")
+    
+    async def aexecute(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute the tool asynchronously and return results
+        
+        I/O-bound tools may override this with a native coroutine; the
+        default runs the synchronous execute() in a thread.
+        """
+        return await asyncio.to_thread(self.execute, args)
 
 class SearchWikipedia(MCPTool):
     """Tool to search Wikipedia for information"""
+    cache_ttl = 24 * 60 * 60
+    cache_stale_ttl = 24 * 60 * 60
+    input_schema = {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "minLength": 1, "description": "Topic to search for"},
+            "language": {"type": "string", "default": "tr", "description": "Wikipedia language code"}
+        },
+        "required": ["query"]
+    }
+    
     def __init__(self):
         super().__init__(
             name="search_wikipedia",
@@ -37,6 +119,9 @@ class SearchWikipedia(MCPTool):
             return {"error": "Query parameter is required"}
         
         try:
+            # wikipedia (requests + BeautifulSoup) is the slowest import of the module
+            import wikipedia
+            
             wikipedia.set_lang(language)
             search_results = wikipedia.search(query, results=3)
             
@@ -62,6 +147,15 @@ class SearchWikipedia(MCPTool):
 
 class GetCurrentTime(MCPTool):
     """Tool to get the current date and time"""
+    cache_ttl = 0
+    input_schema = {
+        "type": "object",
+        "properties": {
+            "timezone": {"type": "string", "default": "Europe/Istanbul"},
+            "format": {"type": "string", "default": "%Y-%m-%d %H:%M:%S", "description": "strftime format"}
+        }
+    }
+    
     def __init__(self):
         super().__init__(
             name="get_current_time",
@@ -82,6 +176,16 @@ class GetCurrentTime(MCPTool):
 
 class GetWeather(MCPTool):
     """Tool to get weather information for a location"""
+    cache_ttl = 10 * 60
+    cache_stale_ttl = 10 * 60
+    input_schema = {
+        "type": "object",
+        "properties": {
+            "location": {"type": "string", "minLength": 1, "description": "City or place name"}
+        },
+        "required": ["location"]
+    }
+    
     def __init__(self):
         super().__init__(
             name="get_weather",
@@ -94,18 +198,20 @@ class GetWeather(MCPTool):
         if not location:
             return {"error": "Location parameter is required"}
         
-        # Basit bir geocoding işlemi
-        geocode_result = self._geocode_location(location)
+        # Çevrimdışı konum dizini (utils/geocoder.py); bilinmeyen yerler için tahmin yapılmaz
+        geocode_result = get_geocoder().geocode(location)
         
-        if "warning" in geocode_result:
-            print(f"Warning: {geocode_result['warning']}")
+        if geocode_result is None:
+            error_message = f"Could not find a location named '{location}'"
+            print(error_message)
+            return {"error": error_message}
         
         latitude = geocode_result["latitude"]
         longitude = geocode_result["longitude"]
         
         # Open-Meteo API'sini kullan
         try:
-            response = requests.get(
+            response = self.http.get(
                 "https://api.open-meteo.com/v1/forecast",
                 params={
                     "latitude": latitude,
@@ -184,6 +290,7 @@ class GetWeather(MCPTool):
             
             return {
                 "location": location,
+                "resolved_location": f"{geocode_result['name']}, {geocode_result['country_code']}",
                 "temperature": temperature,
                 "condition": weather_condition,
                 "humidity": humidity,
@@ -193,154 +300,19 @@ class GetWeather(MCPTool):
             error_message = f"Error getting weather data: {str(e)}"
             print(error_message)
             return {"error": error_message}
-    
-    def _geocode_location(self, location: str) -> Dict[str, Any]:
-        """
-        Basit bir geocoding işlemi
-        Gerçek uygulamada daha gelişmiş bir geocoding servisi kullanılabilir
-        """
-        # Bazı yaygın şehirler ve ülkeler için sabit koordinatlar
-        geocode_map = {
-            # Türkiye şehirleri
-            "istanbul": {"latitude": 41.0082, "longitude": 28.9784},
-            "ankara": {"latitude": 39.9334, "longitude": 32.8597},
-            "izmir": {"latitude": 38.4237, "longitude": 27.1428},
-            "antalya": {"latitude": 36.8969, "longitude": 30.7133},
-            "bursa": {"latitude": 40.1885, "longitude": 29.0610},
-            "adana": {"latitude": 37.0000, "longitude": 35.3213},
-            
-            # Avrupa şehirleri
-            "london": {"latitude": 51.5074, "longitude": -0.1278},
-            "paris": {"latitude": 48.8566, "longitude": 2.3522},
-            "berlin": {"latitude": 52.5200, "longitude": 13.4050},
-            "rome": {"latitude": 41.9028, "longitude": 12.4964},
-            "madrid": {"latitude": 40.4168, "longitude": -3.7038},
-            "amsterdam": {"latitude": 52.3676, "longitude": 4.9041},
-            "brussels": {"latitude": 50.8503, "longitude": 4.3517},
-            "vienna": {"latitude": 48.2082, "longitude": 16.3738},
-            "athens": {"latitude": 37.9838, "longitude": 23.7275},
-            
-            # Amerika şehirleri
-            "new york": {"latitude": 40.7128, "longitude": -74.0060},
-            "los angeles": {"latitude": 34.0522, "longitude": -118.2437},
-            "chicago": {"latitude": 41.8781, "longitude": -87.6298},
-            "toronto": {"latitude": 43.6532, "longitude": -79.3832},
-            "mexico city": {"latitude": 19.4326, "longitude": -99.1332},
-            "rio de janeiro": {"latitude": -22.9068, "longitude": -43.1729},
-            "buenos aires": {"latitude": -34.6037, "longitude": -58.3816},
-            
-            # Asya şehirleri
-            "tokyo": {"latitude": 35.6762, "longitude": 139.6503},
-            "beijing": {"latitude": 39.9042, "longitude": 116.4074},
-            "shanghai": {"latitude": 31.2304, "longitude": 121.4737},
-            "hong kong": {"latitude": 22.3193, "longitude": 114.1694},
-            "singapore": {"latitude": 1.3521, "longitude": 103.8198},
-            "mumbai": {"latitude": 19.0760, "longitude": 72.8777},
-            "delhi": {"latitude": 28.6139, "longitude": 77.2090},
-            "seoul": {"latitude": 37.5665, "longitude": 126.9780},
-            
-            # Orta Doğu şehirleri
-            "dubai": {"latitude": 25.2048, "longitude": 55.2708},
-            "riyadh": {"latitude": 24.7136, "longitude": 46.6753},
-            "jeddah": {"latitude": 21.5433, "longitude": 39.1728},
-            "mecca": {"latitude": 21.3891, "longitude": 39.8579},
-            "tehran": {"latitude": 35.6892, "longitude": 51.3890},
-            "cairo": {"latitude": 30.0444, "longitude": 31.2357},
-            
-            # Afrika şehirleri
-            "lagos": {"latitude": 6.5244, "longitude": 3.3792},
-            "nairobi": {"latitude": 1.2921, "longitude": 36.8219},
-            "cape town": {"latitude": -33.9249, "longitude": 18.4241},
-            "johannesburg": {"latitude": -26.2041, "longitude": 28.0473},
-            
-            # Okyanusya şehirleri
-            "sydney": {"latitude": -33.8688, "longitude": 151.2093},
-            "melbourne": {"latitude": -37.8136, "longitude": 144.9631},
-            "auckland": {"latitude": -36.8509, "longitude": 174.7645},
-            
-            # Ülkeler (ülke merkezleri)
-            "turkey": {"latitude": 38.9637, "longitude": 35.2433},
-            "usa": {"latitude": 37.0902, "longitude": -95.7129},
-            "uk": {"latitude": 55.3781, "longitude": -3.4360},
-            "france": {"latitude": 46.2276, "longitude": 2.2137},
-            "germany": {"latitude": 51.1657, "longitude": 10.4515},
-            "italy": {"latitude": 41.8719, "longitude": 12.5674},
-            "spain": {"latitude": 40.4637, "longitude": -3.7492},
-            "russia": {"latitude": 61.5240, "longitude": 105.3188},
-            "china": {"latitude": 35.8617, "longitude": 104.1954},
-            "japan": {"latitude": 36.2048, "longitude": 138.2529},
-            "india": {"latitude": 20.5937, "longitude": 78.9629},
-            "brazil": {"latitude": -14.2350, "longitude": -51.9253},
-            "australia": {"latitude": -25.2744, "longitude": 133.7751},
-            "canada": {"latitude": 56.1304, "longitude": -106.3468},
-            "saudi arabia": {"latitude": 23.8859, "longitude": 45.0792},
-            "arabia": {"latitude": 23.8859, "longitude": 45.0792},  # Arabistan için özel giriş
-            "egypt": {"latitude": 26.8206, "longitude": 30.8025},
-            "south africa": {"latitude": -30.5595, "longitude": 22.9375}
-        }
-        
-        # Lokasyonu küçük harfe çevir ve haritada ara
-        location_lower = location.lower().strip()
-        
-        # Tam eşleşme kontrolü
-        if location_lower in geocode_map:
-            print(f"Exact match found for '{location}': {geocode_map[location_lower]}")
-            return geocode_map[location_lower]
-        
-        # Kısmi eşleşme kontrolü - daha akıllı algoritma
-        best_match = None
-        best_match_score = 0
-        
-        for key, coords in geocode_map.items():
-            # Tam içerme kontrolü
-            if key in location_lower:
-                match_score = len(key) / len(location_lower)
-                if match_score > best_match_score:
-                    best_match = key
-                    best_match_score = match_score
-            elif location_lower in key:
-                match_score = len(location_lower) / len(key)
-                if match_score > best_match_score:
-                    best_match = key
-                    best_match_score = match_score
-        
-        # Eğer iyi bir eşleşme bulunduysa (skor > 0.5)
-        if best_match and best_match_score > 0.5:
-            print(f"Partial match found for '{location}': {best_match} (score: {best_match_score})")
-            return geocode_map[best_match]
-        
-        # Geocoding API kullanma (bu örnekte taklit ediyoruz)
-        try:
-            # Gerçek bir uygulamada burada bir geocoding API'si kullanılabilir
-            # Örneğin: Nominatim, Google Maps Geocoding API, vb.
-            
-            # Bazı özel durumlar için manuel eşleştirme
-            if "arab" in location_lower:
-                print(f"Special case for '{location}': Using Saudi Arabia coordinates")
-                return geocode_map["saudi arabia"]
-            
-            if "amster" in location_lower:
-                print(f"Special case for '{location}': Using Amsterdam coordinates")
-                return geocode_map["amsterdam"]
-            
-            # Eşleşme bulunamazsa, varsayılan olarak İstanbul koordinatlarını döndür
-            # ve bir uyarı ekle
-            print(f"No match found for '{location}'. Using default coordinates for Istanbul.")
-            return {
-                "latitude": 41.0082,
-                "longitude": 28.9784,
-                "warning": f"Could not geocode '{location}'. Using default coordinates for Istanbul."
-            }
-        except Exception as e:
-            print(f"Error in geocoding: {str(e)}")
-            return {
-                "latitude": 41.0082,
-                "longitude": 28.9784,
-                "warning": f"Error geocoding '{location}': {str(e)}. Using default coordinates for Istanbul."
-            }
 
 class OpenWebsite(MCPTool):
     """Tool to open a website in the browser"""
+    timeout = 5
+    host_ui = True
+    input_schema = {
+        "type": "object",
+        "properties": {
+            "url": {"type": "string", "minLength": 1, "description": "Address of the website"}
+        },
+        "required": ["url"]
+    }
+    
     def __init__(self):
         super().__init__(
             name="open_website",
@@ -367,10 +339,27 @@ class OpenWebsite(MCPTool):
 
 class CalculateMath(MCPTool):
     """Tool to evaluate mathematical expressions"""
+    timeout = 5
+    input_schema = {
+        "type": "object",
+        "properties": {
+            "expression": {
+                "type": "string",
+                "minLength": 1,
+                "description": "Expression, e.g. '2^10 / 3', 'sqrt(2) * pi', 'mean([4, 8, 15])' or '90 km/h to mph'"
+            },
+            "variables": {
+                "type": "object",
+                "description": "Values of names used in the expression; a list value evaluates the expression for each element"
+            }
+        },
+        "required": ["expression"]
+    }
+    
     def __init__(self):
         super().__init__(
             name="calculate_math",
-            description="Evaluates a mathematical expression"
+            description="Evaluates a mathematical expression with functions (sqrt, log, sin, factorial, sum, mean, ...), unit conversions and lists"
         )
     
     def execute(self, args: Dict[str, Any]) -> Dict[str, Any]:
@@ -379,65 +368,419 @@ class CalculateMath(MCPTool):
         if not expression:
             return {"error": "Expression parameter is required"}
         
-        # Basic validation to prevent code execution
-        if not re.match(r'^[0-9+\-*/().%\s]+$', expression):
-            return {"error": "Invalid characters in expression"}
-        
+        # AST tabanlı, sınırlı değerlendirici; ifadeler bir kez derlenip önbellekte tutulur
         try:
-            # Using eval for demonstration - in production, use a safer alternative
-            result = eval(expression)
-            return {
-                "expression": expression,
-                "result": result
-            }
-        except Exception as e:
+            result = evaluate_expression(expression, args.get("variables"))
+        except MathEvaluationError as e:
             return {"error": str(e)}
+        
+        return {
+            "expression": expression,
+            **result
+        }
+
+class LazyTool(MCPTool):
+    """Placeholder registered from the tool manifest; the tool's module is imported on first use"""
+    
+    def __init__(self, entry: Dict[str, Any]):
+        super().__init__(name=entry["name"], description=entry.get("description", ""))
+        self.module_name = entry["module"]
+        self.class_name = entry["class_name"]
+        self.path = entry["path"]
+        self.parameters = entry.get("parameters")
+        for attribute in ("input_schema", "cache_ttl", "cache_stale_ttl", "timeout"):
+            if attribute in entry:
+                setattr(self, attribute, entry[attribute])
+        self._tool: Optional[MCPTool] = None
+        self._lock = threading.Lock()
+    
+    def load(self) -> MCPTool:
+        """Import the tool's module and create the real tool (once)"""
+        if self._tool is None:
+            with self._lock:
+                if self._tool is None:
+                    module = importlib.import_module(self.module_name)
+                    self._tool = getattr(module, self.class_name)()
+        return self._tool
+    
+    def execute(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        return self.load().execute(args)
 
 class MCPServer:
     """MCP Server that provides tools for AI characters to use"""
     def __init__(self, server_name: str):
         self.server_name = server_name
         self.tools: Dict[str, MCPTool] = {}
+        self.cache = ToolResultCache()
+        self.executor = ToolExecutor()
+        # Tool name -> input schema and its compiled validator
+        self.schemas: Dict[str, Dict[str, Any]] = {}
+        self._validators: Dict[str, CompiledSchema] = {}
     
     def register_tool(self, tool: MCPTool) -> None:
-        """Register a tool with the server"""
+        """Register a tool with the server, compiling its input schema once"""
+        if tool.name in self.tools:
+            # A replaced implementation must not serve the old one's results
+            self.cache.invalidate(tool.name)
+        self._install(tool)
+    
+    def _install(self, tool: MCPTool) -> None:
+        """Make the tool callable under its name and compile its input schema"""
+        self.schemas.pop(tool.name, None)
+        self._validators.pop(tool.name, None)
+        schema = self._schema_for(tool)
+        if schema:
+            try:
+                self._validators[tool.name] = CompiledSchema(schema)
+                self.schemas[tool.name] = schema
+            except Exception as e:
+                print(f"Invalid input schema for tool {tool.name}, arguments will not be validated: {str(e)}")
+        
         self.tools[tool.name] = tool
     
+    @staticmethod
+    def _schema_for(tool: MCPTool) -> Optional[Dict[str, Any]]:
+        """
+        The tool's input schema
+        
+        Dynamic tools that predate input_schema only store the parameter
+        list from detect_tool_need in self.parameters; it is converted.
+        """
+        if tool.input_schema:
+            return tool.input_schema
+        
+        parameters = getattr(tool, "parameters", None)
+        if isinstance(parameters, list):
+            return schema_from_parameters(parameters)
+        if isinstance(parameters, dict) and "properties" in parameters:
+            return parameters
+        return None
+    
+    def _resolve(self, tool_name: str) -> MCPTool:
+        """
+        The tool to run for a name, importing a lazily registered tool first
+        
+        The loaded tool replaces its placeholder without invalidating cached
+        results, since both come from the same module. Isolated dynamic tools
+        stay placeholders: their code only ever runs in the process pool.
+        """
+        tool = self.tools[tool_name]
+        if isinstance(tool, LazyTool) and not self._is_isolated(tool):
+            loaded = tool.load()
+            if self.tools.get(tool_name) is tool:
+                self._install(loaded)
+            return loaded
+        return tool
+    
     def unregister_tool(self, tool_name: str) -> bool:
         """
         Unregister a tool from the server by name
         
         Args:
             tool_name: The name of the tool to unregister
-            
+        
         Returns:
             bool: True if the tool was successfully unregistered, False otherwise
         """
         if tool_name in self.tools:
             del self.tools[tool_name]
+            self.schemas.pop(tool_name, None)
+            self._validators.pop(tool_name, None)
+            self.cache.invalidate(tool_name)
             return True
         return False
     
-    def execute_tool(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a tool by name with the given arguments"""
+    def execute_tool(self, tool_name: str, args: Dict[str, Any],
+                     session_id: Optional[str] = None,
+                     message_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Execute a tool by name with the given arguments
+        
+        Tools with a cache TTL are answered from the result cache when the
+        same canonicalized arguments were seen recently; a stale entry is
+        returned immediately and refreshed in the background. Every actual
+        invocation runs on the server's worker pool and is abandoned with a
+        'timeout' status once the tool's time limit passes. Invocations are
+        timed and handed to the telemetry buffer; the database write
+        happens on a background thread.
+        
+        Args:
+            tool_name: The name of the tool to execute
+            args: Arguments passed to the tool
+            session_id: The session that triggered the call, if any
+            message_id: The message the call belongs to, if any
+        
+        Returns:
+            Dict[str, Any]: The tool result, or a dict with an "error" key
+        """
         if tool_name not in self.tools:
             return {"error": f"Tool '{tool_name}' not found"}
         
         try:
-            return self.tools[tool_name].execute(args)
+            tool = self._resolve(tool_name)
         except Exception as e:
-            return {"error": str(e)}
+            return self._finish(self.tools[tool_name], args, None, e, 0, time.perf_counter(), session_id, message_id)
+        try:
+            args = self._validate(tool_name, args)
+        except ToolArgumentError as e:
+            return self._finish(tool, args, None, e, 0, time.perf_counter(), session_id, message_id)
+        
+        policy = ToolResultCache.policy_for(tool)
+        if policy is None:
+            return self._execute_uncached(tool, args, session_id, message_id)
+        
+        cache_key = ToolResultCache.make_key(tool_name, args)
+        cached, state = self._lookup_cache(tool, args, cache_key, policy)
+        if state != "miss":
+            return cached
+        
+        return self._execute_and_cache(tool, args, cache_key, policy, session_id, message_id)
+    
+    async def aexecute_tool(self, tool_name: str, args: Dict[str, Any],
+                            session_id: Optional[str] = None,
+                            message_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Async counterpart of execute_tool with the same caching, timeout and telemetry
+        
+        Tools that implement aexecute natively run on the event loop and are
+        cancelled on timeout; synchronous tools run on the server's worker pool.
+        
+        Args:
+            tool_name: The name of the tool to execute
+            args: Arguments passed to the tool
+            session_id: The session that triggered the call, if any
+            message_id: The message the call belongs to, if any
+        
+        Returns:
+            Dict[str, Any]: The tool result, or a dict with an "error" key
+        """
+        if tool_name not in self.tools:
+            return {"error": f"Tool '{tool_name}' not found"}
+        
+        try:
+            tool = self.tools[tool_name]
+            if isinstance(tool, LazyTool):
+                # Importing the module must not block the event loop
+                tool = await asyncio.to_thread(self._resolve, tool_name)
+        except Exception as e:
+            return self._finish(self.tools[tool_name], args, None, e, 0, time.perf_counter(), session_id, message_id)
+        try:
+            args = self._validate(tool_name, args)
+        except ToolArgumentError as e:
+            return self._finish(tool, args, None, e, 0, time.perf_counter(), session_id, message_id)
+        
+        policy = ToolResultCache.policy_for(tool)
+        if policy is None:
+            return await self._aexecute_uncached(tool, args, session_id, message_id)
+        
+        cache_key = ToolResultCache.make_key(tool_name, args)
+        cached, state = self._lookup_cache(tool, args, cache_key, policy)
+        if state != "miss":
+            return cached
+        
+        result = await self._aexecute_uncached(tool, args, session_id, message_id)
+        if not (isinstance(result, dict) and "error" in result):
+            self.cache.put(tool.name, cache_key, result, policy)
+        return result
+    
+    def execute_many(self, calls: List[Tuple[str, Dict[str, Any]]],
+                     max_concurrency: int = TOOL_BATCH_MAX_CONCURRENCY,
+                     session_id: Optional[str] = None,
+                     message_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Execute independent tool calls concurrently and return results in order
+        
+        Must be called from synchronous code; inside an event loop await
+        aexecute_many instead.
+        
+        Args:
+            calls: (tool_name, args) pairs
+            max_concurrency: Maximum number of calls running at the same time
+            session_id: The session that triggered the calls, if any
+            message_id: The message the calls belong to, if any
+        
+        Returns:
+            List[Dict[str, Any]]: One result per call, in the order of calls
+        """
+        return asyncio.run(self.aexecute_many(calls, max_concurrency, session_id, message_id))
+    
+    async def aexecute_many(self, calls: List[Tuple[str, Dict[str, Any]]],
+                            max_concurrency: int = TOOL_BATCH_MAX_CONCURRENCY,
+                            session_id: Optional[str] = None,
+                            message_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Async counterpart of execute_many"""
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def run(tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.aexecute_tool(tool_name, args, session_id, message_id)
+        
+        return list(await asyncio.gather(*(run(tool_name, args) for tool_name, args in calls)))
+    
+    def _validate(self, tool_name: str, args: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate and coerce arguments against the tool's compiled schema"""
+        validator = self._validators.get(tool_name)
+        if validator is None:
+            return args if args is not None else {}
+        return validator.validate(args)
+    
+    def _lookup_cache(self, tool: MCPTool, args: Dict[str, Any], cache_key: str,
+                      policy: tuple) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Look up a cached result, scheduling a background refresh if it is stale
+        
+        The refresh is not recorded against the caller's session or message,
+        which was answered from the cache.
+        """
+        cached, state = self.cache.get(tool.name, cache_key)
+        if state == "stale":
+            self.cache.refresh_async(
+                cache_key,
+                lambda: self._execute_and_cache(tool, args, cache_key, policy, None, None)
+            )
+        return cached, state
+    
+    def _execute_and_cache(self, tool: MCPTool, args: Dict[str, Any], cache_key: str,
+                           policy: tuple, session_id: Optional[str],
+                           message_id: Optional[str]) -> Dict[str, Any]:
+        """Run the tool and cache the result if it succeeded"""
+        result = self._execute_uncached(tool, args, session_id, message_id)
+        if not (isinstance(result, dict) and "error" in result):
+            self.cache.put(tool.name, cache_key, result, policy)
+        return result
+    
+    def _execute_uncached(self, tool: MCPTool, args: Dict[str, Any],
+                          session_id: Optional[str],
+                          message_id: Optional[str]) -> Dict[str, Any]:
+        """
+        Run the tool within its timeout, recording telemetry
+        
+        Built-in tools run on the server's thread pool. With
+        DYNAMIC_TOOL_ISOLATION, dynamic tools run in a worker process of
+        the tool process pool instead, which is killed on timeout.
+        """
+        timeout = self._timeout_for(tool)
+        start_time = time.perf_counter()
+        try:
+            if self._is_isolated(tool):
+                result = self._call_isolated(tool, args, timeout)
+            else:
+                result = self.executor.run(lambda: tool.execute(args), timeout)
+        except Exception as e:
+            return self._finish(tool, args, None, e, timeout, start_time, session_id, message_id)
+        return self._finish(tool, args, result, None, timeout, start_time, session_id, message_id)
+    
+    async def _aexecute_uncached(self, tool: MCPTool, args: Dict[str, Any],
+                                 session_id: Optional[str],
+                                 message_id: Optional[str]) -> Dict[str, Any]:
+        """Async counterpart of _execute_uncached"""
+        timeout = self._timeout_for(tool)
+        start_time = time.perf_counter()
+        try:
+            if self._is_isolated(tool):
+                result = await asyncio.to_thread(self._call_isolated, tool, args, timeout)
+            elif tool.is_async:
+                task = asyncio.ensure_future(tool.aexecute(args))
+                done, _ = await asyncio.wait({task}, timeout=timeout or None)
+                if not done:
+                    task.cancel()
+                    raise ToolTimeout(f"Timed out after {timeout:g} seconds")
+                result = task.result()
+            else:
+                result = await self.executor.arun(lambda: tool.execute(args), timeout)
+        except Exception as e:
+            return self._finish(tool, args, None, e, timeout, start_time, session_id, message_id)
+        return self._finish(tool, args, result, None, timeout, start_time, session_id, message_id)
+    
+    @staticmethod
+    def _timeout_for(tool: MCPTool) -> float:
+        """The tool's own time limit, or the default"""
+        return tool.timeout if tool.timeout is not None else TOOL_EXECUTION_TIMEOUT
+    
+    def _is_isolated(self, tool: MCPTool) -> bool:
+        """Whether the tool runs in the tool process pool"""
+        return DYNAMIC_TOOL_ISOLATION and self._is_dynamic(tool)
+    
+    @staticmethod
+    def _call_isolated(tool: MCPTool, args: Dict[str, Any], timeout: float) -> Any:
+        """Run a dynamic tool in a worker process of the tool process pool"""
+        if isinstance(tool, LazyTool):
+            module_name, class_name, path = tool.module_name, tool.class_name, tool.path
+        else:
+            module_name, class_name = type(tool).__module__, type(tool).__name__
+            path = sys.modules[module_name].__file__
+        # The module file's mtime tells workers to reload a regenerated tool
+        version = os.stat(path).st_mtime_ns
+        return get_tool_process_pool().call(module_name, class_name, version, args, timeout)
+    
+    def _finish(self, tool: MCPTool, args: Dict[str, Any], result: Any,
+                error: Optional[Exception], timeout: float, start_time: float,
+                session_id: Optional[str], message_id: Optional[str]) -> Dict[str, Any]:
+        """Turn the outcome of a call into its result and record telemetry"""
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        status = None
+        error_class = None
+        if isinstance(error, ToolTimeout):
+            status = "timeout"
+            error_class = "ToolTimeout"
+            result = {"error": f"Tool '{tool.name}' timed out after {timeout:g} seconds"}
+        elif isinstance(error, ToolArgumentError):
+            error_class = "ToolArgumentError"
+            # Callers should fix the arguments rather than the tool's code
+            result = {
+                "error": f"Invalid arguments for '{tool.name}': {str(error)}",
+                "error_type": "invalid_arguments"
+            }
+        elif error is not None:
+            error_class = getattr(error, "error_class", type(error).__name__)
+            result = {"error": str(error)}
+        
+        failed = isinstance(result, dict) and "error" in result
+        ToolTelemetry.record(
+            tool_name=tool.name,
+            tool_type="dynamic" if self._is_dynamic(tool) else "builtin",
+            tool_description=tool.description,
+            args=args,
+            result=result,
+            duration_ms=duration_ms,
+            status=status or ("error" if failed else "success"),
+            error_class=(error_class or "ToolError") if failed else None,
+            error_message=str(result["error"]) if failed else None,
+            session_id=session_id,
+            message_id=message_id
+        )
+        
+        return result
+    
+    @staticmethod
+    def _is_dynamic(tool: MCPTool) -> bool:
+        """Whether the tool was generated into the dynamic_tools package"""
+        return isinstance(tool, LazyTool) or type(tool).__module__.startswith("dynamic_tools.")
+    
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get result cache hit statistics per tool
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Tool name -> hits, stale_hits, l2_hits, misses and hit_rate
+        """
+        return self.cache.get_stats()
     
     def get_tools_info(self) -> List[Dict[str, str]]:
         """Get information about all available tools"""
         return [{"name": t.name, "description": t.description} for t in self.tools.values()]
 
-def load_dynamic_tools(server: MCPServer) -> None:
+def load_dynamic_tools(server: MCPServer, lazy: bool = LAZY_TOOL_LOADING) -> None:
     """
     Load and register all dynamic tools from the dynamic_tools directory.
     
+    With lazy loading, tools are registered from the cached tool manifest
+    (name, description, schema) and their modules are imported on first
+    execution; only files whose mtime/hash changed are re-read.
+    
     Args:
         server: The MCPServer instance to register tools with
+        lazy: Register manifest placeholders instead of importing every module
     """
     try:
         # Import the dynamic_tools package
@@ -446,11 +789,18 @@ def load_dynamic_tools(server: MCPServer) -> None:
         # Get the package path
         package_path = Path(dynamic_tools.__file__).parent
         
+        if lazy:
+            manifest = ToolManifest(package_path, TOOL_MANIFEST_PATH)
+            for entry in manifest.refresh(MCPTool):
+                server.register_tool(LazyTool(entry))
+                print(f"Registered dynamic tool: {entry['name']} (lazy)")
+            return
+        
         # Iterate through all modules in the package
         for _, module_name, is_pkg in pkgutil.iter_modules([str(package_path)]):
             if is_pkg or module_name == "__init__":
                 continue
-                
+            
             try:
                 # Import the module
                 module = importlib.import_module(f"dynamic_tools.{module_name}")
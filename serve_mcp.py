@@ -0,0 +1,67 @@
+"""
+Command line entry point for serving the MCP tool registry as a standalone Model Context Protocol server.
+
+Örnekler:
+    python serve_mcp.py stdio
+    python serve_mcp.py http --host 0.0.0.0 --port 8765 --workers 4
+"""
+import argparse
+import asyncio
+import sys
+
+from utils.config import MCP_SERVER_HOST, MCP_SERVER_PORT
+
+def create_app():
+    """
+    HTTP taşıması için ASGI uygulamasını oluştur (uvicorn her işçi süreçte çağırır).
+    """
+    from mcp_server import get_default_server
+    from setup_database import ensure_database
+    from utils.mcp_protocol import MCPProtocolHandler, create_http_app
+    
+    # Araç telemetrisi veritabanına yazılır
+    ensure_database()
+    return create_http_app(MCPProtocolHandler(get_default_server()))
+
+def serve_stdio(args: argparse.Namespace) -> None:
+    """
+    Standart giriş/çıkış üzerinden hizmet ver.
+    """
+    # Standart çıkış sadece protokol mesajları içindir; uygulama çıktıları stderr'e gider
+    protocol_out = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    
+    from mcp_server import get_default_server
+    from setup_database import ensure_database
+    from utils.mcp_protocol import MCPProtocolHandler, serve_stdio as run_stdio
+    
+    ensure_database()
+    asyncio.run(run_stdio(MCPProtocolHandler(get_default_server()), sys.stdin.buffer, protocol_out))
+
+def serve_http(args: argparse.Namespace) -> None:
+    """
+    HTTP (Streamable HTTP ve HTTP+SSE) üzerinden hizmet ver.
+    """
+    import uvicorn
+    
+    uvicorn.run("serve_mcp:create_app", factory=True, host=args.host, port=args.port, workers=args.workers)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MCP araçlarını Model Context Protocol sunucusu olarak çalıştır.")
+    subparsers = parser.add_subparsers(dest="transport", required=True)
+    
+    stdio_parser = subparsers.add_parser("stdio", help="Standart giriş/çıkış taşıması")
+    stdio_parser.set_defaults(handler=serve_stdio)
+    
+    http_parser = subparsers.add_parser("http", help="HTTP taşıması (POST /mcp, GET /sse)")
+    http_parser.add_argument("--host", default=MCP_SERVER_HOST, help="Dinlenecek adres")
+    http_parser.add_argument("--port", type=int, default=MCP_SERVER_PORT, help="Dinlenecek port")
+    http_parser.add_argument("--workers", type=int, default=1,
+                             help="İşçi süreç sayısı (SSE oturumları süreç başına tutulur)")
+    http_parser.set_defaults(handler=serve_http)
+    
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
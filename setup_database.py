@@ -1,22 +1,25 @@
 """
-SQLite veritabanını oluşturmak ve tabloları yapılandırmak için script.
+Veritabanını (SQLite veya PostgreSQL) oluşturmak ve şema migration'larını uygulamak için script.
+
+Şema, sıralı ve tekrar çalıştırılabilir (idempotent) migration adımlarından
+oluşur. Uygulanan sürümler schema_migrations tablosunda tutulur; script veya
+uygulama her başlatıldığında yalnızca henüz uygulanmamış adımlar çalıştırılır.
 """
+import json
 import sqlite3
+import sys
+import threading
+from array import array
 from pathlib import Path
-from utils.config import DB_PATH
+from typing import Any, Callable, List, Optional, Tuple
+from utils.content_codec import ContentCodec
+from utils.config import CONTENT_COMPRESSION_THRESHOLD
+from utils.storage import SQLiteBackend, StorageBackend, get_storage_backend
 
-def setup_database():
+def _migration_initial_schema(cursor: sqlite3.Cursor) -> None:
     """
-    SQLite veritabanını oluştur ve tabloları yapılandır.
+    İlk şemayı (tablolar, indeksler ve view'lar) oluştur.
     """
-    print(f"Veritabanı oluşturuluyor: {DB_PATH}")
-    
-    # Veritabanı bağlantısı oluştur
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Tabloları oluştur
-    
     # Users tablosu
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS users (
@@ -371,20 +374,1078 @@ def setup_database():
     GROUP BY DATE(created_at)
     ORDER BY date DESC
     ''')
+
+def _migration_session_listing_indexes(cursor: sqlite3.Cursor) -> None:
+    """
+    Oturum listeleme için bileşik indeksleri ekle.
+    """
+    # Oturum listeleme (keyset sayfalama) için bileşik indeksler
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_status_activity ON sessions(session_status, last_activity_at, session_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user_status_activity ON sessions(user_id, session_status, last_activity_at, session_id)')
+
+def _migration_message_archive(cursor: sqlite3.Cursor) -> None:
+    """
+    Kapanmış oturumların mesajları için arşiv tablosunu ekle.
+    """
+    # Message archive tablosu (kapanmış oturumların sıkıştırılmış mesajları)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS message_archive (
+        session_id TEXT PRIMARY KEY,
+        archive_codec TEXT NOT NULL CHECK (archive_codec IN ('gzip', 'zstd')),
+        message_count INTEGER NOT NULL,
+        archive_payload BLOB NOT NULL, -- Sıkıştırılmış JSONL (her satır bir mesaj)
+        uncompressed_bytes INTEGER,
+        compressed_bytes INTEGER,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (session_id) REFERENCES sessions(session_id) ON DELETE CASCADE
+    )
+    ''')
+
+def _migration_messages_fts(cursor: sqlite3.Cursor) -> None:
+    """
+    Mesajlar için FTS5 tam metin arama indeksini ve tetikleyicilerini ekle.
+    """
+    # Mesajlarda tam metin arama için FTS5 tablosu ve senkronizasyon tetikleyicileri
+    # (FTS satırının rowid'si messages satırının rowid'sidir)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'")
+    fts_exists = cursor.fetchone() is not None
+    
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        message_content,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts (rowid, message_content) VALUES (new.rowid, new.message_content);
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_messages_fts_delete AFTER DELETE ON messages BEGIN
+        DELETE FROM messages_fts WHERE rowid = old.rowid;
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_messages_fts_update AFTER UPDATE OF message_content ON messages BEGIN
+        UPDATE messages_fts SET message_content = new.message_content WHERE rowid = old.rowid;
+    END
+    ''')
+    
+    # Mevcut mesajları yeni oluşturulan indekse ekle
+    if not fts_exists:
+        cursor.execute('INSERT INTO messages_fts (rowid, message_content) SELECT rowid, message_content FROM messages')
+
+def _migration_workload_indexes(cursor: sqlite3.Cursor) -> None:
+    """
+    İndeks setini gerçek sorgu planlarına göre yeniden düzenle.
+    
+    Hiçbir sorgunun kullanmadığı veya UNIQUE kısıtlarının otomatik indeksleriyle
+    ya da daha geniş bileşik indekslerle örtüşen indeksler kaldırılır (her
+    add_message ve aktivite güncellemesi bunları da güncelliyordu); sıcak
+    yollar için bileşik ve kısmi indeksler eklenir.
+    """
+    # Görünür mesaj geçmişi (session_id = ? AND is_hidden = 0 ORDER BY message_index),
+    # sonraki mesaj indeksi (MAX(message_index)) ve oturum bazlı silmeler için tek indeks
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_session_visible ON messages(session_id, is_hidden, message_index)')
+    
+    # Aktif oturum listesi ve süre aşımı taraması için kısmi, kapsayan (covering) indeks
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_sessions_active_activity
+    ON sessions(last_activity_at, session_id, session_name)
+    WHERE session_status = 'active'
+    ''')
+    
+    # Arşivleme ve saklama politikası taramaları için kapanmış oturumlara ait kısmi indeks;
+    # aktif oturumların her aktivite güncellemesi bu indekse dokunmaz
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_sessions_inactive_activity
+    ON sessions(last_activity_at, session_id)
+    WHERE session_status IN ('completed', 'expired')
+    ''')
+    
+    for index_name in (
+        # Yeni bileşik indeksin önekleri
+        'idx_messages_session_id',
+        'idx_messages_index',
+        # Yerini yukarıdaki kısmi indekslere bırakıyor
+        'idx_sessions_status_activity',
+        # Bileşik oturum indekslerinin önekleri
+        'idx_sessions_status',
+        'idx_sessions_user_id',
+        # UNIQUE kısıtlarının otomatik indeksleriyle aynı
+        'idx_tools_name',
+        'idx_embeddings_hash',
+        'idx_users_fingerprint',
+        'idx_analytics_period',
+        # Hiçbir sorgu kullanmıyor
+        'idx_messages_role',
+        'idx_messages_created_at',
+        'idx_sessions_created_at',
+        'idx_sessions_last_activity',
+        'idx_tools_type',
+        'idx_tools_active',
+        'idx_tools_category',
+        'idx_tools_usage',
+        'idx_tool_executions_status',
+        'idx_tool_executions_created_at',
+        'idx_performance_metrics_type',
+        'idx_performance_metrics_recorded_at',
+        'idx_response_cache_type',
+        'idx_users_last_seen',
+    ):
+        cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+def _migration_analytics_rollups(cursor: sqlite3.Cursor) -> None:
+    """
+    Analitik view'larını canlı tablo taramaları yerine özet tablolarına taşı.
+    
+    v_daily_stats usage_analytics içindeki günlük özetleri, v_active_sessions ve
+    v_tool_performance ise sessions ve tools üzerindeki toplu sütunları okur.
+    """
+    # Açık özet kovalarında hangi oturumların görüldüğü (tekil oturum/kullanıcı sayıları için)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analytics_session_activity (
+        period_type TEXT NOT NULL,
+        date_period TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        user_id TEXT,
+        used_tools INTEGER DEFAULT 0,
+        PRIMARY KEY (period_type, date_period, session_id)
+    ) WITHOUT ROWID
+    ''')
+    
+    cursor.execute('DROP VIEW IF EXISTS v_active_sessions')
+    cursor.execute('''
+    CREATE VIEW v_active_sessions AS
+    SELECT
+        s.*,
+        u.user_fingerprint,
+        u.preferred_language,
+        s.message_count as message_count_calc,
+        s.last_activity_at as last_message_at
+    FROM sessions s
+    LEFT JOIN users u ON s.user_id = u.user_id
+    WHERE s.session_status = 'active'
+    ''')
+    
+    cursor.execute('DROP VIEW IF EXISTS v_tool_performance')
+    cursor.execute('''
+    CREATE VIEW v_tool_performance AS
+    SELECT
+        t.tool_id,
+        t.tool_name,
+        t.tool_type,
+        t.tool_category,
+        t.usage_count,
+        t.usage_count as total_executions,
+        CAST(ROUND(t.usage_count * t.success_rate) AS INTEGER) as successful_executions,
+        ROUND(t.success_rate * 100, 2) as success_rate_percent,
+        t.average_execution_time_ms as avg_execution_time_ms,
+        t.last_used_at
+    FROM tools t
+    WHERE t.is_active = 1 AND t.is_deleted = 0
+    ''')
+    
+    cursor.execute('DROP VIEW IF EXISTS v_daily_stats')
+    cursor.execute('''
+    CREATE VIEW v_daily_stats AS
+    SELECT
+        date_period as date,
+        total_sessions as sessions,
+        total_messages as messages,
+        json_extract(performance_summary, '$.sessions_with_tools') as sessions_with_tools,
+        json_extract(performance_summary, '$.avg_tokens_per_message') as avg_tokens_per_message,
+        json_extract(performance_summary, '$.avg_processing_time_ms') as avg_processing_time_ms,
+        total_tool_calls,
+        active_users
+    FROM usage_analytics
+    WHERE period_type = 'daily' AND date_period >= DATE('now', '-30 days')
+    ORDER BY date DESC
+    ''')
+
+def _migration_tool_telemetry(cursor: sqlite3.Cursor) -> None:
+    """
+    tool_executions tablosunu telemetri kayıtları için yeniden oluştur.
+    
+    Araçlar oturum dışında da (ör. doğrulama sırasında) çalıştırılabildiği için
+    session_id artık zorunlu değil; argüman/sonuç boyutu ve hata sınıfı
+    sütunları eklenir. Satırlar rowid'leriyle kopyalanır, böylece analitik
+    özetlemenin watermark'ı geçerli kalır.
+    """
+    cursor.execute('''
+    CREATE TABLE tool_executions_new (
+        execution_id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+        tool_id TEXT NOT NULL,
+        session_id TEXT,
+        message_id TEXT,
+        execution_args JSON DEFAULT '{}',
+        execution_result JSON DEFAULT '{}',
+        execution_status TEXT DEFAULT 'pending' CHECK (execution_status IN ('pending', 'running', 'success', 'error', 'timeout')),
+        execution_time_ms INTEGER,
+        error_message TEXT,
+        error_class TEXT,
+        args_size_bytes INTEGER,
+        result_size_bytes INTEGER,
+        execution_metadata JSON DEFAULT '{}',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP,
+        FOREIGN KEY (tool_id) REFERENCES tools(tool_id) ON DELETE CASCADE,
+        FOREIGN KEY (session_id) REFERENCES sessions(session_id) ON DELETE CASCADE,
+        FOREIGN KEY (message_id) REFERENCES messages(message_id) ON DELETE SET NULL
+    )
+    ''')
+    
+    cursor.execute('''
+    INSERT INTO tool_executions_new (
+        rowid, execution_id, tool_id, session_id, message_id, execution_args, execution_result,
+        execution_status, execution_time_ms, error_message, execution_metadata, created_at, completed_at
+    )
+    SELECT
+        rowid, execution_id, tool_id, session_id, message_id, execution_args, execution_result,
+        execution_status, execution_time_ms, error_message, execution_metadata, created_at, completed_at
+    FROM tool_executions
+    ''')
+    
+    cursor.execute('DROP TABLE tool_executions')
+    cursor.execute('ALTER TABLE tool_executions_new RENAME TO tool_executions')
+    
+    # Araç başına gecikme yüzdelikleri (ORDER BY execution_time_ms LIMIT 1 OFFSET ?)
+    # bu indeks üzerinde çalışır; tool_id filtresi de aynı indeksi kullanır
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tool_executions_tool_latency ON tool_executions(tool_id, execution_time_ms)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tool_executions_session_id ON tool_executions(session_id)')
+
+def _migration_embedding_blobs(cursor: sqlite3.Cursor) -> None:
+    """
+    embeddings_cache vektörlerini JSON metni yerine little-endian float32 BLOB olarak sakla.
+    
+    Aynı içerik farklı modellerle gömülebildiği için benzersizlik
+    (content_hash, embedding_model) çiftine taşınır. Mevcut JSON vektörler
+    parça parça okunup dönüştürülür.
+    """
+    cursor.execute('''
+    CREATE TABLE embeddings_cache_new (
+        embedding_id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+        content_hash TEXT NOT NULL,
+        content_text TEXT NOT NULL,
+        embedding_vector BLOB NOT NULL, -- Little-endian float32 dizisi
+        embedding_model TEXT NOT NULL,
+        embedding_dimensions INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(content_hash, embedding_model)
+    )
+    ''')
+    
+    reader = cursor.connection.cursor()
+    reader.execute('''
+    SELECT embedding_id, content_hash, content_text, embedding_vector,
+           embedding_model, embedding_dimensions, created_at
+    FROM embeddings_cache
+    ''')
+    while True:
+        rows = reader.fetchmany(1000)
+        if not rows:
+            break
+        
+        converted = []
+        for embedding_id, content_hash, content_text, vector, model, dimensions, created_at in rows:
+            if isinstance(vector, str):
+                vector = array('f', json.loads(vector))
+                if sys.byteorder != 'little':
+                    vector.byteswap()
+                vector = vector.tobytes()
+            converted.append((embedding_id, content_hash, content_text, vector, model, dimensions, created_at))
+        
+        cursor.executemany('''
+        INSERT OR IGNORE INTO embeddings_cache_new (
+            embedding_id, content_hash, content_text, embedding_vector,
+            embedding_model, embedding_dimensions, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', converted)
+    
+    cursor.execute('DROP TABLE embeddings_cache')
+    cursor.execute('ALTER TABLE embeddings_cache_new RENAME TO embeddings_cache')
+    
+    # Model bazlı tam yükleme (bellek içi indeks) için
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_model ON embeddings_cache(embedding_model)')
+
+def _migration_content_compression(cursor: sqlite3.Cursor) -> None:
+    """
+    Büyük message_content ve wiki_info değerlerini sıkıştırılmış BLOB olarak sakla.
+    
+    FTS tetikleyicileri yalnızca TEXT içerikleri indeksleyecek şekilde yeniden
+    oluşturulur (sıkıştırılmış mesajları SessionService düz metin olarak
+    indeksler). Eşiği aşan mevcut değerler parça parça sıkıştırılır.
+    """
+    cursor.execute('DROP TRIGGER IF EXISTS trg_messages_fts_insert')
+    cursor.execute('DROP TRIGGER IF EXISTS trg_messages_fts_update')
+    
+    cursor.execute('''
+    CREATE TRIGGER trg_messages_fts_insert AFTER INSERT ON messages
+    WHEN typeof(new.message_content) = 'text' BEGIN
+        INSERT INTO messages_fts (rowid, message_content) VALUES (new.rowid, new.message_content);
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER trg_messages_fts_update AFTER UPDATE OF message_content ON messages BEGIN
+        DELETE FROM messages_fts WHERE rowid = old.rowid;
+        INSERT INTO messages_fts (rowid, message_content)
+        SELECT new.rowid, new.message_content WHERE typeof(new.message_content) = 'text';
+    END
+    ''')
     
-    # Değişiklikleri kaydet
-    conn.commit()
+    last_rowid = 0
+    while True:
+        cursor.execute('''
+        SELECT rowid, message_content FROM messages
+        WHERE rowid > ? AND typeof(message_content) = 'text'
+          AND length(CAST(message_content AS BLOB)) >= ?
+        ORDER BY rowid
+        LIMIT 500
+        ''', (last_rowid, CONTENT_COMPRESSION_THRESHOLD))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        last_rowid = rows[-1][0]
+        
+        compressed = [(rowid, content, ContentCodec.compress(content)) for rowid, content in rows]
+        compressed = [row for row in compressed if ContentCodec.is_compressed(row[2])]
+        cursor.executemany('UPDATE messages SET message_content = ? WHERE rowid = ?',
+                           [(blob, rowid) for rowid, _, blob in compressed])
+        # Güncelleme tetikleyicisi BLOB satırları indeksten çıkarır; düz metinleri geri ekle
+        cursor.executemany('INSERT INTO messages_fts (rowid, message_content) VALUES (?, ?)',
+                           [(rowid, content) for rowid, content, _ in compressed])
+    
+    cursor.execute('''
+    SELECT session_id, wiki_info FROM sessions
+    WHERE typeof(wiki_info) = 'text' AND length(CAST(wiki_info AS BLOB)) >= ?
+    ''', (CONTENT_COMPRESSION_THRESHOLD,))
+    cursor.executemany('UPDATE sessions SET wiki_info = ? WHERE session_id = ?', [
+        (ContentCodec.compress(wiki_info), session_id) for session_id, wiki_info in cursor.fetchall()
+    ])
+
+def _migration_message_tool_calls(cursor: sqlite3.Cursor) -> None:
+    """
+    messages.tool_calls JSON dizisini mesaj başına araç çağrısı satırlarına taşı.
+    
+    Çağrılar mesajla aynı işlemde yazılır ve message_id üzerinden aynı
+    mesaja bağlı tool_executions kayıtlarıyla eşleşir. Mevcut JSON diziler
+    satırlara dönüştürülür; tool_calls sütunu artık yazılmaz.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS message_tool_calls (
+        message_id TEXT NOT NULL,
+        call_index INTEGER NOT NULL, -- Mesaj içindeki çağrı sırası
+        session_id TEXT NOT NULL,
+        tool_name TEXT NOT NULL,
+        call_args TEXT DEFAULT '{}', -- JSON metni (JSON tür adı NUMERIC yakınlık verir)
+        call_result TEXT, -- JSON
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (message_id, call_index),
+        FOREIGN KEY (session_id) REFERENCES sessions(session_id) ON DELETE CASCADE
+    ) WITHOUT ROWID
+    ''')
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_message_tool_calls_session ON message_tool_calls(session_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_message_tool_calls_tool ON message_tool_calls(tool_name, created_at)')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_tool_executions_message_id ON tool_executions(message_id)
+    WHERE message_id IS NOT NULL
+    ''')
+    
+    reader = cursor.connection.cursor()
+    reader.execute('''
+    SELECT message_id, session_id, tool_calls, created_at FROM messages
+    WHERE tool_calls IS NOT NULL AND tool_calls NOT IN ('', '[]')
+    ''')
+    while True:
+        rows = reader.fetchmany(1000)
+        if not rows:
+            break
+        
+        calls = []
+        for message_id, session_id, tool_calls, created_at in rows:
+            try:
+                parsed = json.loads(tool_calls)
+            except ValueError:
+                continue
+            
+            for call_index, call in enumerate(parsed if isinstance(parsed, list) else []):
+                if not isinstance(call, dict):
+                    continue
+                tool_name = call.get("tool_name") or call.get("name")
+                if not tool_name:
+                    continue
+                calls.append((
+                    message_id, call_index, session_id, tool_name,
+                    json.dumps(call.get("args", call.get("arguments", {})), ensure_ascii=False, default=str),
+                    json.dumps(call["result"], ensure_ascii=False, default=str) if "result" in call else None,
+                    created_at
+                ))
+        
+        cursor.executemany('''
+        INSERT OR IGNORE INTO message_tool_calls (
+            message_id, call_index, session_id, tool_name, call_args, call_result, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', calls)
+
+def _pg_migration_baseline(cursor) -> None:
+    """
+    PostgreSQL şemasını SQLite 1.7.0 şemasının karşılığı olarak oluştur.
+    
+    Farklar: JSON sütunları TEXT, BOOLEAN sütunları 0/1 INTEGER olarak tutulur
+    (servislerdeki sorgular her iki arka uçta aynı kalsın diye); messages ve
+    tool_executions, analitik watermark'ları için SQLite rowid'sinin karşılığı
+    olan bir rowid sütunu taşır; FTS5 yerine tsvector ifade indeksi kullanılır.
+    """
+    # lower(hex(randomblob(16))) karşılığı
+    new_id = "md5(random()::text || clock_timestamp()::text)"
+    
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS users (
+        user_id TEXT PRIMARY KEY DEFAULT {new_id},
+        user_fingerprint TEXT UNIQUE,
+        preferred_language TEXT DEFAULT 'tr',
+        timezone TEXT DEFAULT 'Europe/Istanbul',
+        user_preferences TEXT DEFAULT '{{}}',
+        first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        total_sessions INTEGER DEFAULT 0,
+        total_messages INTEGER DEFAULT 0,
+        is_active INTEGER DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
     
-    # İlk şema versiyonunu kaydet
     cursor.execute('''
-    INSERT INTO schema_migrations (version, description)
-    VALUES ('1.0.0', 'Initial schema creation')
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        user_id TEXT REFERENCES users(user_id) ON DELETE SET NULL,
+        session_name TEXT,
+        use_agentic INTEGER DEFAULT 0,
+        system_prompt TEXT,
+        wiki_info TEXT,
+        conversation_context TEXT DEFAULT '{}',
+        session_metadata TEXT DEFAULT '{}',
+        message_count INTEGER DEFAULT 0,
+        tool_usage_count INTEGER DEFAULT 0,
+        last_activity_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        session_duration_seconds INTEGER DEFAULT 0,
+        session_status TEXT DEFAULT 'active' CHECK (session_status IN ('active', 'paused', 'completed', 'expired')),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS messages (
+        message_id TEXT PRIMARY KEY DEFAULT {new_id},
+        rowid BIGSERIAL NOT NULL UNIQUE,
+        session_id TEXT NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+        parent_message_id TEXT REFERENCES messages(message_id) ON DELETE SET NULL,
+        message_role TEXT NOT NULL CHECK (message_role IN ('user', 'assistant', 'system')),
+        message_content TEXT NOT NULL,
+        message_metadata TEXT DEFAULT '{{}}',
+        tool_calls TEXT DEFAULT '[]',
+        processing_time_ms INTEGER,
+        token_count INTEGER,
+        model_used TEXT,
+        temperature REAL,
+        message_index INTEGER,
+        is_hidden INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS tools (
+        tool_id TEXT PRIMARY KEY DEFAULT {new_id},
+        tool_name TEXT UNIQUE NOT NULL,
+        tool_type TEXT NOT NULL CHECK (tool_type IN ('builtin', 'dynamic', 'external')),
+        tool_category TEXT,
+        tool_description TEXT NOT NULL,
+        tool_parameters TEXT DEFAULT '{{}}',
+        tool_source_code TEXT,
+        implementation_details TEXT,
+        version TEXT DEFAULT '1.0.0',
+        is_active INTEGER DEFAULT 1,
+        is_deleted INTEGER DEFAULT 0,
+        creation_method TEXT,
+        creator_session_id TEXT REFERENCES sessions(session_id) ON DELETE SET NULL,
+        usage_count INTEGER DEFAULT 0,
+        success_rate DOUBLE PRECISION DEFAULT 0.0,
+        average_execution_time_ms DOUBLE PRECISION DEFAULT 0.0,
+        last_used_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        deleted_at TIMESTAMP
+    )
+    ''')
+    
+    # message_id için yabancı anahtar yok: telemetri, bağlı olduğu mesaj
+    # yazılmadan önce kaydedilebilir
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS tool_executions (
+        execution_id TEXT PRIMARY KEY DEFAULT {new_id},
+        rowid BIGSERIAL NOT NULL UNIQUE,
+        tool_id TEXT NOT NULL REFERENCES tools(tool_id) ON DELETE CASCADE,
+        session_id TEXT REFERENCES sessions(session_id) ON DELETE CASCADE,
+        message_id TEXT,
+        execution_args TEXT DEFAULT '{{}}',
+        execution_result TEXT DEFAULT '{{}}',
+        execution_status TEXT DEFAULT 'pending' CHECK (execution_status IN ('pending', 'running', 'success', 'error', 'timeout')),
+        execution_time_ms INTEGER,
+        error_message TEXT,
+        error_class TEXT,
+        args_size_bytes INTEGER,
+        result_size_bytes INTEGER,
+        execution_metadata TEXT DEFAULT '{{}}',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP
+    )
     ''')
     
-    conn.commit()
-    conn.close()
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS tool_dependencies (
+        dependency_id TEXT PRIMARY KEY DEFAULT {new_id},
+        tool_id TEXT NOT NULL REFERENCES tools(tool_id) ON DELETE CASCADE,
+        depends_on_tool_id TEXT NOT NULL REFERENCES tools(tool_id) ON DELETE CASCADE,
+        dependency_type TEXT DEFAULT 'required' CHECK (dependency_type IN ('required', 'optional', 'suggested')),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(tool_id, depends_on_tool_id)
+    )
+    ''')
+    
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS conversation_topics (
+        topic_id TEXT PRIMARY KEY DEFAULT {new_id},
+        session_id TEXT NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+        topic_name TEXT NOT NULL,
+        topic_category TEXT,
+        confidence_score REAL DEFAULT 0.0,
+        topic_metadata TEXT DEFAULT '{{}}',
+        first_mentioned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_mentioned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        mention_count INTEGER DEFAULT 1
+    )
+    ''')
+    
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS user_intents (
+        intent_id TEXT PRIMARY KEY DEFAULT {new_id},
+        session_id TEXT NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+        message_id TEXT NOT NULL REFERENCES messages(message_id) ON DELETE CASCADE,
+        intent_type TEXT NOT NULL,
+        intent_confidence REAL DEFAULT 0.0,
+        intent_parameters TEXT DEFAULT '{{}}',
+        tool_suggested TEXT REFERENCES tools(tool_name) ON DELETE SET NULL,
+        was_fulfilled INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS performance_metrics (
+        metric_id TEXT PRIMARY KEY DEFAULT {new_id},
+        metric_type TEXT NOT NULL,
+        metric_name TEXT NOT NULL,
+        metric_value DOUBLE PRECISION NOT NULL,
+        metric_unit TEXT,
+        metric_metadata TEXT DEFAULT '{{}}',
+        recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        session_id TEXT REFERENCES sessions(session_id) ON DELETE SET NULL
+    )
+    ''')
+    
+    # date_period saatlik kovalar için saat bilgisi de taşır
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS usage_analytics (
+        analytics_id TEXT PRIMARY KEY DEFAULT {new_id},
+        date_period TEXT NOT NULL,
+        period_type TEXT DEFAULT 'daily' CHECK (period_type IN ('hourly', 'daily', 'weekly', 'monthly')),
+        total_sessions INTEGER DEFAULT 0,
+        total_messages INTEGER DEFAULT 0,
+        total_tool_calls INTEGER DEFAULT 0,
+        active_users INTEGER DEFAULT 0,
+        average_session_duration DOUBLE PRECISION DEFAULT 0.0,
+        popular_tools TEXT DEFAULT '[]',
+        performance_summary TEXT DEFAULT '{{}}',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(date_period, period_type)
+    )
+    ''')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS response_cache (
+        cache_key TEXT PRIMARY KEY,
+        cache_value TEXT NOT NULL,
+        cache_metadata TEXT DEFAULT '{}',
+        cache_type TEXT DEFAULT 'api_response',
+        expires_at TIMESTAMP,
+        hit_count INTEGER DEFAULT 0,
+        last_accessed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS embeddings_cache (
+        embedding_id TEXT PRIMARY KEY DEFAULT {new_id},
+        content_hash TEXT NOT NULL,
+        content_text TEXT NOT NULL,
+        embedding_vector BYTEA NOT NULL, -- Little-endian float32 dizisi
+        embedding_model TEXT NOT NULL,
+        embedding_dimensions INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(content_hash, embedding_model)
+    )
+    ''')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS system_config (
+        config_key TEXT PRIMARY KEY,
+        config_value TEXT NOT NULL,
+        config_type TEXT DEFAULT 'string' CHECK (config_type IN ('string', 'integer', 'float', 'boolean', 'json')),
+        config_description TEXT,
+        is_sensitive INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS external_services (
+        service_id TEXT PRIMARY KEY DEFAULT {new_id},
+        service_name TEXT UNIQUE NOT NULL,
+        service_type TEXT NOT NULL,
+        service_url TEXT,
+        api_key_encrypted TEXT,
+        service_config TEXT DEFAULT '{{}}',
+        is_active INTEGER DEFAULT 1,
+        rate_limit INTEGER DEFAULT 100,
+        rate_limit_window TEXT DEFAULT '1h',
+        last_status_check TIMESTAMP,
+        status TEXT DEFAULT 'unknown' CHECK (status IN ('active', 'inactive', 'error', 'unknown')),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS message_archive (
+        session_id TEXT PRIMARY KEY REFERENCES sessions(session_id) ON DELETE CASCADE,
+        archive_codec TEXT NOT NULL CHECK (archive_codec IN ('gzip', 'zstd')),
+        message_count INTEGER NOT NULL,
+        archive_payload BYTEA NOT NULL,
+        uncompressed_bytes INTEGER,
+        compressed_bytes INTEGER,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analytics_session_activity (
+        period_type TEXT NOT NULL,
+        date_period TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        user_id TEXT,
+        used_tools INTEGER DEFAULT 0,
+        PRIMARY KEY (period_type, date_period, session_id)
+    )
+    ''')
+    
+    # İndeksler (SQLite 1.4.0 sonrası indeks setiyle aynı)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_session_visible ON messages(session_id, is_hidden, message_index)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_parent_id ON messages(parent_message_id)')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_sessions_active_activity
+    ON sessions(last_activity_at, session_id, session_name)
+    WHERE session_status = 'active'
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_sessions_inactive_activity
+    ON sessions(last_activity_at, session_id)
+    WHERE session_status IN ('completed', 'expired')
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user_status_activity ON sessions(user_id, session_status, last_activity_at, session_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tool_executions_tool_latency ON tool_executions(tool_id, execution_time_ms)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tool_executions_session_id ON tool_executions(session_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_response_cache_expires ON response_cache(expires_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_model ON embeddings_cache(embedding_model)')
+    
+    # FTS5 yerine tam metin arama için ifade indeksi
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_fts ON messages USING GIN (to_tsvector('simple', message_content))")
+    
+    # View'lar (SQLite 1.5.0 sürümündeki özet tabanlı tanımlar)
+    cursor.execute('''
+    CREATE OR REPLACE VIEW v_active_sessions AS
+    SELECT
+        s.*,
+        u.user_fingerprint,
+        u.preferred_language,
+        s.message_count as message_count_calc,
+        s.last_activity_at as last_message_at
+    FROM sessions s
+    LEFT JOIN users u ON s.user_id = u.user_id
+    WHERE s.session_status = 'active'
+    ''')
+    
+    cursor.execute('''
+    CREATE OR REPLACE VIEW v_tool_performance AS
+    SELECT
+        t.tool_id,
+        t.tool_name,
+        t.tool_type,
+        t.tool_category,
+        t.usage_count,
+        t.usage_count as total_executions,
+        CAST(ROUND(t.usage_count * t.success_rate) AS INTEGER) as successful_executions,
+        ROUND(CAST(t.success_rate * 100 AS NUMERIC), 2) as success_rate_percent,
+        t.average_execution_time_ms as avg_execution_time_ms,
+        t.last_used_at
+    FROM tools t
+    WHERE t.is_active = 1 AND t.is_deleted = 0
+    ''')
+    
+    cursor.execute('''
+    CREATE OR REPLACE VIEW v_daily_stats AS
+    SELECT
+        date_period as date,
+        total_sessions as sessions,
+        total_messages as messages,
+        CAST(performance_summary::json ->> 'sessions_with_tools' AS INTEGER) as sessions_with_tools,
+        CAST(performance_summary::json ->> 'avg_tokens_per_message' AS DOUBLE PRECISION) as avg_tokens_per_message,
+        CAST(performance_summary::json ->> 'avg_processing_time_ms' AS DOUBLE PRECISION) as avg_processing_time_ms,
+        total_tool_calls,
+        active_users
+    FROM usage_analytics
+    WHERE period_type = 'daily' AND date_period >= to_char(CURRENT_DATE - 30, 'YYYY-MM-DD')
+    ORDER BY date DESC
+    ''')
+
+def _pg_migration_content_compression(cursor) -> None:
+    """
+    PostgreSQL'de büyük metinlerin sıkıştırılmasını TOAST'a bırak.
+    
+    toast_tuple_target düşürülerek ~1 KB üzerindeki satırlar sıkıştırılır;
+    sunucu destekliyorsa (PostgreSQL 14+, lz4 ile derlenmiş) pglz yerine daha
+    hızlı açılan lz4 kullanılır. Ayarlar yalnızca yeni yazılan değerleri etkiler.
+    """
+    cursor.execute('ALTER TABLE messages SET (toast_tuple_target = 1024)')
+    cursor.execute('ALTER TABLE sessions SET (toast_tuple_target = 1024)')
+    cursor.execute('''
+    DO $$
+    BEGIN
+        IF current_setting('server_version_num')::int >= 140000 THEN
+            BEGIN
+                ALTER TABLE messages ALTER COLUMN message_content SET COMPRESSION lz4;
+                ALTER TABLE sessions ALTER COLUMN wiki_info SET COMPRESSION lz4;
+            EXCEPTION WHEN feature_not_supported THEN
+                NULL;
+            END;
+        END IF;
+    END
+    $$
+    ''')
+
+def _pg_migration_message_tool_calls(cursor) -> None:
+    """
+    Mesaj başına araç çağrısı tablosunu oluştur (SQLite 1.9.0 karşılığı).
+    
+    PostgreSQL şeması 1.7.0'dan beri tool_calls sütununa yazılmış bir
+    veri taşımadığından yalnızca tablo ve indeksler oluşturulur.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS message_tool_calls (
+        message_id TEXT NOT NULL,
+        call_index INTEGER NOT NULL,
+        session_id TEXT NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+        tool_name TEXT NOT NULL,
+        call_args TEXT DEFAULT '{}',
+        call_result TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (message_id, call_index)
+    )
+    ''')
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_message_tool_calls_session ON message_tool_calls(session_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_message_tool_calls_tool ON message_tool_calls(tool_name, created_at)')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_tool_executions_message_id ON tool_executions(message_id)
+    WHERE message_id IS NOT NULL
+    ''')
+
+def _migration_tool_latency_window(cursor) -> None:
+    """
+    Gecikme yüzdelikleri için araç başına son çalıştırmaları okuyan kapsayan indeksi ekle.
+    
+    Yüzdelikler artık aracın son TOOL_TELEMETRY_PERCENTILE_WINDOW çalıştırmasından
+    hesaplanır (ORDER BY created_at DESC LIMIT ?); tüm çalıştırmaları sıralı
+    gezen eski gecikme indeksi kaldırılır. tool_id filtresi yeni indeksin
+    önekini kullanır. SQL her iki arka uçta da aynıdır.
+    """
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_tool_executions_tool_recent
+    ON tool_executions(tool_id, created_at, execution_time_ms)
+    ''')
+    cursor.execute('DROP INDEX IF EXISTS idx_tool_executions_tool_latency')
+
+# Sıralı migration listesi: (sürüm, açıklama, adım). Yeni şema değişiklikleri
+# listenin sonuna yeni bir sürümle eklenir; mevcut adımlar değiştirilmez.
+MIGRATIONS: List[Tuple[str, str, Callable[[sqlite3.Cursor], None]]] = [
+    ("1.0.0", "Initial schema creation", _migration_initial_schema),
+    ("1.1.0", "Composite indexes for keyset session listing", _migration_session_listing_indexes),
+    ("1.2.0", "Compressed message archive table", _migration_message_archive),
+    ("1.3.0", "FTS5 full-text search over messages", _migration_messages_fts),
+    ("1.4.0", "Workload-driven composite and partial indexes", _migration_workload_indexes),
+    ("1.5.0", "Analytics views backed by incremental rollups", _migration_analytics_rollups),
+    ("1.6.0", "Tool execution telemetry columns and latency index", _migration_tool_telemetry),
+    ("1.7.0", "Binary float32 embedding vectors", _migration_embedding_blobs),
+    ("1.8.0", "Transparent compression for large message content", _migration_content_compression),
+    ("1.9.0", "Per-call tool call rows linked to messages", _migration_message_tool_calls),
+    ("1.10.0", "Recent-window tool latency index", _migration_tool_latency_window),
+]
+
+# PostgreSQL migration listesi. PostgreSQL desteği 1.7.0 şemasıyla başladığından
+# ilk adım o sürüme kadarki tüm şemayı oluşturur; sonraki şema değişiklikleri
+# her iki listeye de aynı sürüm numarasıyla eklenir.
+POSTGRES_MIGRATIONS: List[Tuple[str, str, Callable[[Any], None]]] = [
+    ("1.7.0", "PostgreSQL baseline schema (equivalent to SQLite 1.7.0)", _pg_migration_baseline),
+    ("1.8.0", "TOAST compression settings for large message content", _pg_migration_content_compression),
+    ("1.9.0", "Per-call tool call rows linked to messages", _pg_migration_message_tool_calls),
+    ("1.10.0", "Recent-window tool latency index", _migration_tool_latency_window),
+]
+
+# Eşzamanlı başlatılan uygulama kopyalarının migration'ları sırayla uygulaması için
+# PostgreSQL danışma kilidi (advisory lock) anahtarı
+_PG_MIGRATION_LOCK_KEY = 7368291
+
+# Bu süreçte veritabanının güncel olduğu doğrulandı mı
+_schema_checked = False
+_schema_lock = threading.Lock()
+
+def _version_key(version: str) -> Tuple[int, ...]:
+    """
+    Sürüm metnini karşılaştırılabilir bir tuple'a dönüştür ('1.10.0' > '1.9.0').
+    """
+    return tuple(int(part) for part in version.split("."))
+
+def _resolve_backend(db_path: Optional[Path], backend: Optional[StorageBackend]) -> StorageBackend:
+    """
+    Migration'ların çalışacağı arka ucu belirle (db_path verilirse o SQLite dosyası).
+    """
+    if backend is not None:
+        return backend
+    if db_path is not None:
+        return SQLiteBackend(db_path)
+    return get_storage_backend()
+
+def _migrations_for(backend: StorageBackend) -> List[Tuple[str, str, Callable[[Any], None]]]:
+    """
+    Arka uca ait migration listesini sürüm sırasıyla döndür.
+    """
+    migrations = POSTGRES_MIGRATIONS if backend.dialect == "postgresql" else MIGRATIONS
+    return sorted(migrations, key=lambda m: _version_key(m[0]))
+
+def _applied_versions(cursor, dialect: str = "sqlite") -> set:
+    """
+    Uygulanmış migration sürümlerini getir (tablo yoksa boş küme).
+    """
+    if dialect == "postgresql":
+        cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+        exists = cursor.fetchone()[0]
+    else:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'")
+        exists = cursor.fetchone() is not None
+    
+    if not exists:
+        return set()
+    
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def _record_migration(cursor, version: str, description: str) -> None:
+    """
+    Uygulanan sürümü schema_migrations tablosuna yaz.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version TEXT PRIMARY KEY,
+            description TEXT,
+            executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+        (version, description)
+    )
+
+def get_pending_migrations(db_path: Path = None, backend: StorageBackend = None) -> List[str]:
+    """
+    Henüz uygulanmamış migration sürümlerini getir.
+    
+    Args:
+        db_path: SQLite veritabanı dosyasının yolu (verilmezse yapılandırılmış arka uç)
+        backend: Kullanılacak arka uç
+    
+    Returns:
+        List: Bekleyen sürümler (uygulanma sırasıyla)
+    """
+    backend = _resolve_backend(db_path, backend)
+    conn = backend.connect()
+    try:
+        applied = _applied_versions(conn.cursor(), backend.dialect)
+    finally:
+        conn.close()
+    
+    return [version for version, _, _ in _migrations_for(backend) if version not in applied]
+
+def _run_sqlite_migrations(backend: SQLiteBackend, verbose: bool) -> List[str]:
+    """
+    SQLite migration'larını BEGIN IMMEDIATE yazma kilidi altında uygula.
+    """
+    conn = sqlite3.connect(backend.db_path, isolation_level=None)
+    cursor = conn.cursor()
+    applied_now = []
+    
+    try:
+        applied = _applied_versions(cursor)
+        
+        if not applied:
+            # Silinen satırların sayfaları süpürücü tarafından parça parça geri kazanılabilsin
+            # (yalnızca henüz tablo içermeyen yeni bir veritabanında etkilidir)
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        
+        for version, description, step in _migrations_for(backend):
+            if version in applied:
+                continue
+            
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                # Kilidi beklerken başka bir süreç bu adımı uygulamış olabilir
+                if version in _applied_versions(cursor):
+                    cursor.execute("COMMIT")
+                    continue
+                
+                step(cursor)
+                _record_migration(cursor, version, description)
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            
+            applied_now.append(version)
+            if verbose:
+                print(f"Migration uygulandı: {version} - {description}")
+    finally:
+        conn.close()
+    
+    return applied_now
+
+def _run_postgres_migrations(backend: StorageBackend, verbose: bool) -> List[str]:
+    """
+    PostgreSQL migration'larını işlem kapsamlı danışma kilidi altında uygula.
+    
+    PostgreSQL'de DDL de işlemseldir; her adım sürüm kaydıyla birlikte
+    commit edilir veya tamamen geri alınır.
+    """
+    conn = backend.connect()
+    cursor = conn.cursor()
+    applied_now = []
+    
+    try:
+        for version, description, step in _migrations_for(backend):
+            cursor.execute("SELECT pg_advisory_xact_lock(?)", (_PG_MIGRATION_LOCK_KEY,))
+            
+            if version in _applied_versions(cursor, backend.dialect):
+                conn.commit()
+                continue
+            
+            try:
+                step(cursor)
+                _record_migration(cursor, version, description)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            
+            applied_now.append(version)
+            if verbose:
+                print(f"Migration uygulandı: {version} - {description}")
+    finally:
+        conn.close()
+    
+    return applied_now
+
+def run_migrations(db_path: Path = None, verbose: bool = True, backend: StorageBackend = None) -> List[str]:
+    """
+    Bekleyen migration'ları sırayla, her birini kendi işleminde uygula.
+    
+    Migration'lar yazma kilidi (SQLite'ta BEGIN IMMEDIATE, PostgreSQL'de
+    danışma kilidi) alınarak çalıştırılır ve kilit alındıktan sonra uygulanmış
+    sürümler yeniden okunur; böylece aynı anda başlatılan birden fazla süreç
+    aynı adımı iki kez uygulamaz.
+    
+    Args:
+        db_path: SQLite veritabanı dosyasının yolu (verilmezse yapılandırılmış arka uç)
+        verbose: Uygulanan adımları yazdır
+        backend: Kullanılacak arka uç
+    
+    Returns:
+        List: Bu çağrıda uygulanan sürümler
+    """
+    backend = _resolve_backend(db_path, backend)
+    
+    if backend.dialect == "postgresql":
+        return _run_postgres_migrations(backend, verbose)
+    return _run_sqlite_migrations(backend, verbose)
+
+def ensure_database(db_path: Path = None, backend: StorageBackend = None) -> None:
+    """
+    Veritabanı şemasının güncel olduğundan emin ol (uygulama başlangıcında çağrılır).
+    
+    Şema güncelse yalnızca schema_migrations tablosu okunur; sonuç süreç
+    boyunca hatırlandığından sonraki çağrılar veritabanına hiç gitmez.
+    
+    Args:
+        db_path: SQLite veritabanı dosyasının yolu (verilmezse yapılandırılmış arka uç)
+        backend: Kullanılacak arka uç
+    """
+    global _schema_checked
+    
+    if _schema_checked:
+        return
+    
+    with _schema_lock:
+        if _schema_checked:
+            return
+        
+        backend = _resolve_backend(db_path, backend)
+        if get_pending_migrations(backend=backend):
+            run_migrations(backend=backend)
+        
+        _schema_checked = True
+
+def setup_database():
+    """
+    Yapılandırılmış veritabanını oluştur ve bekleyen tüm migration'ları uygula.
+    """
+    backend = get_storage_backend()
+    print(f"Veritabanı hazırlanıyor: {backend.describe()}")
+    
+    applied = run_migrations(backend=backend)
     
-    print("Veritabanı başarıyla oluşturuldu ve yapılandırıldı.")
+    if applied:
+        print(f"Veritabanı başarıyla güncellendi ({len(applied)} migration uygulandı).")
+    else:
+        print("Veritabanı zaten güncel.")
 
 if __name__ == "__main__":
-    setup_database()
\ No newline at end of file
+    setup_database()
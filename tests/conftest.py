@@ -0,0 +1,19 @@
+"""
+Shared fixtures for the test suite.
+"""
+import pytest
+
+import setup_database
+from utils.storage import SQLiteBackend, get_storage_backend, set_storage_backend
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path, monkeypatch):
+    """Use a freshly migrated temporary SQLite database as the process-wide backend."""
+    previous = get_storage_backend()
+    backend = SQLiteBackend(tmp_path / "test.db")
+    set_storage_backend(backend)
+    monkeypatch.setattr(setup_database, "_schema_checked", False)
+    setup_database.run_migrations(backend=backend, verbose=False)
+    yield backend
+    set_storage_backend(previous)
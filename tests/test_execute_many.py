@@ -0,0 +1,88 @@
+"""
+Tests for MCPServer.execute_many / aexecute_many fan-out.
+"""
+import asyncio
+import time
+
+import pytest
+
+from mcp_server import MCPServer, MCPTool
+from utils.tool_executor import ToolExecutor
+from utils.tool_telemetry import ToolTelemetry
+
+CALL_SECONDS = 0.3
+
+
+class SleepTool(MCPTool):
+    """Sleeps for the requested time and echoes its id."""
+    cache_ttl = 0
+    timeout = 2
+    input_schema = {
+        "type": "object",
+        "properties": {"id": {"type": "integer"}, "seconds": {"type": "number"}},
+        "required": ["id"]
+    }
+    
+    def __init__(self):
+        super().__init__(name="sleep_tool", description="Sleeps for the requested time")
+    
+    def execute(self, args):
+        time.sleep(args.get("seconds", CALL_SECONDS))
+        return {"id": args["id"]}
+
+
+@pytest.fixture
+def server(sqlite_backend):
+    server = MCPServer("test")
+    server.executor = ToolExecutor(max_workers=8)
+    server.register_tool(SleepTool())
+    # A warm worker, as in a running server
+    server.execute_tool("sleep_tool", {"id": -1, "seconds": 0})
+    yield server
+    ToolTelemetry.flush()
+
+
+def _calls(count):
+    # Later calls finish first, so the order of results cannot come from completion order
+    return [("sleep_tool", {"id": index, "seconds": CALL_SECONDS + 0.02 * (count - index)}) for index in range(count)]
+
+
+def test_execute_many_runs_calls_concurrently_in_input_order(server):
+    start = time.perf_counter()
+    results = server.execute_many(_calls(4))
+    elapsed = time.perf_counter() - start
+    
+    assert results == [{"id": index} for index in range(4)]
+    assert elapsed < CALL_SECONDS * 1.8
+
+
+def test_aexecute_many_runs_calls_concurrently_in_input_order(server):
+    start = time.perf_counter()
+    results = asyncio.run(server.aexecute_many(_calls(6), max_concurrency=6))
+    elapsed = time.perf_counter() - start
+    
+    assert results == [{"id": index} for index in range(6)]
+    assert elapsed < CALL_SECONDS * 1.8
+
+
+def test_execute_many_respects_max_concurrency(server):
+    start = time.perf_counter()
+    results = server.execute_many(_calls(4), max_concurrency=2)
+    elapsed = time.perf_counter() - start
+    
+    assert results == [{"id": index} for index in range(4)]
+    assert elapsed >= CALL_SECONDS * 2
+
+
+def test_execute_many_keeps_errors_in_place(server):
+    results = server.execute_many([
+        ("sleep_tool", {"id": 0, "seconds": 0}),
+        ("missing_tool", {}),
+        ("sleep_tool", {"id": "x"}),
+        ("sleep_tool", {"id": 3, "seconds": 0}),
+    ])
+    
+    assert results[0] == {"id": 0}
+    assert "error" in results[1]
+    assert "error" in results[2]
+    assert results[3] == {"id": 3}
@@ -0,0 +1,36 @@
+"""
+Tests for reading and searching the offline geocoder index.
+"""
+from utils.geocoder import GeocodeIndex
+
+HEADER = "# name, alternatenames, latitude, longitude, feature_code, country_code, population\n"
+
+
+def _index(tmp_path, *rows):
+    path = tmp_path / "cities.tsv"
+    path.write_text(HEADER + "".join("\t".join(row) + "\n" for row in rows), encoding="utf-8")
+    return GeocodeIndex([str(path)])
+
+
+def test_malformed_rows_are_skipped_without_dropping_the_rest(tmp_path, capsys):
+    index = _index(
+        tmp_path,
+        ("Ankara", "Angora", "39.9334", "32.8597", "PPLC", "TR", "5700000"),
+        ("Broken", "", "not-a-number", "1.0", "PPL", "TR", "10"),
+        ("Short row", "40.0"),
+        ("İzmir", "Izmir,Smyrna", "38.4237", "27.1428", "PPLA", "TR", "4400000"),
+    )
+    
+    assert len(index) == 2
+    assert index.geocode("İzmir'de")["name"] == "İzmir"
+    assert index.geocode("Smyrna")["latitude"] == 38.4237
+    assert index.geocode("Broken") is None
+    assert "2 hatalı satır" in capsys.readouterr().out
+
+
+def test_missing_file_leaves_an_empty_index(tmp_path, capsys):
+    index = GeocodeIndex([str(tmp_path / "missing.tsv")])
+    
+    assert len(index) == 0
+    assert index.geocode("Ankara") is None
+    assert "missing.tsv" in capsys.readouterr().out
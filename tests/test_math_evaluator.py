@@ -0,0 +1,58 @@
+"""
+Tests for the evaluation limits of the math expression engine.
+"""
+import pytest
+
+from mcp_server import CalculateMath
+from utils.config import MATH_MAX_LIST_LENGTH
+from utils import math_evaluator
+from utils.math_evaluator import MathEvaluationError, evaluate_expression
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("9**9**9", "Exponent is too large"),
+    ("2**10001", "Exponent is too large"),
+    ("factorial(100000)", "Result is too large"),
+    ("comb(10**6, 5*10**5)", "Result is too large"),
+    ("perm(10**6, 10**5)", "Result is too large"),
+    ("range(1e300)", "List is too long"),
+    ("range(10**30)", "List is too long"),
+    ("range(10**30, 0, -1)", "List is too long"),
+    ("len(range(10**20))", "List is too long"),
+    (f"range({MATH_MAX_LIST_LENGTH + 1})", "List is too long"),
+    ("range(1, 10, 0)", "step must not be zero"),
+])
+def test_expressions_beyond_the_limits_raise_evaluation_errors(expression, message):
+    with pytest.raises(MathEvaluationError, match=message):
+        evaluate_expression(expression)
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("factorial(10)", 3628800),
+    ("comb(52, 5)", 2598960),
+    ("perm(5, 2)", 20),
+    (f"len(range({MATH_MAX_LIST_LENGTH}))", MATH_MAX_LIST_LENGTH),
+    ("range(2, 10, 3)", [2, 5, 8]),
+    ("range(10, 0, -3)", [10, 7, 4, 1]),
+    ("range(5, 1)", []),
+    ("len(range(-1e300, 1e300, 1e299))", 20),
+])
+def test_expressions_within_the_limits_evaluate(expression, expected):
+    assert evaluate_expression(expression)["result"] == expected
+
+
+def test_list_length_is_limited(monkeypatch):
+    with pytest.raises(MathEvaluationError, match="too many values"):
+        evaluate_expression("sum(x)", {"x": [1] * (MATH_MAX_LIST_LENGTH + 1)})
+    
+    # A literal over the real limit would not fit in the expression length limit
+    monkeypatch.setattr(math_evaluator, "MATH_MAX_LIST_LENGTH", 3)
+    with pytest.raises(MathEvaluationError, match="List is too long"):
+        evaluate_expression("sum([1, 2, 3, 4])")
+    assert evaluate_expression("sum([1, 2, 3])")["result"] == 6
+
+
+def test_calculate_math_reports_huge_range_as_tool_error():
+    result = CalculateMath().execute({"expression": "len(range(10**20))"})
+    
+    assert "List is too long" in result["error"]
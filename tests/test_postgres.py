@@ -0,0 +1,131 @@
+"""
+Integration tests for the PostgreSQL backend.
+
+They run only when DATABASE_URL points to a PostgreSQL server and psycopg2 is
+installed. Each test works in its own temporary schema, which is dropped
+afterwards, so the database itself is left untouched.
+"""
+import os
+import uuid
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+import setup_database
+from utils.analytics_service import AnalyticsService
+from utils.session_service import SessionService
+from utils.storage import PostgresBackend, get_storage_backend, set_storage_backend
+
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+
+pytestmark = pytest.mark.skipif(
+    not DATABASE_URL.startswith(("postgres://", "postgresql://")),
+    reason="DATABASE_URL does not point to a PostgreSQL server"
+)
+
+
+class SchemaBackend(PostgresBackend):
+    """PostgresBackend whose connections all use one schema."""
+    
+    def __init__(self, dsn: str, schema: str):
+        super().__init__(dsn, min_connections=1, max_connections=4, read_dsns=[])
+        self.schema = schema
+    
+    def connect(self):
+        conn = super().connect()
+        conn.execute(f"SET search_path TO {self.schema}")
+        conn.commit()
+        return conn
+
+
+@pytest.fixture
+def pg_backend(monkeypatch):
+    """Use an empty temporary schema as the process-wide backend; the schema is not migrated."""
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    admin = psycopg2.connect(DATABASE_URL)
+    admin.autocommit = True
+    admin.cursor().execute(f"CREATE SCHEMA {schema}")
+    
+    previous = get_storage_backend()
+    backend = SchemaBackend(DATABASE_URL, schema)
+    set_storage_backend(backend)
+    monkeypatch.setattr(setup_database, "_schema_checked", False)
+    yield backend
+    
+    set_storage_backend(previous)
+    for pool in backend._pools.values():
+        pool.closeall()
+    admin.cursor().execute(f"DROP SCHEMA {schema} CASCADE")
+    admin.close()
+
+
+@pytest.fixture
+def migrated(pg_backend):
+    setup_database.run_migrations(backend=pg_backend, verbose=False)
+    return pg_backend
+
+
+def test_migrations_are_idempotent(pg_backend):
+    applied = setup_database.run_migrations(backend=pg_backend, verbose=False)
+    
+    assert applied == [version for version, _, _ in setup_database.POSTGRES_MIGRATIONS]
+    assert setup_database.run_migrations(backend=pg_backend, verbose=False) == []
+    assert setup_database.get_pending_migrations(backend=pg_backend) == []
+
+
+def test_session_and_messages_round_trip(migrated):
+    session_id = SessionService.create_session(session_name="pg round trip")
+    first = SessionService.add_message(session_id, "user", "Merhaba, 100% hazır mısın?")
+    SessionService.add_message(session_id, "assistant", "Evet -- it's ready", parent_message_id=first)
+    
+    messages = SessionService.get_messages(session_id, max_staleness=0)
+    
+    assert SessionService.get_session(session_id)["session_name"] == "pg round trip"
+    assert [m["message_role"] for m in messages] == ["user", "assistant"]
+    assert [m["message_content"] for m in messages] == ["Merhaba, 100% hazır mısın?", "Evet -- it's ready"]
+    assert messages[1]["parent_message_id"] == first
+    assert [m["message_index"] for m in messages] == [0, 1]
+
+
+def test_full_text_search(migrated):
+    session_id = SessionService.create_session(session_name="search")
+    SessionService.add_message(session_id, "user", "İstanbul'da hava nasıl?")
+    SessionService.add_message(session_id, "assistant", "Ankara güneşli")
+    other = SessionService.create_session(session_name="other")
+    SessionService.add_message(other, "user", "Ankara trafiği")
+    
+    results = SessionService.search_messages("ankar")
+    
+    assert {r["session_id"] for r in results} == {session_id, other}
+    assert all("**" in r["snippet"] for r in results)
+    assert len(SessionService.search_messages("ankara", session_id=session_id)) == 1
+    pages = [SessionService.search_messages("ankara", limit=1, offset=offset)[0] for offset in (0, 1)]
+    assert {r["message_id"] for r in pages} == {r["message_id"] for r in results}
+
+
+def test_rollup_watermark_waits_for_uncommitted_rows(migrated):
+    session_id = SessionService.create_session(session_name="rollup")
+    SessionService.add_message(session_id, "user", "first")
+    assert AnalyticsService.run_rollup()["messages"] == 1
+    assert AnalyticsService.run_rollup()["messages"] == 0
+    
+    # A transaction that takes a smaller rowid but commits after a later insert
+    pending = migrated.connect()
+    pending.execute("""
+        INSERT INTO messages (session_id, message_role, message_content, message_index)
+        VALUES (?, 'user', 'slow', 100)
+    """, (session_id,))
+    SessionService.add_message(session_id, "assistant", "fast")
+    
+    assert AnalyticsService.run_rollup()["messages"] == 0
+    
+    pending.commit()
+    pending.close()
+    
+    assert AnalyticsService.run_rollup()["messages"] == 2
+    conn = migrated.connect()
+    watermark = AnalyticsService._get_config(conn.cursor(), AnalyticsService.MESSAGES_WATERMARK_KEY)
+    max_rowid = conn.execute("SELECT MAX(rowid) FROM messages").fetchone()[0]
+    conn.close()
+    assert int(watermark) == max_rowid
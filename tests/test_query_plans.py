@@ -0,0 +1,96 @@
+"""
+Regression tests for the query plans of the hot session and message queries.
+
+The statements are captured from SessionService itself (not copied here), so a
+change to either the SQL or the indexes that turns an index search into a full
+table scan or an extra sort fails these tests.
+"""
+import sqlite3
+
+import pytest
+
+import setup_database
+from utils.session_service import SessionService
+from utils.storage import SQLiteBackend, get_storage_backend, set_storage_backend
+
+
+@pytest.fixture
+def traced_queries(tmp_path, monkeypatch):
+    """Migrate a temporary SQLite database and record every statement SessionService runs."""
+    previous = get_storage_backend()
+    backend = SQLiteBackend(tmp_path / "plans.db")
+    set_storage_backend(backend)
+    monkeypatch.setattr(setup_database, "_schema_checked", False)
+    setup_database.run_migrations(backend=backend, verbose=False)
+    
+    statements = []
+    
+    def traced_connection(max_staleness=None):
+        conn = backend.connect()
+        conn.set_trace_callback(statements.append)
+        return conn
+    
+    monkeypatch.setattr(SessionService, "get_db_connection", staticmethod(traced_connection))
+    monkeypatch.setattr(SessionService, "get_read_connection", staticmethod(traced_connection))
+    yield backend, statements
+    set_storage_backend(previous)
+
+
+def _plan(backend, sql):
+    """EXPLAIN QUERY PLAN details for a traced statement (parameters already expanded)."""
+    conn = sqlite3.connect(backend.db_path)
+    try:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+    finally:
+        conn.close()
+
+
+def _traced(statements, fragment):
+    matching = [sql for sql in statements if fragment in " ".join(sql.split())]
+    assert matching, f"no statement containing {fragment!r} was executed"
+    return matching[0]
+
+
+def _assert_index_plan(plan, expected, search=True):
+    details = " | ".join(plan)
+    assert any(expected in step for step in plan), details
+    assert not any("USE TEMP B-TREE" in step for step in plan), details
+    if search:
+        assert not any(step.startswith("SCAN") for step in plan), details
+    else:
+        # Without a range bound the first page walks the index in order and
+        # stops at LIMIT; only a scan of the table itself is a regression
+        assert not any(step.startswith("SCAN") and "USING" not in step for step in plan), details
+
+
+def test_get_messages_uses_visible_message_index(traced_queries):
+    backend, statements = traced_queries
+    SessionService.get_messages("session-1", limit=50)
+    
+    plan = _plan(backend, _traced(statements, "FROM messages WHERE session_id = 'session-1' AND is_hidden = 0"))
+    _assert_index_plan(plan, "USING INDEX idx_messages_session_visible (session_id=? AND is_hidden=?)")
+
+
+def test_next_message_index_is_covered(traced_queries):
+    backend, statements = traced_queries
+    session_id = SessionService.create_session(session_name="plans")
+    SessionService.add_message(session_id, "user", "merhaba")
+    
+    plan = _plan(backend, _traced(statements, "MAX(message_index)"))
+    _assert_index_plan(plan, "USING COVERING INDEX idx_messages_session_visible")
+
+
+def test_list_active_sessions_first_page_walks_partial_index(traced_queries):
+    backend, statements = traced_queries
+    SessionService.list_sessions(status="active")
+    
+    plan = _plan(backend, _traced(statements, "FROM sessions WHERE session_status = 'active'"))
+    _assert_index_plan(plan, "USING INDEX idx_sessions_active_activity", search=False)
+
+
+def test_list_active_sessions_keyset_page_searches_partial_index(traced_queries):
+    backend, statements = traced_queries
+    SessionService.list_sessions(status="active", cursor=("2024-01-01 00:00:00", "session-1"))
+    
+    plan = _plan(backend, _traced(statements, "FROM sessions WHERE session_status = 'active'"))
+    _assert_index_plan(plan, "USING INDEX idx_sessions_active_activity")
@@ -0,0 +1,37 @@
+"""
+Tests for the storage backend helpers that do not need a database server.
+"""
+import pytest
+
+from utils.storage import translate_placeholders
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT * FROM messages WHERE session_id = ? AND is_hidden = ?",
+     "SELECT * FROM messages WHERE session_id = %s AND is_hidden = %s"),
+    ("SELECT '?' AS mark, ? AS value", "SELECT '?' AS mark, %s AS value"),
+    ('SELECT "odd?column" FROM t WHERE x = ?', 'SELECT "odd?column" FROM t WHERE x = %s'),
+    ("SELECT 'it''s ?' WHERE x = ?", "SELECT 'it''s ?' WHERE x = %s"),
+])
+def test_placeholders_outside_quotes_are_translated(sql, expected):
+    assert translate_placeholders(sql) == expected
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT 5 % 2, ?", "SELECT 5 %% 2, %s"),
+    ("SELECT * FROM t WHERE name LIKE '50%' AND x = ?", "SELECT * FROM t WHERE name LIKE '50%%' AND x = %s"),
+    ("SELECT to_char(now(), 'HH24%')", "SELECT to_char(now(), 'HH24%%')"),
+])
+def test_percent_signs_are_escaped_everywhere(sql, expected):
+    assert translate_placeholders(sql) == expected
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT ? -- the user's id\nFROM t WHERE x = ?", "SELECT %s -- the user's id\nFROM t WHERE x = %s"),
+    ("SELECT ? /* don't translate ? here */, ?", "SELECT %s /* don't translate ? here */, %s"),
+    ("SELECT 1 -- 100% done?\n, ?", "SELECT 1 -- 100%% done?\n, %s"),
+    ("SELECT '--', ?", "SELECT '--', %s"),
+    ("SELECT ? -- trailing comment without newline", "SELECT %s -- trailing comment without newline"),
+])
+def test_comments_are_left_alone(sql, expected):
+    assert translate_placeholders(sql) == expected
@@ -0,0 +1,97 @@
+"""
+Tests for ToolExecutor worker provisioning, timeouts and cancellation.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.tool_executor import ToolExecutor, ToolTimeout, current_cancel_event
+
+CALL_SECONDS = 0.3
+
+
+def _run_concurrently(executor, count, fn, timeout):
+    """Start count executor.run calls at the same moment and return (results, elapsed)."""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+    
+    def call(index):
+        barrier.wait()
+        try:
+            results[index] = executor.run(fn, timeout)
+        except Exception as e:
+            results[index] = e
+    
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def test_concurrent_calls_do_not_queue_behind_one_idle_worker():
+    executor = ToolExecutor(max_workers=8)
+    executor.run(lambda: None, 1)
+    
+    results, elapsed = _run_concurrently(executor, 6, lambda: time.sleep(CALL_SECONDS) or "ok", 2)
+    
+    assert results == ["ok"] * 6
+    assert elapsed < CALL_SECONDS * 1.8
+    assert executor.get_stats()["workers"] == 6
+
+
+def test_concurrent_async_calls_run_in_parallel():
+    executor = ToolExecutor(max_workers=8)
+    executor.run(lambda: None, 1)
+    
+    async def main():
+        return await asyncio.gather(*(
+            executor.arun(lambda index=index: time.sleep(CALL_SECONDS) or index, 2) for index in range(6)
+        ))
+    
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    
+    assert results == list(range(6))
+    assert time.perf_counter() - start < CALL_SECONDS * 1.8
+    assert executor.get_stats()["workers"] == 6
+
+
+def test_idle_workers_are_reused():
+    executor = ToolExecutor(max_workers=8)
+    for _ in range(3):
+        _run_concurrently(executor, 4, lambda: time.sleep(0.05), 2)
+    
+    stats = executor.get_stats()
+    assert stats["workers"] == 4
+    assert stats["queued"] == 0
+
+
+def test_calls_beyond_max_workers_wait_for_a_free_worker():
+    executor = ToolExecutor(max_workers=2)
+    
+    results, elapsed = _run_concurrently(executor, 4, lambda: time.sleep(CALL_SECONDS) or "ok", 5)
+    
+    assert results == ["ok"] * 4
+    assert CALL_SECONDS * 2 <= elapsed < CALL_SECONDS * 3
+    assert executor.get_stats()["workers"] == 2
+
+
+def test_timed_out_call_is_cancelled_and_worker_replaced():
+    executor = ToolExecutor(max_workers=2, max_abandoned=2)
+    release = threading.Event()
+    
+    def stuck():
+        release.wait(5)
+        return current_cancel_event().is_set()
+    
+    with pytest.raises(ToolTimeout):
+        executor.run(stuck, 0.1)
+    
+    assert executor.run(lambda: "ok", 1) == "ok"
+    assert executor.get_stats()["abandoned"] == 1
+    release.set()
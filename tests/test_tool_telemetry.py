@@ -0,0 +1,125 @@
+"""
+Tests for buffered tool telemetry writes and latency percentiles.
+"""
+import sqlite3
+
+import pytest
+
+from utils.session_service import SessionService
+from utils.tool_telemetry import ToolTelemetry
+
+
+@pytest.fixture
+def telemetry(sqlite_backend, monkeypatch):
+    """Telemetry writing to the temporary database, with an empty buffer and tool id cache."""
+    ToolTelemetry.flush()
+    monkeypatch.setattr(ToolTelemetry, "_tool_ids", {})
+    monkeypatch.setattr(ToolTelemetry, "_ensure_started", staticmethod(lambda: None))
+    yield sqlite_backend
+    while not ToolTelemetry._queue.empty():
+        ToolTelemetry._queue.get_nowait()
+
+
+def _record(tool_name="calc", duration_ms=10.0, session_id=None):
+    ToolTelemetry.record(tool_name, "builtin", "test tool", {"x": 1}, {"ok": True},
+                         duration_ms, "success", session_id=session_id)
+
+
+def _executions(backend):
+    conn = sqlite3.connect(backend.db_path)
+    try:
+        return conn.execute("""
+            SELECT t.tool_name, e.session_id FROM tool_executions e JOIN tools t ON t.tool_id = e.tool_id
+            ORDER BY e.rowid
+        """).fetchall()
+    finally:
+        conn.close()
+
+
+def test_flush_writes_buffered_records_in_one_batch(telemetry):
+    for _ in range(3):
+        _record()
+    
+    assert ToolTelemetry.flush() == 3
+    assert _executions(telemetry) == [("calc", None)] * 3
+
+
+def test_bad_record_does_not_drop_the_rest_of_the_batch(telemetry):
+    _record("first")
+    _record(None)
+    _record("third")
+    
+    assert ToolTelemetry.flush() == 2
+    assert _executions(telemetry) == [("first", None), ("third", None)]
+    assert ToolTelemetry._queue.empty()
+
+
+def test_record_with_unknown_session_keeps_the_execution(telemetry):
+    conn = sqlite3.connect(telemetry.db_path)
+    conn.executescript("""
+        CREATE TRIGGER reject_unknown_session BEFORE INSERT ON tool_executions
+        WHEN NEW.session_id IS NOT NULL
+             AND NOT EXISTS (SELECT 1 FROM sessions WHERE session_id = NEW.session_id)
+        BEGIN SELECT RAISE(ABORT, 'FOREIGN KEY constraint failed'); END;
+    """)
+    conn.close()
+    session_id = SessionService.create_session(session_name="telemetry")
+    _record("known", session_id=session_id)
+    _record("unknown", session_id="client-supplied")
+    
+    assert ToolTelemetry.flush() == 2
+    assert _executions(telemetry) == [("known", session_id), ("unknown", None)]
+
+
+def test_records_are_requeued_when_the_database_is_unreachable(telemetry, monkeypatch):
+    _record()
+    _record()
+    
+    def unreachable():
+        raise sqlite3.OperationalError("unable to open database file")
+    
+    monkeypatch.setattr(SessionService, "get_db_connection", staticmethod(unreachable))
+    assert ToolTelemetry.flush() == 0
+    assert ToolTelemetry._queue.qsize() == 2
+    
+    monkeypatch.undo()
+    monkeypatch.setattr(ToolTelemetry, "_ensure_started", staticmethod(lambda: None))
+    assert ToolTelemetry.flush() == 2
+
+
+def test_latency_percentiles_use_the_most_recent_window(telemetry):
+    for duration_ms in range(1, 101):
+        _record(duration_ms=duration_ms)
+    ToolTelemetry.flush()
+    
+    conn = sqlite3.connect(telemetry.db_path)
+    # The oldest 50 executions are an hour older than the newest 50
+    conn.execute("""
+        UPDATE tool_executions SET created_at = datetime(created_at, '-1 hour')
+        WHERE execution_time_ms <= 50
+    """)
+    conn.commit()
+    conn.close()
+    
+    assert ToolTelemetry.get_latency_percentiles("calc", (50, 95, 100)) == {
+        "count": 100, "p50": 50, "p95": 95, "p100": 100
+    }
+    assert ToolTelemetry.get_latency_percentiles("calc", (50, 95), window=50) == {
+        "count": 50, "p50": 75, "p95": 98
+    }
+    assert ToolTelemetry.get_latency_percentiles("missing") == {"count": 0}
+
+
+def test_latency_window_reads_a_bounded_index_range(telemetry):
+    conn = sqlite3.connect(telemetry.db_path)
+    plan = [row[3] for row in conn.execute("""
+        EXPLAIN QUERY PLAN
+        SELECT execution_time_ms FROM tool_executions
+        WHERE tool_id = 'calc' AND execution_time_ms IS NOT NULL
+        ORDER BY created_at DESC
+        LIMIT 1000
+    """)]
+    conn.close()
+    
+    assert any("USING COVERING INDEX idx_tool_executions_tool_recent" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
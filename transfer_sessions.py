@@ -0,0 +1,52 @@
+"""
+Command line entry point for exporting and importing sessions as JSONL.
+
+Örnekler:
+    python transfer_sessions.py export sessions.jsonl.gz
+    python transfer_sessions.py export - --status completed > completed.jsonl
+    python transfer_sessions.py import sessions.jsonl.gz --batch-size 5000
+"""
+import argparse
+
+from setup_database import ensure_database
+from utils.config import SESSION_TRANSFER_BATCH_SIZE
+from utils.session_service import SessionService
+from utils.session_transfer import SessionTransfer
+
+def export_sessions(args: argparse.Namespace) -> None:
+    """
+    Oturumları belirtilen dosyaya dışa aktar.
+    """
+    SessionTransfer.export_sessions(args.path, session_ids=args.session_id, status=args.status)
+
+def import_sessions(args: argparse.Namespace) -> None:
+    """
+    Belirtilen dosyadaki oturumları içe aktar.
+    """
+    SessionTransfer.import_sessions(args.path, batch_size=args.batch_size)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Oturumları JSONL olarak dışa/içe aktar.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    export_parser = subparsers.add_parser("export", help="Oturumları dışa aktar")
+    export_parser.add_argument("path", help="Hedef dosya ('-' standart çıkış, .gz ile biterse gzip)")
+    export_parser.add_argument("--session-id", action="append", help="Sadece bu oturum (birden çok kez verilebilir)")
+    export_parser.add_argument("--status", choices=SessionService.SESSION_STATUSES,
+                               help="Sadece bu durumdaki oturumlar")
+    export_parser.set_defaults(handler=export_sessions)
+    
+    import_parser = subparsers.add_parser("import", help="Oturumları içe aktar")
+    import_parser.add_argument("path", help="Kaynak dosya ('-' standart giriş, .gz ile biterse gzip)")
+    import_parser.add_argument("--batch-size", type=int, default=SESSION_TRANSFER_BATCH_SIZE,
+                               help="Tek işlemde yazılacak satır sayısı")
+    import_parser.set_defaults(handler=import_sessions)
+    
+    args = parser.parse_args()
+    
+    # Hedef veritabanının şeması güncel olmalı
+    ensure_database()
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
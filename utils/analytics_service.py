@@ -0,0 +1,402 @@
+"""
+Analytics utilities for maintaining incremental usage rollups.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List
+
+from utils.config import (
+    ANALYTICS_ROLLUP_BATCH_SIZE,
+    ANALYTICS_LATE_ARRIVAL_SECONDS,
+    ANALYTICS_DASHBOARD_DAYS
+)
+from utils.session_service import SessionService
+from utils.storage import get_storage_backend
+
+class AnalyticsService:
+    """Service class for rolling up usage data into usage_analytics."""
+    
+    # Özetlemenin tuttuğu dönemler (kova biçimleri StorageBackend.bucket_expression içinde)
+    PERIOD_TYPES = ("hourly", "daily")
+    
+    # system_config içinde tutulan watermark anahtarları
+    MESSAGES_WATERMARK_KEY = "analytics_messages_rowid"
+    TOOL_EXECUTIONS_WATERMARK_KEY = "analytics_tool_executions_rowid"
+    LAST_ROLLUP_KEY = "analytics_last_rollup_at"
+    
+    # popular_tools alanında tutulacak araç sayısı
+    POPULAR_TOOLS_LIMIT = 5
+    
+    @staticmethod
+    def _get_config(cursor, key: str) -> Optional[str]:
+        """
+        system_config içindeki bir değeri oku (yoksa None).
+        """
+        cursor.execute("SELECT config_value FROM system_config WHERE config_key = ?", (key,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    @staticmethod
+    def _set_config(cursor, key: str, value: Any, config_type: str) -> None:
+        """
+        system_config içindeki bir değeri ekle veya güncelle.
+        """
+        cursor.execute("""
+            INSERT INTO system_config (config_key, config_value, config_type, config_description)
+            VALUES (?, ?, ?, 'Analitik özetleme durumu')
+            ON CONFLICT(config_key) DO UPDATE SET
+                config_value = excluded.config_value,
+                updated_at = CURRENT_TIMESTAMP
+        """, (key, str(value), config_type))
+    
+    @staticmethod
+    def _get_watermark(cursor, key: str, table: str) -> int:
+        """
+        Kaynak tablo için son özetlenen rowid'yi döndür.
+        
+        Tablonun en yeni satırları silinmişse SQLite rowid'leri yeniden
+        kullanabilir; bu durumda watermark mevcut en büyük rowid'ye çekilir.
+        """
+        watermark = int(AnalyticsService._get_config(cursor, key) or 0)
+        cursor.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}")
+        return min(watermark, cursor.fetchone()[0])
+    
+    @staticmethod
+    def _next_batch_end(cursor, table: str, watermark: int, batch_size: int) -> Optional[int]:
+        """
+        Watermark'tan sonraki en fazla batch_size satırlık rowid aralığının sonunu bul.
+        
+        Aralık, kesinleşmemiş ilk satırın (bkz. StorageBackend.settled_row_condition)
+        önünde biter; o satır ve ondan küçük rowid'le sonradan commit edilecek
+        satırlar bir sonraki özetlemede sayılır.
+        """
+        condition = get_storage_backend().settled_row_condition()
+        if condition is None:
+            cursor.execute(f"""
+                SELECT MAX(rowid) FROM (
+                    SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?
+                ) AS batch
+            """, (watermark, batch_size))
+            return cursor.fetchone()[0]
+        
+        cursor.execute(f"SELECT MIN(rowid) FROM {table} WHERE rowid > ? AND NOT ({condition})", (watermark,))
+        unsettled = cursor.fetchone()[0]
+        cursor.execute(f"""
+            SELECT MAX(rowid) FROM (
+                SELECT rowid FROM {table} WHERE rowid > ? AND (? IS NULL OR rowid < ?) ORDER BY rowid LIMIT ?
+            ) AS batch
+        """, (watermark, unsettled, unsettled, batch_size))
+        return cursor.fetchone()[0]
+    
+    @staticmethod
+    def _merge_bucket(cursor, period_type: str, date_period: str, delta: Dict[str, Any]) -> None:
+        """
+        Bir dönem kovasına artımlı değerleri ekle ve türetilmiş alanları yeniden hesapla.
+        
+        Toplanabilir sayaçlar performance_summary içinde tutulur; ortalamalar
+        ve popüler araçlar bu sayaçlardan türetilir. Oturum ve kullanıcı
+        sayıları analytics_session_activity tablosundan okunur.
+        
+        Args:
+            cursor: Kullanılacak veritabanı imleci (işlemi çağıran commit eder)
+            period_type: 'hourly' veya 'daily'
+            date_period: Kova başlangıcı
+            delta: Eklenecek sayaçlar (tool_counts araç adına göre sözlük)
+        """
+        cursor.execute("""
+            SELECT total_messages, total_tool_calls, performance_summary
+            FROM usage_analytics
+            WHERE date_period = ? AND period_type = ?
+        """, (date_period, period_type))
+        row = cursor.fetchone()
+        
+        total_messages = (row[0] if row else 0) + delta.get("messages", 0)
+        total_tool_calls = (row[1] if row else 0) + delta.get("tool_calls", 0)
+        summary = json.loads(row[2]) if row and row[2] else {}
+        
+        for counter in ("token_sum", "token_rows", "processing_ms_sum", "processing_rows",
+                        "tool_success", "tool_errors", "tool_time_ms_sum", "tool_time_rows"):
+            summary[counter] = summary.get(counter, 0) + delta.get(counter, 0)
+        
+        tool_counts = summary.get("tool_counts", {})
+        for tool_name, count in delta.get("tool_counts", {}).items():
+            tool_counts[tool_name] = tool_counts.get(tool_name, 0) + count
+        summary["tool_counts"] = tool_counts
+        
+        cursor.execute("""
+            SELECT COUNT(*), COUNT(DISTINCT user_id), COALESCE(SUM(used_tools), 0)
+            FROM analytics_session_activity
+            WHERE period_type = ? AND date_period = ?
+        """, (period_type, date_period))
+        total_sessions, active_users, sessions_with_tools = cursor.fetchone()
+        
+        summary["sessions_with_tools"] = sessions_with_tools
+        summary["avg_tokens_per_message"] = (
+            summary["token_sum"] / summary["token_rows"] if summary["token_rows"] else None
+        )
+        summary["avg_processing_time_ms"] = (
+            summary["processing_ms_sum"] / summary["processing_rows"] if summary["processing_rows"] else None
+        )
+        summary["avg_tool_time_ms"] = (
+            summary["tool_time_ms_sum"] / summary["tool_time_rows"] if summary["tool_time_rows"] else None
+        )
+        
+        popular_tools = [
+            {"tool_name": tool_name, "count": count}
+            for tool_name, count in sorted(tool_counts.items(), key=lambda item: item[1], reverse=True)
+        ][:AnalyticsService.POPULAR_TOOLS_LIMIT]
+        
+        cursor.execute("""
+            INSERT INTO usage_analytics (
+                date_period, period_type, total_sessions, total_messages, total_tool_calls,
+                active_users, popular_tools, performance_summary
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(date_period, period_type) DO UPDATE SET
+                total_sessions = excluded.total_sessions,
+                total_messages = excluded.total_messages,
+                total_tool_calls = excluded.total_tool_calls,
+                active_users = excluded.active_users,
+                popular_tools = excluded.popular_tools,
+                performance_summary = excluded.performance_summary
+        """, (
+            date_period, period_type, total_sessions, total_messages, total_tool_calls,
+            active_users, json.dumps(popular_tools), json.dumps(summary)
+        ))
+    
+    @staticmethod
+    def _rollup_messages(cursor, watermark: int, batch_end: int, floor: Optional[str]) -> None:
+        """
+        (watermark, batch_end] rowid aralığındaki mesajları dönem kovalarına ekle.
+        
+        Args:
+            cursor: Kullanılacak veritabanı imleci
+            watermark: Son özetlenen rowid
+            batch_end: Bu partide özetlenecek son rowid
+            floor: Bu tarihten eski satırlar zaten sayılmış kabul edilir (None = hepsi sayılır)
+        """
+        backend = get_storage_backend()
+        for period_type in AnalyticsService.PERIOD_TYPES:
+            bucket = backend.bucket_expression(period_type, "m.created_at")
+            cursor.execute(f"""
+                SELECT {bucket} AS bucket,
+                       m.session_id,
+                       s.user_id,
+                       COUNT(*) AS messages,
+                       COALESCE(SUM(m.token_count), 0) AS token_sum,
+                       COUNT(m.token_count) AS token_rows,
+                       COALESCE(SUM(m.processing_time_ms), 0) AS processing_ms_sum,
+                       COUNT(m.processing_time_ms) AS processing_rows,
+                       MAX(CASE WHEN EXISTS (
+                           SELECT 1 FROM message_tool_calls c WHERE c.message_id = m.message_id
+                       ) THEN 1 ELSE 0 END) AS used_tools
+                FROM messages m
+                LEFT JOIN sessions s ON s.session_id = m.session_id
+                WHERE m.rowid > ? AND m.rowid <= ?
+                  AND (? IS NULL OR m.created_at >= ?)
+                GROUP BY bucket, m.session_id, s.user_id
+            """, (watermark, batch_end, floor, floor))
+            
+            deltas: Dict[str, Dict[str, Any]] = {}
+            for row in cursor.fetchall():
+                cursor.execute("""
+                    INSERT INTO analytics_session_activity (period_type, date_period, session_id, user_id, used_tools)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(period_type, date_period, session_id) DO UPDATE SET
+                        used_tools = CASE WHEN excluded.used_tools = 1 THEN 1
+                                          ELSE analytics_session_activity.used_tools END
+                """, (period_type, row["bucket"], row["session_id"], row["user_id"], row["used_tools"]))
+                
+                delta = deltas.setdefault(row["bucket"], {})
+                for counter in ("messages", "token_sum", "token_rows", "processing_ms_sum", "processing_rows"):
+                    delta[counter] = delta.get(counter, 0) + row[counter]
+            
+            for bucket, delta in deltas.items():
+                AnalyticsService._merge_bucket(cursor, period_type, bucket, delta)
+    
+    @staticmethod
+    def _rollup_tool_executions(cursor, watermark: int, batch_end: int) -> None:
+        """
+        (watermark, batch_end] rowid aralığındaki araç çalıştırmalarını dönem kovalarına ekle.
+        
+        Args:
+            cursor: Kullanılacak veritabanı imleci
+            watermark: Son özetlenen rowid
+            batch_end: Bu partide özetlenecek son rowid
+        """
+        backend = get_storage_backend()
+        for period_type in AnalyticsService.PERIOD_TYPES:
+            bucket = backend.bucket_expression(period_type, "te.created_at")
+            cursor.execute(f"""
+                SELECT {bucket} AS bucket,
+                       COALESCE(t.tool_name, te.tool_id) AS tool_name,
+                       COUNT(*) AS tool_calls,
+                       SUM(CASE WHEN te.execution_status = 'success' THEN 1 ELSE 0 END) AS tool_success,
+                       SUM(CASE WHEN te.execution_status IN ('error', 'timeout') THEN 1 ELSE 0 END) AS tool_errors,
+                       COALESCE(SUM(te.execution_time_ms), 0) AS tool_time_ms_sum,
+                       COUNT(te.execution_time_ms) AS tool_time_rows
+                FROM tool_executions te
+                LEFT JOIN tools t ON t.tool_id = te.tool_id
+                WHERE te.rowid > ? AND te.rowid <= ?
+                GROUP BY bucket, COALESCE(t.tool_name, te.tool_id)
+            """, (watermark, batch_end))
+            
+            deltas: Dict[str, Dict[str, Any]] = {}
+            for row in cursor.fetchall():
+                delta = deltas.setdefault(row["bucket"], {"tool_counts": {}})
+                for counter in ("tool_calls", "tool_success", "tool_errors", "tool_time_ms_sum", "tool_time_rows"):
+                    delta[counter] = delta.get(counter, 0) + row[counter]
+                delta["tool_counts"][row["tool_name"]] = row["tool_calls"]
+            
+            for bucket, delta in deltas.items():
+                AnalyticsService._merge_bucket(cursor, period_type, bucket, delta)
+    
+    @staticmethod
+    def run_rollup(batch_size: int = ANALYTICS_ROLLUP_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Son özetlemeden bu yana eklenen mesaj ve araç çalıştırmalarını usage_analytics'e işle.
+        
+        Kaynak tablolar rowid watermark'larından itibaren birincil anahtar
+        aralıklarıyla okunur; her parti watermark güncellemesiyle birlikte
+        kendi kısa işleminde yazılır, böylece sohbet yazmaları uzun süre
+        kilit beklemez ve yarıda kalan bir özetleme kaldığı yerden devam eder.
+        
+        Args:
+            batch_size: Tek işlemde özetlenecek en fazla kaynak satır
+        
+        Returns:
+            Dict: İşlenen (watermark ilerletilen) mesaj ve araç çalıştırması sayıları
+        """
+        result = {"messages": 0, "tool_executions": 0}
+        started_at = datetime.now(timezone.utc)
+        
+        try:
+            conn = SessionService.get_db_connection()
+            cursor = conn.cursor()
+            
+            # Arşivden geri yüklenen mesajlar yeni rowid alır ama eski tarihlerini korur;
+            # bir önceki özetlemeden belirgin biçimde eski olan satırlar zaten sayılmıştır
+            last_rollup = AnalyticsService._get_config(cursor, AnalyticsService.LAST_ROLLUP_KEY)
+            floor = None
+            if last_rollup:
+                floor = (
+                    datetime.strptime(last_rollup, "%Y-%m-%d %H:%M:%S")
+                    - timedelta(seconds=ANALYTICS_LATE_ARRIVAL_SECONDS)
+                ).strftime("%Y-%m-%d %H:%M:%S")
+            
+            sources = (
+                ("messages", AnalyticsService.MESSAGES_WATERMARK_KEY),
+                ("tool_executions", AnalyticsService.TOOL_EXECUTIONS_WATERMARK_KEY),
+            )
+            for table, watermark_key in sources:
+                watermark = AnalyticsService._get_watermark(cursor, watermark_key, table)
+                
+                while True:
+                    batch_end = AnalyticsService._next_batch_end(cursor, table, watermark, batch_size)
+                    if batch_end is None:
+                        break
+                    
+                    if table == "messages":
+                        AnalyticsService._rollup_messages(cursor, watermark, batch_end, floor)
+                    else:
+                        AnalyticsService._rollup_tool_executions(cursor, watermark, batch_end)
+                    
+                    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE rowid > ? AND rowid <= ?", (watermark, batch_end))
+                    result[table] += cursor.fetchone()[0]
+                    
+                    AnalyticsService._set_config(cursor, watermark_key, batch_end, "integer")
+                    conn.commit()
+                    watermark = batch_end
+            
+            # Kapanmış kovaların oturum kümelerine artık gerek yok
+            prune_before = started_at - timedelta(seconds=ANALYTICS_LATE_ARRIVAL_SECONDS) - timedelta(days=1)
+            cursor.execute("""
+                DELETE FROM analytics_session_activity
+                WHERE (period_type = 'hourly' AND date_period < ?)
+                   OR (period_type = 'daily' AND date_period < ?)
+            """, (prune_before.strftime("%Y-%m-%d %H:00:00"), prune_before.strftime("%Y-%m-%d")))
+            
+            AnalyticsService._set_config(
+                cursor, AnalyticsService.LAST_ROLLUP_KEY, started_at.strftime("%Y-%m-%d %H:%M:%S"), "string"
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Analitik özetleme sırasında hata: {str(e)}")
+        
+        return result
+    
+    @staticmethod
+    def get_daily_stats(days: int = ANALYTICS_DASHBOARD_DAYS) -> List[Dict[str, Any]]:
+        """
+        Son günlerin özet istatistiklerini getir (yeniden eskiye).
+        
+        Args:
+            days: Geriye doğru kaç gün gösterilsin
+        
+        Returns:
+            List: Günlük özet satırları
+        """
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d")
+        return AnalyticsService._get_period_stats("daily", since)
+    
+    @staticmethod
+    def get_hourly_stats(hours: int = 24) -> List[Dict[str, Any]]:
+        """
+        Son saatlerin özet istatistiklerini getir (yeniden eskiye).
+        
+        Args:
+            hours: Geriye doğru kaç saat gösterilsin
+        
+        Returns:
+            List: Saatlik özet satırları
+        """
+        since = (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime("%Y-%m-%d %H:00:00")
+        return AnalyticsService._get_period_stats("hourly", since)
+    
+    @staticmethod
+    def _get_period_stats(period_type: str, since: str) -> List[Dict[str, Any]]:
+        """
+        Belirtilen dönem tipindeki kovaları since tarihinden itibaren getir.
+        """
+        try:
+            conn = SessionService.get_read_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT date_period, total_sessions, total_messages, total_tool_calls,
+                       active_users, popular_tools, performance_summary
+                FROM usage_analytics
+                WHERE period_type = ? AND date_period >= ?
+                ORDER BY date_period DESC
+            """, (period_type, since))
+            
+            stats = []
+            for row in cursor.fetchall():
+                stat = dict(row)
+                stat["popular_tools"] = json.loads(stat["popular_tools"] or "[]")
+                stat["performance_summary"] = json.loads(stat["performance_summary"] or "{}")
+                stats.append(stat)
+            
+            conn.close()
+            return stats
+        except Exception as e:
+            print(f"Analitik istatistikler alınırken hata: {str(e)}")
+            return []
+    
+    @staticmethod
+    def get_tool_performance() -> List[Dict[str, Any]]:
+        """
+        Araçların toplu performans değerlerini getir (en çok kullanılandan başlayarak).
+        
+        Returns:
+            List: v_tool_performance satırları
+        """
+        try:
+            conn = SessionService.get_read_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM v_tool_performance ORDER BY total_executions DESC")
+            performance = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            return performance
+        except Exception as e:
+            print(f"Araç performansı alınırken hata: {str(e)}")
+            return []
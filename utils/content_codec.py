@@ -0,0 +1,95 @@
+"""
+Transparent compression utilities for large text columns.
+"""
+import struct
+import zlib
+from typing import Optional, Union
+
+from utils.config import (
+    CONTENT_COMPRESSION_ENABLED,
+    CONTENT_COMPRESSION_THRESHOLD,
+    CONTENT_COMPRESSION_CODEC
+)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class ContentCodec:
+    """Service class for compressing text values stored in TEXT columns."""
+    
+    # Sıkıştırılmış değerler BLOB olarak saklanır:
+    # işaret baytı + orijinal UTF-8 boyutu (<I) + sıkıştırılmış veri.
+    # Düz metinler TEXT olarak kalır, böylece eski satırlar olduğu gibi okunur.
+    MARKERS = {"zlib": b"\x01", "zstd": b"\x02"}
+    HEADER = struct.Struct("<I")
+    
+    @staticmethod
+    def compress(text: Optional[str],
+                 codec: str = CONTENT_COMPRESSION_CODEC,
+                 threshold: int = CONTENT_COMPRESSION_THRESHOLD) -> Union[str, bytes, None]:
+        """
+        Eşiği aşan metni sıkıştırılmış BLOB'a çevir.
+        
+        Args:
+            text: Saklanacak metin
+            codec: 'zlib' veya 'zstd'
+            threshold: Sıkıştırma için en küçük UTF-8 boyutu (bayt)
+        
+        Returns:
+            str, bytes veya None: Eşiğin altındaysa veya sıkıştırma kazanç
+                sağlamıyorsa metnin kendisi, aksi halde sıkıştırılmış BLOB
+        """
+        if not CONTENT_COMPRESSION_ENABLED or not isinstance(text, str):
+            return text
+        
+        raw = text.encode("utf-8")
+        if len(raw) < threshold:
+            return text
+        
+        if codec == "zstd" and zstandard is not None:
+            payload = zstandard.ZstdCompressor(level=6).compress(raw)
+        else:
+            codec = "zlib"
+            payload = zlib.compress(raw, 6)
+        
+        blob = ContentCodec.MARKERS[codec] + ContentCodec.HEADER.pack(len(raw)) + payload
+        return blob if len(blob) < len(raw) else text
+    
+    @staticmethod
+    def decompress(value: Union[str, bytes, None]) -> Optional[str]:
+        """
+        Saklanan değeri metne çevir (düz metinler olduğu gibi döner).
+        
+        Args:
+            value: Veritabanından okunan değer
+        
+        Returns:
+            str veya None: Metin
+        """
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            return value
+        
+        value = bytes(value)
+        marker, payload = value[:1], value[1 + ContentCodec.HEADER.size:]
+        if marker == ContentCodec.MARKERS["zstd"]:
+            if zstandard is None:
+                raise RuntimeError("zstd ile sıkıştırılmış içeriği okumak için zstandard paketi gerekli")
+            size = ContentCodec.original_size(value)
+            return zstandard.ZstdDecompressor().decompress(payload, max_output_size=size).decode("utf-8")
+        if marker == ContentCodec.MARKERS["zlib"]:
+            return zlib.decompress(payload, bufsize=ContentCodec.original_size(value)).decode("utf-8")
+        raise ValueError(f"Bilinmeyen içerik sıkıştırma işareti: {marker!r}")
+    
+    @staticmethod
+    def is_compressed(value) -> bool:
+        """Değerin sıkıştırılmış bir BLOB olup olmadığını döndür."""
+        return isinstance(value, (bytes, bytearray, memoryview))
+    
+    @staticmethod
+    def original_size(value: bytes) -> int:
+        """
+        Sıkıştırılmış değerin açıldığında kaç bayt olacağını başlıktan oku.
+        """
+        return ContentCodec.HEADER.unpack_from(value, 1)[0]
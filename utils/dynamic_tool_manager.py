@@ -21,6 +21,7 @@ from utils.config import (
     DEFAULT_TOP_P,
     BASE_DIR
 )
+from utils.tool_schema import schema_from_parameters
 from mcp_server import MCPTool, MCPServer, get_default_server
 
 # Directory to store dynamically created tools
@@ -155,6 +156,9 @@ class DynamicToolManager:
         if not class_name.endswith('Tool'):
             class_name += 'Tool'
         
+        # The server validates and coerces arguments against this schema before execute()
+        input_schema = schema_from_parameters(tool_parameters)
+        
         # Create a prompt to generate the tool code
         prompt = f"""
         You are an expert Python developer. Create a Python class that implements a new tool for an MCP server.
@@ -173,6 +177,8 @@ class DynamicToolManager:
         from typing import Dict, Any, Optional, List # Ensure typing is available
         
         class {class_name}(MCPTool):
+            input_schema = {input_schema!r}
+            
             def __init__(self):
                 super().__init__(
                     name="{tool_name}", # Use the provided tool_name
@@ -182,8 +188,9 @@ class DynamicToolManager:
                 self.parameters = {json.dumps(tool_parameters, indent=2)}
             
             def execute(self, args: Dict[str, Any]) -> Dict[str, Any]:
-                # Parameter validation based on tool_parameters
+                # Arguments are already validated and coerced against input_schema
                 # Tool implementation using details from implementation_details
+                # Make HTTP calls with self.http.get(...) / self.http.post(...) (same API as requests)
                 # The implementation MUST be fully functional and return REAL data, not placeholders.
                 # Return results as a dictionary.
                 pass # Replace with actual implementation
@@ -199,8 +206,11 @@ class DynamicToolManager:
         7. For weather data, if no specific API is given, use `https://api.open-meteo.com/v1/forecast`.
         8. For IP-based geolocation, if no specific API is given, you can use `http://ip-api.com/json/` (for the server's IP) or guide the user if client IP is needed.
         9. Include proper error handling for API calls (e.g., network errors, invalid responses) and parameter validation.
+           Make every HTTP call through `self.http.get(...)` or `self.http.post(...)` (the shared pooled client inherited from MCPTool; it accepts the same arguments as `requests.get`/`requests.post` and applies timeouts and retries). Never call `requests.get`/`requests.post` directly. Catch `requests.RequestException` for network errors.
+           The server stops waiting for `execute` after a time limit (override it with a class attribute such as `timeout = 30` only if the tool legitimately needs longer). In loops or multi-step work, check `self.cancelled` between steps and return early when it is True.
         10. Ensure the `execute` method returns a dictionary.
-        11. CRITICAL: DO NOT pass 'parameters' as an argument to super().__init__(). The MCPTool.__init__() method only accepts 'name' and 'description' parameters. If you need to store parameters, do it as a separate class attribute after the super().__init__() call.
+        11. Keep the `input_schema` class attribute exactly as given; the server checks required arguments and types before calling `execute`.
+        12. CRITICAL: DO NOT pass 'parameters' as an argument to super().__init__(). The MCPTool.__init__() method only accepts 'name' and 'description' parameters. If you need to store parameters, do it as a separate class attribute after the super().__init__() call.
         
         Only provide the Python code, nothing else. Do not include markdown formatting or explanations.
         """
@@ -252,7 +262,7 @@ class {class_name}(MCPTool):
                     return {{"error": "to_currency parameter is required"}}
                 
                 # Use Exchange Rates API
-                response = requests.get(f"https://open.er-api.com/v6/latest/{{from_currency}}")
+                response = self.http.get(f"https://open.er-api.com/v6/latest/{{from_currency}}")
                 if response.status_code != 200:
                     return {{"error": f"API request failed with status code {{response.status_code}}"}}
                 
@@ -284,7 +294,7 @@ class {class_name}(MCPTool):
                     return {{"error": "location parameter is required"}}
                 
                 # Use Open-Meteo API
-                response = requests.get(
+                response = self.http.get(
                     "https://api.open-meteo.com/v1/forecast",
                     params={{
                         "latitude": 41.0082,  # Default to Istanbul if geocoding not implemented
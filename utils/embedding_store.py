@@ -0,0 +1,282 @@
+"""
+Embedding storage utilities backed by float32 BLOBs in embeddings_cache.
+"""
+import hashlib
+import threading
+from typing import Dict, Optional, List, Tuple, Sequence
+
+import numpy as np
+
+from utils.session_service import SessionService
+
+# Vektörlerin diskteki biçimi: little-endian float32
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+class EmbeddingStore:
+    """Service class for reading and writing cached embeddings."""
+    
+    @staticmethod
+    def content_hash(content_text: str) -> str:
+        """
+        İçerik için önbellek anahtarını hesapla.
+        
+        Args:
+            content_text: Gömülen metin
+        
+        Returns:
+            str: SHA-256 özeti (hex)
+        """
+        return hashlib.sha256(content_text.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def to_blob(vector: Sequence[float]) -> bytes:
+        """
+        Vektörü little-endian float32 baytlarına çevir.
+        """
+        return np.ascontiguousarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+    
+    @staticmethod
+    def from_blob(blob: bytes) -> np.ndarray:
+        """
+        BLOB'u kopyalamadan salt okunur float32 vektöre çevir.
+        """
+        return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+    
+    @staticmethod
+    def put(content_text: str, vector: Sequence[float], embedding_model: str) -> bool:
+        """
+        Bir metnin gömme vektörünü önbelleğe yaz (varsa günceller).
+        
+        Args:
+            content_text: Gömülen metin
+            vector: Gömme vektörü
+            embedding_model: Vektörü üreten model
+        
+        Returns:
+            bool: İşlem başarılıysa True
+        """
+        return EmbeddingStore.put_many([(content_text, vector)], embedding_model) == 1
+    
+    @staticmethod
+    def put_many(items: List[Tuple[str, Sequence[float]]], embedding_model: str) -> int:
+        """
+        Birden çok gömme vektörünü tek işlemde önbelleğe yaz.
+        
+        Args:
+            items: (metin, vektör) çiftleri
+            embedding_model: Vektörleri üreten model
+        
+        Returns:
+            int: Yazılan kayıt sayısı
+        """
+        rows = []
+        for content_text, vector in items:
+            blob = EmbeddingStore.to_blob(vector)
+            rows.append((
+                EmbeddingStore.content_hash(content_text), content_text, blob,
+                embedding_model, len(blob) // EMBEDDING_DTYPE.itemsize
+            ))
+        
+        try:
+            conn = SessionService.get_db_connection()
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO embeddings_cache (
+                    content_hash, content_text, embedding_vector, embedding_model, embedding_dimensions
+                ) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(content_hash, embedding_model) DO UPDATE SET
+                    embedding_vector = excluded.embedding_vector,
+                    embedding_dimensions = excluded.embedding_dimensions
+            """, rows)
+            conn.commit()
+            conn.close()
+            return len(rows)
+        except Exception as e:
+            print(f"Gömme vektörleri kaydedilirken hata: {str(e)}")
+            return 0
+    
+    @staticmethod
+    def get(content_text: str, embedding_model: str) -> Optional[np.ndarray]:
+        """
+        Bir metnin önbellekteki gömme vektörünü getir.
+        
+        Args:
+            content_text: Gömülen metin
+            embedding_model: Vektörü üreten model
+        
+        Returns:
+            Optional[np.ndarray]: Salt okunur float32 vektör veya None
+        """
+        return EmbeddingStore.get_many([content_text], embedding_model)[0]
+    
+    @staticmethod
+    def get_many(content_texts: List[str], embedding_model: str) -> List[Optional[np.ndarray]]:
+        """
+        Birden çok metnin gömme vektörlerini tek sorguda getir.
+        
+        Args:
+            content_texts: Gömülen metinler
+            embedding_model: Vektörleri üreten model
+        
+        Returns:
+            List: content_texts ile aynı sırada vektörler (önbellekte yoksa None)
+        """
+        hashes = [EmbeddingStore.content_hash(text) for text in content_texts]
+        if not hashes:
+            return []
+        
+        try:
+            conn = SessionService.get_read_connection()
+            cursor = conn.cursor()
+            placeholders = ", ".join("?" for _ in hashes)
+            cursor.execute(f"""
+                SELECT content_hash, embedding_vector FROM embeddings_cache
+                WHERE embedding_model = ? AND content_hash IN ({placeholders})
+            """, [embedding_model] + hashes)
+            found = {row[0]: EmbeddingStore.from_blob(row[1]) for row in cursor.fetchall()}
+            conn.close()
+        except Exception as e:
+            print(f"Gömme vektörleri alınırken hata: {str(e)}")
+            found = {}
+        
+        return [found.get(content_hash) for content_hash in hashes]
+
+class EmbeddingIndex:
+    """In-memory contiguous float32 matrix of one model's embeddings for batch similarity."""
+    
+    def __init__(self, embedding_model: str):
+        self.embedding_model = embedding_model
+        self.dimensions: Optional[int] = None
+        self.content_hashes: List[str] = []
+        self._positions: Dict[str, int] = {}
+        # Satırları birim uzunluğa normalize edilmiş vektörler; kapasite ikiye katlanarak büyür
+        self._matrix = np.empty((0, 0), dtype=EMBEDDING_DTYPE)
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.content_hashes)
+    
+    @property
+    def matrix(self) -> np.ndarray:
+        """Doldurulmuş satırların görünümü (kopya değil)."""
+        return self._matrix[:len(self.content_hashes)]
+    
+    def _reserve(self, rows: int) -> None:
+        """Matris kapasitesini en az rows satıra çıkar."""
+        if rows <= self._matrix.shape[0]:
+            return
+        
+        capacity = max(rows, self._matrix.shape[0] * 2, 64)
+        matrix = np.empty((capacity, self.dimensions), dtype=EMBEDDING_DTYPE)
+        matrix[:len(self.content_hashes)] = self.matrix
+        self._matrix = matrix
+    
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """Vektörleri birim uzunluğa ölçekle (sıfır vektörler olduğu gibi kalır)."""
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+    
+    def load(self, batch_size: int = 10000) -> int:
+        """
+        Modelin tüm vektörlerini veritabanından tek bir bitişik matrise yükle.
+        
+        Args:
+            batch_size: Veritabanından tek seferde okunacak satır sayısı
+        
+        Returns:
+            int: Yüklenen vektör sayısı
+        """
+        try:
+            conn = SessionService.get_read_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*), MAX(embedding_dimensions) FROM embeddings_cache
+                WHERE embedding_model = ?
+            """, (self.embedding_model,))
+            count, dimensions = cursor.fetchone()
+            
+            with self._lock:
+                self.content_hashes = []
+                self._positions = {}
+                self.dimensions = dimensions
+                self._matrix = np.empty((count or 0, dimensions or 0), dtype=EMBEDDING_DTYPE)
+                
+                cursor.execute("""
+                    SELECT content_hash, embedding_vector FROM embeddings_cache
+                    WHERE embedding_model = ? AND embedding_dimensions = ?
+                """, (self.embedding_model, dimensions))
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    
+                    start = len(self.content_hashes)
+                    block = self._matrix[start:start + len(rows)]
+                    for offset, (content_hash, blob) in enumerate(rows):
+                        block[offset] = EmbeddingStore.from_blob(blob)
+                        self._positions[content_hash] = start + offset
+                        self.content_hashes.append(content_hash)
+                    block[:] = self._normalize(block)
+            
+            conn.close()
+            return len(self.content_hashes)
+        except Exception as e:
+            print(f"Gömme indeksi yüklenirken hata: {str(e)}")
+            return 0
+    
+    def add(self, content_hash: str, vector: Sequence[float]) -> None:
+        """
+        İndekse bir vektör ekle veya mevcut vektörü güncelle.
+        
+        Args:
+            content_hash: EmbeddingStore.content_hash ile hesaplanmış anahtar
+            vector: Gömme vektörü
+        """
+        vector = np.asarray(vector, dtype=EMBEDDING_DTYPE)
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = vector.shape[0]
+                self._matrix = np.empty((0, self.dimensions), dtype=EMBEDDING_DTYPE)
+            elif vector.shape[0] != self.dimensions:
+                raise ValueError(f"Vektör boyutu {vector.shape[0]}, indeks boyutu {self.dimensions}")
+            
+            position = self._positions.get(content_hash)
+            if position is None:
+                position = len(self.content_hashes)
+                self._reserve(position + 1)
+                self._positions[content_hash] = position
+                self.content_hashes.append(content_hash)
+            self._matrix[position] = self._normalize(vector)
+    
+    def search(self, query_vectors: Sequence[Sequence[float]], top_k: int = 5) -> List[List[Tuple[str, float]]]:
+        """
+        Sorgu vektörlerine kosinüs benzerliği en yüksek kayıtları bul.
+        
+        Tüm sorgular tek bir matris çarpımıyla puanlanır.
+        
+        Args:
+            query_vectors: Bir veya birden çok sorgu vektörü
+            top_k: Sorgu başına döndürülecek sonuç sayısı
+        
+        Returns:
+            List: Her sorgu için (content_hash, benzerlik) listesi (yüksekten düşüğe)
+        """
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=EMBEDDING_DTYPE))
+        
+        with self._lock:
+            matrix = self.matrix
+            if not len(matrix):
+                return [[] for _ in range(len(queries))]
+            
+            scores = self._normalize(queries) @ matrix.T
+            k = min(top_k, scores.shape[1])
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            
+            results = []
+            for row, candidates in enumerate(top):
+                ordered = candidates[np.argsort(-scores[row, candidates])]
+                results.append([(self.content_hashes[i], float(scores[row, i])) for i in ordered])
+        
+        return results
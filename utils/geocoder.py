@@ -0,0 +1,320 @@
+"""
+Offline geocoding over a bundled GeoNames-style city index.
+"""
+import bisect
+import math
+from array import array
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Any, Optional, List, Tuple, Iterator
+
+from utils.config import GEOCODER_DATA_PATHS, GEOCODER_MIN_SIMILARITY
+
+# GeoNames dökümlerindeki (cities15000.txt vb.) sütun sayısı ve kullanılan sütunlar
+GEONAMES_COLUMNS = 19
+_GEONAMES_FIELDS = {"name": 1, "asciiname": 2, "alternatenames": 3, "latitude": 4,
+                    "longitude": 5, "feature_code": 7, "country_code": 8, "population": 14}
+
+# Ülke kayıtlarının GeoNames özellik kodları (PCLI: bağımsız ülke)
+COUNTRY_FEATURE_CODES = {"PCLI", "PCLD", "PCLF", "PCLS", "PCL"}
+
+# Popülasyonun sıralamaya etkisi: 10 milyonluk bir şehir benzerliğe ~0.07 ekler
+POPULATION_WEIGHT = 0.01
+# Önek aramasında incelenecek en fazla isim
+MAX_PREFIX_CANDIDATES = 64
+
+# NFKD ile ayrışmayan harfler ve Türkçe noktalı/noktasız i
+_FOLD = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i", "ø": "o", "Ø": "o", "æ": "ae", "Æ": "ae", "œ": "oe",
+    "Œ": "oe", "ł": "l", "Ł": "l", "đ": "d", "Đ": "d", "ð": "d", "þ": "th", "ß": "ss"
+})
+_APOSTROPHES = re.compile(r"[’'`´]")
+_NON_WORD = re.compile(r"[\W_]+")
+# "İstanbul'da", "Ankara'nın" gibi kesme işaretinden sonra gelen Türkçe ekler
+_TURKISH_SUFFIX = re.compile(r"[’'`´]\w+$")
+_LATIN_KEY = re.compile(r"^[a-z0-9 ]+$")
+
+def normalize_name(name: str) -> str:
+    """
+    Yer adını karşılaştırma anahtarına çevir.
+    
+    Büyük/küçük harf ve aksanlar yok sayılır, Türkçe karakterler ASCII
+    karşılıklarına indirgenir, noktalama boşluğa çevrilir.
+    
+    Args:
+        name: Yer adı
+    
+    Returns:
+        str: Normalize edilmiş anahtar (ör. "Düsseldorf" -> "dusseldorf")
+    """
+    text = unicodedata.normalize("NFKD", name.translate(_FOLD).casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = _APOSTROPHES.sub("", text)
+    return _NON_WORD.sub(" ", text).strip()
+
+def _trigrams(key: str) -> set:
+    """Anahtarın kenarları boşlukla doldurulmuş trigram kümesi."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class GeocodeIndex:
+    """Read-only in-memory index of places: exact-name hash, sorted keys for prefixes, trigrams for fuzzy matches."""
+    
+    def __init__(self, paths: Optional[List[str]] = None, min_similarity: float = GEOCODER_MIN_SIMILARITY):
+        self.min_similarity = min_similarity
+        self.names: List[str] = []
+        self.country_codes: List[str] = []
+        self.is_country: List[bool] = []
+        
+        latitudes: List[float] = []
+        longitudes: List[float] = []
+        populations: List[int] = []
+        place_keys: Dict[str, List[int]] = defaultdict(list)
+        # normalize ülke adı/kodu -> ülke kodu ("city, country" sorguları için)
+        self.countries: Dict[str, str] = {}
+        
+        for path in paths if paths is not None else GEOCODER_DATA_PATHS:
+            for row in self._read_rows(path):
+                place_id = len(self.names)
+                self.names.append(row["name"])
+                self.country_codes.append(row["country_code"])
+                country = row["feature_code"] in COUNTRY_FEATURE_CODES
+                self.is_country.append(country)
+                latitudes.append(row["latitude"])
+                longitudes.append(row["longitude"])
+                populations.append(row["population"])
+                
+                for key in row["keys"]:
+                    places = place_keys[key]
+                    if place_id not in places:
+                        places.append(place_id)
+                    if country:
+                        self.countries[key] = row["country_code"]
+                if country:
+                    self.countries[row["country_code"].lower()] = row["country_code"]
+        
+        # Sıkıştırılmış sütunlar (numpy'ye gerek yok; modülün içe aktarılması hafif kalır)
+        self.latitudes = array("f", latitudes)
+        self.longitudes = array("f", longitudes)
+        self.populations = array("q", populations)
+        
+        # Aynı ada sahip yerler: önce şehirler (ülke adıyla çakışan başkentler için),
+        # sonra popülasyona göre büyükten küçüğe
+        self._places: Dict[str, Tuple[int, ...]] = {
+            key: tuple(sorted(ids, key=lambda i: (self.is_country[i], -self.populations[i])))
+            for key, ids in place_keys.items()
+        }
+        self._sorted_keys = sorted(self._places)
+        self._key_weight = {
+            key: POPULATION_WEIGHT * math.log10(int(self.populations[ids[0]]) + 1)
+            for key, ids in self._places.items()
+        }
+        
+        self._trigram_postings: Dict[str, List[int]] = defaultdict(list)
+        self._trigram_counts: List[int] = []
+        for key_id, key in enumerate(self._sorted_keys):
+            grams = _trigrams(key)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._trigram_postings[gram].append(key_id)
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    @staticmethod
+    def _read_rows(path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Paketle gelen listeyi veya bir GeoNames dökümünü satır satır oku.
+        
+        Args:
+            path: Sekmeyle ayrılmış dosya yolu
+        
+        Returns:
+            Iterator: name, keys, latitude, longitude, feature_code, country_code, population alanlı kayıtlar
+        """
+        skipped = 0
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip() or line.startswith("#"):
+                        continue
+                    
+                    # Hatalı bir satır (eksik sütun, geçersiz sayı) yalnızca kendisini atlatır
+                    try:
+                        row = GeocodeIndex._parse_row(line)
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    yield row
+        except Exception as e:
+            print(f"Konum verisi okunurken hata ({path}): {str(e)}")
+        
+        if skipped:
+            print(f"Konum verisinde {skipped} hatalı satır atlandı ({path})")
+    
+    @staticmethod
+    def _parse_row(line: str) -> Dict[str, Any]:
+        """
+        Sekmeyle ayrılmış tek bir satırı kayda çevir.
+        
+        Raises:
+            ValueError: Sütun sayısı veya sayısal alanlar geçersizse
+        """
+        fields = line.rstrip("\n").split("\t")
+        if len(fields) == GEONAMES_COLUMNS:
+            row = {column: fields[i] for column, i in _GEONAMES_FIELDS.items()}
+            # GeoNames alternatif adları onlarca yazı sistemini içerir; Latin harfli olanlar yeterli
+            names = [row["name"], row["asciiname"]] + row["alternatenames"].split(",")
+            keys = {normalize_name(n) for n in names}
+            keys = {k for k in keys if k and (_LATIN_KEY.match(k) or k == normalize_name(row["name"]))}
+        else:
+            name, alternates, latitude, longitude, feature_code, country_code, population = fields
+            row = {"name": name, "latitude": latitude, "longitude": longitude,
+                   "feature_code": feature_code, "country_code": country_code, "population": population}
+            keys = {normalize_name(n) for n in [name] + alternates.split(",")}
+            keys.discard("")
+        
+        return {
+            "name": row["name"],
+            "keys": keys,
+            "latitude": float(row["latitude"]),
+            "longitude": float(row["longitude"]),
+            "feature_code": row["feature_code"],
+            "country_code": row["country_code"],
+            "population": int(row["population"] or 0)
+        }
+    
+    def _place(self, place_id: int, match: str, score: float) -> Dict[str, Any]:
+        """Bir yer kaydını sonuç sözlüğüne çevir."""
+        return {
+            "name": self.names[place_id],
+            "country_code": self.country_codes[place_id],
+            "latitude": round(float(self.latitudes[place_id]), 4),
+            "longitude": round(float(self.longitudes[place_id]), 4),
+            "population": int(self.populations[place_id]),
+            "match": match,
+            "score": round(score, 3)
+        }
+    
+    def _first_place(self, key: str, country_code: Optional[str]) -> Optional[int]:
+        """Anahtara sahip (isteğe bağlı olarak verilen ülkedeki) en uygun yer."""
+        for place_id in self._places.get(key, ()):
+            if country_code is None or self.country_codes[place_id] == country_code:
+                return place_id
+        return None
+    
+    def _candidates(self, key: str) -> Dict[str, Tuple[float, str]]:
+        """
+        Anahtara benzeyen isimleri önek ve trigram eşleşmesiyle bul.
+        
+        Returns:
+            Dict: isim -> (benzerlik, eşleşme türü)
+        """
+        candidates: Dict[str, Tuple[float, str]] = {}
+        
+        # Önek: "amster" -> "amsterdam"; benzerlik yazılan kısmın oranıyla artar
+        if len(key) >= 3:
+            start = bisect.bisect_left(self._sorted_keys, key)
+            for name in self._sorted_keys[start:start + MAX_PREFIX_CANDIDATES]:
+                if not name.startswith(key):
+                    break
+                candidates[name] = (0.5 + 0.5 * len(key) / len(name), "prefix")
+        
+        # Trigram (Dice) benzerliği: yazım hataları ve eksik/fazla harfler
+        grams = _trigrams(key)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for key_id in self._trigram_postings.get(gram, ()):
+                shared[key_id] += 1
+        
+        for key_id, count in shared.items():
+            similarity = 2.0 * count / (len(grams) + self._trigram_counts[key_id])
+            if similarity < self.min_similarity:
+                continue
+            name = self._sorted_keys[key_id]
+            if similarity > candidates.get(name, (0.0, ""))[0]:
+                candidates[name] = (similarity, "fuzzy")
+        
+        return candidates
+    
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Yer adına en çok benzeyen kayıtları sırala.
+        
+        Tam eşleşmeler her zaman önce gelir; diğerleri benzerlik ile
+        popülasyon ağırlığının toplamına göre sıralanır. "Paris, France"
+        veya "Portland, US" gibi virgülden sonra verilen ülke adı/kodu
+        sonuçları o ülkeyle sınırlar.
+        
+        Args:
+            query: Yer adı (ör. "İzmir'de", "Londra", "Springfeld")
+            limit: Döndürülecek en fazla sonuç
+        
+        Returns:
+            List: name, country_code, latitude, longitude, population, match, score alanlı sonuçlar
+        """
+        country_code = None
+        name_part = query
+        if "," in query:
+            head, tail = query.rsplit(",", 1)
+            country_code = self.countries.get(normalize_name(tail))
+            if country_code:
+                name_part = head
+        
+        keys = [normalize_name(name_part)]
+        stripped = normalize_name(_TURKISH_SUFFIX.sub("", name_part.strip()))
+        if stripped and stripped != keys[0]:
+            keys.append(stripped)
+        keys = [key for key in keys if key]
+        
+        for key in keys:
+            place_id = self._first_place(key, country_code)
+            if place_id is not None:
+                results = [self._place(place_id, "exact", 1.0)]
+                others = [i for i in self._places[key] if i != place_id and
+                          (country_code is None or self.country_codes[i] == country_code)]
+                results.extend(self._place(i, "exact", 1.0) for i in others[:limit - 1])
+                return results
+        
+        scored: Dict[int, Tuple[float, float, str]] = {}
+        for key in keys:
+            for name, (similarity, match) in self._candidates(key).items():
+                place_id = self._first_place(name, country_code)
+                if place_id is None:
+                    continue
+                rank = similarity + self._key_weight[name]
+                if rank > scored.get(place_id, (0.0,))[0]:
+                    scored[place_id] = (rank, similarity, match)
+        
+        best = sorted(scored.items(), key=lambda item: -item[1][0])[:limit]
+        return [self._place(place_id, match, similarity) for place_id, (_, similarity, match) in best]
+    
+    def geocode(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Yer adını koordinatlara çevir.
+        
+        Args:
+            query: Yer adı
+        
+        Returns:
+            Optional[Dict]: En iyi eşleşme veya bulunamazsa None
+        """
+        results = self.search(query, limit=1)
+        return results[0] if results else None
+
+_default_index: Optional[GeocodeIndex] = None
+_default_index_lock = threading.Lock()
+
+def get_geocoder() -> GeocodeIndex:
+    """
+    Süreç genelinde paylaşılan konum dizinini döndür (ilk çağrıda dosyalardan kurulur).
+    """
+    global _default_index
+    
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                _default_index = GeocodeIndex()
+    return _default_index
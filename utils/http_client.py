@@ -0,0 +1,142 @@
+"""
+Shared HTTP client utilities for network-bound MCP tools.
+"""
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_RETRY_BACKOFF,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_MAX_CONCURRENCY_PER_HOST,
+    HTTP_USER_AGENT
+)
+
+class HttpClient:
+    """Thread-safe pooled HTTP client with default timeouts, retries and per-host limits."""
+    
+    # Yeniden denemeye değer geçici yanıt kodları (Retry-After başlığına uyulur)
+    RETRY_STATUSES = (429, 502, 503, 504)
+    
+    def __init__(self,
+                 connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+                 read_timeout: float = HTTP_READ_TIMEOUT,
+                 max_retries: int = HTTP_MAX_RETRIES,
+                 retry_backoff: float = HTTP_RETRY_BACKOFF,
+                 pool_connections: int = HTTP_POOL_CONNECTIONS,
+                 pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                 max_concurrency_per_host: int = HTTP_MAX_CONCURRENCY_PER_HOST,
+                 user_agent: str = HTTP_USER_AGENT):
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.max_concurrency_per_host = max_concurrency_per_host
+        
+        # Yalnızca idempotent metotlar yeniden denenir
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=retry_backoff,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+        
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_limits_lock = threading.Lock()
+    
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        """
+        URL'nin host'u için eşzamanlılık semaforunu döndür.
+        """
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            with self._host_limits_lock:
+                semaphore = self._host_limits.setdefault(
+                    host, threading.BoundedSemaphore(self.max_concurrency_per_host)
+                )
+        return semaphore
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Havuzdaki bir bağlantı üzerinden istek gönder.
+        
+        timeout belirtilmezse varsayılan (bağlantı, okuma) zaman aşımları
+        kullanılır. Host başına eşzamanlı istek sınırı doluysa bir bağlantı
+        zaman aşımı süresince yer açılması beklenir.
+        
+        Args:
+            method: HTTP metodu
+            url: İstek adresi
+            **kwargs: requests.Session.request argümanları
+        
+        Returns:
+            requests.Response: Yanıt (stream=True ise gövde okunmadan döner)
+        
+        Raises:
+            requests.exceptions.ConnectTimeout: Host sınırında yer açılmazsa
+            requests.RequestException: Bağlantı/zaman aşımı hataları
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        
+        semaphore = self._host_limit(url)
+        if not semaphore.acquire(timeout=self.timeout[0]):
+            raise requests.exceptions.ConnectTimeout(
+                f"Too many concurrent requests to {urlsplit(url).netloc}"
+            )
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            semaphore.release()
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET isteği gönder (bkz. request)."""
+        return self.request("GET", url, **kwargs)
+    
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POST isteği gönder (bkz. request; POST yeniden denenmez)."""
+        return self.request("POST", url, **kwargs)
+    
+    def close(self) -> None:
+        """Havuzdaki bağlantıları kapat."""
+        self.session.close()
+
+_default_client: Optional[HttpClient] = None
+_default_client_lock = threading.Lock()
+
+def get_http_client() -> HttpClient:
+    """
+    Süreç genelinde paylaşılan HTTP istemcisini döndür (ilk çağrıda oluşturulur).
+    """
+    global _default_client
+    
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = HttpClient()
+    return _default_client
+
+def set_http_client(client: HttpClient) -> None:
+    """
+    Paylaşılan HTTP istemcisini değiştir (ör. farklı zaman aşımlarıyla veya testlerde).
+    """
+    global _default_client
+    
+    with _default_client_lock:
+        _default_client = client
@@ -0,0 +1,642 @@
+"""
+Safe arithmetic expression engine with units, list values and bounded evaluation.
+"""
+import ast
+import math
+import re
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple, Callable, Union
+
+from utils.config import (
+    MATH_MAX_EXPRESSION_LENGTH,
+    MATH_MAX_EXPONENT,
+    MATH_MAX_RESULT_DIGITS,
+    MATH_MAX_STEPS,
+    MATH_MAX_LIST_LENGTH,
+    MATH_EXPRESSION_CACHE_SIZE
+)
+
+# Tam sayı sonuçlarının bit sınırı (basamak sınırından türetilir)
+MAX_RESULT_BITS = int(MATH_MAX_RESULT_DIGITS * math.log2(10)) + 1
+# İç içe geçmiş ifade derinliği sınırı (özyineleme sınırına takılmamak için)
+MAX_DEPTH = 100
+
+class MathEvaluationError(Exception):
+    """Raised for expressions that are invalid, unsupported or exceed the evaluation limits."""
+
+class Quantity:
+    """A value with a physical dimension, stored in SI units together with the unit it is displayed in."""
+    __slots__ = ("value", "dims", "unit", "factor")
+    
+    def __init__(self, value: float, dims: Tuple[int, ...], unit: str, factor: float):
+        self.value = value
+        self.dims = dims
+        self.unit = unit
+        self.factor = factor
+    
+    @property
+    def magnitude(self) -> float:
+        """Değerin kendi birimi cinsinden büyüklüğü."""
+        return self.value / self.factor
+
+# Boyutlar: (uzunluk m, kütle kg, zaman s, veri B)
+_L, _M, _T, _D = (1, 0, 0, 0), (0, 1, 0, 0), (0, 0, 1, 0), (0, 0, 0, 1)
+
+def _dims(*pairs: Tuple[Tuple[int, ...], int]) -> Tuple[int, ...]:
+    """(temel boyut, üs) çiftlerinden boyut vektörü oluştur."""
+    result = [0, 0, 0, 0]
+    for base, power in pairs:
+        result = [r + b * power for r, b in zip(result, base)]
+    return tuple(result)
+
+_AREA = _dims((_L, 2))
+_VOLUME = _dims((_L, 3))
+_SPEED = _dims((_L, 1), (_T, -1))
+_FORCE = _dims((_M, 1), (_L, 1), (_T, -2))
+_ENERGY = _dims((_M, 1), (_L, 2), (_T, -2))
+_POWER = _dims((_M, 1), (_L, 2), (_T, -3))
+_PRESSURE = _dims((_M, 1), (_L, -1), (_T, -2))
+
+# Birim adı -> (SI karşılığı, boyut)
+UNITS: Dict[str, Tuple[float, Tuple[int, ...]]] = {
+    # Uzunluk
+    "m": (1.0, _L), "km": (1e3, _L), "cm": (1e-2, _L), "mm": (1e-3, _L), "um": (1e-6, _L),
+    "nm": (1e-9, _L), "mi": (1609.344, _L), "yd": (0.9144, _L), "ft": (0.3048, _L),
+    "inch": (0.0254, _L), "nmi": (1852.0, _L),
+    # Kütle
+    "kg": (1.0, _M), "g": (1e-3, _M), "mg": (1e-6, _M), "t": (1e3, _M),
+    "lb": (0.45359237, _M), "oz": (0.028349523125, _M),
+    # Zaman
+    "s": (1.0, _T), "ms": (1e-3, _T), "min": (60.0, _T), "h": (3600.0, _T),
+    "day": (86400.0, _T), "week": (604800.0, _T), "year": (31557600.0, _T),
+    # Alan ve hacim
+    "ha": (1e4, _AREA), "acre": (4046.8564224, _AREA),
+    "l": (1e-3, _VOLUME), "L": (1e-3, _VOLUME), "ml": (1e-6, _VOLUME), "mL": (1e-6, _VOLUME),
+    "gal": (0.003785411784, _VOLUME),
+    # Hız
+    "mph": (0.44704, _SPEED), "kmh": (1 / 3.6, _SPEED), "knot": (1852 / 3600, _SPEED),
+    # Kuvvet, enerji, güç, basınç
+    "N": (1.0, _FORCE), "J": (1.0, _ENERGY), "kJ": (1e3, _ENERGY), "cal": (4.184, _ENERGY),
+    "kcal": (4184.0, _ENERGY), "Wh": (3600.0, _ENERGY), "kWh": (3.6e6, _ENERGY),
+    "W": (1.0, _POWER), "kW": (1e3, _POWER), "hp": (745.6998715822702, _POWER),
+    "Pa": (1.0, _PRESSURE), "kPa": (1e3, _PRESSURE), "bar": (1e5, _PRESSURE),
+    "atm": (101325.0, _PRESSURE), "psi": (6894.757293168, _PRESSURE),
+    # Veri
+    "B": (1.0, _D), "bit": (0.125, _D), "KB": (1e3, _D), "MB": (1e6, _D), "GB": (1e9, _D),
+    "TB": (1e12, _D), "KiB": (1024.0, _D), "MiB": (1024.0 ** 2, _D), "GiB": (1024.0 ** 3, _D),
+    "TiB": (1024.0 ** 4, _D)
+}
+
+CONSTANTS: Dict[str, float] = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+Value = Union[int, float, Quantity, list]
+
+class _Context:
+    """Per-evaluation state: variable values and the step budget."""
+    __slots__ = ("variables", "steps")
+    
+    def __init__(self, variables: Dict[str, Any]):
+        self.variables = variables
+        self.steps = 0
+    
+    def tick(self, count: int = 1) -> None:
+        self.steps += count
+        if self.steps > MATH_MAX_STEPS:
+            raise MathEvaluationError(f"Expression is too complex (more than {MATH_MAX_STEPS} steps)")
+
+def _check(value: Any) -> Any:
+    """Sonucun sonlu, gerçel ve boyut sınırları içinde olduğunu doğrula."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        if value.bit_length() > MAX_RESULT_BITS:
+            raise MathEvaluationError(f"Result is too large (more than {MATH_MAX_RESULT_DIGITS} digits)")
+        return value
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise MathEvaluationError("Result is too large or undefined")
+        return value
+    if isinstance(value, complex):
+        raise MathEvaluationError("Result is not a real number")
+    return value
+
+def _quantity(value: float, dims: Tuple[int, ...], unit: str, factor: float) -> Union[float, Quantity]:
+    """Boyutsuz sonuçları düz sayıya indirge."""
+    _check(value)
+    if not any(dims):
+        return value
+    return Quantity(value, dims, unit, factor)
+
+def _scalar_pow(base: Any, exponent: Any) -> Any:
+    """Üs ve sonuç boyutunu hesaplamadan önce sınırla."""
+    if abs(exponent) > MATH_MAX_EXPONENT:
+        raise MathEvaluationError(f"Exponent is too large (limit is {MATH_MAX_EXPONENT})")
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+        if exponent * math.log2(abs(base)) > MAX_RESULT_BITS:
+            raise MathEvaluationError(f"Result is too large (more than {MATH_MAX_RESULT_DIGITS} digits)")
+    return base ** exponent
+
+def _scalar_op(op: str, a: Any, b: Any) -> Any:
+    """İki düz sayı üzerinde işlem yap."""
+    if op == "+":
+        return a + b
+    if op == "-":
+        return a - b
+    if op == "*":
+        return a * b
+    if op == "**":
+        return _scalar_pow(a, b)
+    if b == 0:
+        raise MathEvaluationError("Division by zero")
+    if op == "/":
+        return a / b
+    if op == "//":
+        return a // b
+    return a % b
+
+def _quantity_op(op: str, a: Any, b: Any) -> Any:
+    """En az biri birimli olan iki değer üzerinde işlem yap."""
+    if op in ("+", "-"):
+        if not (isinstance(a, Quantity) and isinstance(b, Quantity)) or a.dims != b.dims:
+            raise MathEvaluationError(f"Cannot {'add' if op == '+' else 'subtract'} {_describe(a)} and {_describe(b)}")
+        value = a.value + b.value if op == "+" else a.value - b.value
+        return _quantity(value, a.dims, a.unit, a.factor)
+    
+    if op == "*":
+        if not isinstance(a, Quantity):
+            return _quantity(a * b.value, b.dims, b.unit, b.factor)
+        if not isinstance(b, Quantity):
+            return _quantity(a.value * b, a.dims, a.unit, a.factor)
+        dims = tuple(x + y for x, y in zip(a.dims, b.dims))
+        return _quantity(a.value * b.value, dims, f"{a.unit}*{b.unit}", a.factor * b.factor)
+    
+    if op == "/":
+        divisor = b.value if isinstance(b, Quantity) else b
+        if divisor == 0:
+            raise MathEvaluationError("Division by zero")
+        if not isinstance(a, Quantity):
+            dims = tuple(-x for x in b.dims)
+            return _quantity(a / b.value, dims, f"1/{b.unit}", 1 / b.factor)
+        if not isinstance(b, Quantity):
+            return _quantity(a.value / b, a.dims, a.unit, a.factor)
+        dims = tuple(x - y for x, y in zip(a.dims, b.dims))
+        return _quantity(a.value / b.value, dims, f"{a.unit}/{b.unit}", a.factor / b.factor)
+    
+    if op == "**" and isinstance(a, Quantity) and not isinstance(b, Quantity):
+        if not (isinstance(b, int) or (isinstance(b, float) and b.is_integer())) or abs(b) > 12:
+            raise MathEvaluationError("Units can only be raised to small whole-number powers")
+        power = int(b)
+        dims = tuple(x * power for x in a.dims)
+        return _quantity(a.value ** power, dims, f"{a.unit}^{power}", a.factor ** power)
+    
+    raise MathEvaluationError(f"Operator '{op}' is not supported for {_describe(a)} and {_describe(b)}")
+
+def _describe(value: Any) -> str:
+    """Hata mesajları için değerin türünü açıkla."""
+    if isinstance(value, Quantity):
+        return f"a quantity in {value.unit}"
+    if isinstance(value, list):
+        return "a list"
+    return "a plain number"
+
+def _apply(ctx: _Context, op: str, a: Value, b: Value) -> Value:
+    """
+    İkili işlemi uygula; listeler eleman eleman işlenir.
+    
+    Liste ile sayı arasındaki işlem sayıyı her elemana uygular; iki liste
+    aynı uzunlukta olmalıdır.
+    """
+    ctx.tick()
+    if isinstance(a, list) or isinstance(b, list):
+        if isinstance(a, list) and isinstance(b, list):
+            if len(a) != len(b):
+                raise MathEvaluationError(f"List lengths differ ({len(a)} and {len(b)})")
+            return [_apply(ctx, op, x, y) for x, y in zip(a, b)]
+        if isinstance(a, list):
+            return [_apply(ctx, op, x, b) for x in a]
+        return [_apply(ctx, op, a, y) for y in b]
+    
+    try:
+        if isinstance(a, Quantity) or isinstance(b, Quantity):
+            return _quantity_op(op, a, b)
+        return _check(_scalar_op(op, a, b))
+    except ZeroDivisionError:
+        raise MathEvaluationError("Division by zero")
+    except OverflowError:
+        raise MathEvaluationError("Result is too large")
+
+def _plain(value: Value, name: str) -> Union[int, float]:
+    """Fonksiyon argümanının düz sayı olduğunu doğrula."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    raise MathEvaluationError(f"{name}() expects a plain number, got {_describe(value)}")
+
+def _elementwise(name: str, fn: Callable[..., Any]) -> Callable[..., Value]:
+    """Düz sayı fonksiyonunu listelere eleman eleman uygulanabilir hale getir."""
+    def call(ctx: _Context, *args: Value) -> Value:
+        ctx.tick()
+        for i, arg in enumerate(args):
+            if isinstance(arg, list):
+                return [call(ctx, *args[:i], item, *args[i + 1:]) for item in arg]
+        try:
+            return _check(fn(*(_plain(arg, name) for arg in args)))
+        except (ValueError, TypeError) as e:
+            raise MathEvaluationError(f"{name}(): {str(e)}")
+        except ZeroDivisionError:
+            raise MathEvaluationError("Division by zero")
+        except OverflowError:
+            raise MathEvaluationError("Result is too large")
+    return call
+
+def _whole(value: Union[int, float]) -> int:
+    """Tam sayı bekleyen fonksiyonlar için argümanı doğrula."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if not isinstance(value, int) or value < 0:
+        raise ValueError("expects a non-negative whole number")
+    return value
+
+def _bounded_by_lgamma(log_size: float) -> None:
+    """Sonucun yaklaşık bit sayısını hesaplamadan önce sınırla."""
+    if log_size / math.log(2) > MAX_RESULT_BITS:
+        raise MathEvaluationError(f"Result is too large (more than {MATH_MAX_RESULT_DIGITS} digits)")
+
+def _factorial(n: Union[int, float]) -> int:
+    n = _whole(n)
+    _bounded_by_lgamma(math.lgamma(n + 1))
+    return math.factorial(n)
+
+def _comb(n: Union[int, float], k: Union[int, float]) -> int:
+    n, k = _whole(n), _whole(k)
+    if k <= n:
+        _bounded_by_lgamma(math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1))
+    return math.comb(n, k)
+
+def _perm(n: Union[int, float], k: Union[int, float]) -> int:
+    n, k = _whole(n), _whole(k)
+    if k <= n:
+        _bounded_by_lgamma(math.lgamma(n + 1) - math.lgamma(n - k + 1))
+    return math.perm(n, k)
+
+def _round(x: Union[int, float], digits: Union[int, float] = 0) -> Union[int, float]:
+    digits = int(digits)
+    if abs(digits) > 15:
+        raise ValueError("digits must be between -15 and 15")
+    return round(x) if digits == 0 else round(x, digits)
+
+def _log(x: Union[int, float], base: Optional[Union[int, float]] = None) -> float:
+    return math.log(x) if base is None else math.log(x, base)
+
+def _cbrt(x: Union[int, float]) -> float:
+    return math.copysign(abs(x) ** (1 / 3), x)
+
+def _values(ctx: _Context, name: str, args: Tuple[Value, ...]) -> list:
+    """Toplama fonksiyonları için değerleri tek listeye indir: f([1, 2]) veya f(1, 2)."""
+    values = args[0] if len(args) == 1 and isinstance(args[0], list) else list(args)
+    if not values:
+        raise MathEvaluationError(f"{name}() needs at least one value")
+    ctx.tick(len(values))
+    return values
+
+def _sum(ctx: _Context, *args: Value) -> Value:
+    values = _values(ctx, "sum", args)
+    total = values[0]
+    for value in values[1:]:
+        total = _apply(ctx, "+", total, value)
+    return total
+
+def _mean(ctx: _Context, *args: Value) -> Value:
+    values = _values(ctx, "mean", args)
+    return _apply(ctx, "/", _sum(ctx, values), len(values))
+
+def _sort_key(value: Value, dims: Optional[Tuple[int, ...]]) -> float:
+    """Karşılaştırma için SI değeri (birimleri aynı olmayan değerler karşılaştırılamaz)."""
+    if isinstance(value, list):
+        raise MathEvaluationError("Nested lists cannot be compared")
+    value_dims = value.dims if isinstance(value, Quantity) else None
+    if value_dims != dims:
+        raise MathEvaluationError("Cannot compare values with different units")
+    return value.value if isinstance(value, Quantity) else value
+
+def _ordered(ctx: _Context, name: str, args: Tuple[Value, ...]) -> list:
+    values = _values(ctx, name, args)
+    dims = values[0].dims if isinstance(values[0], Quantity) else None
+    ctx.tick(len(values) * max(1, len(values).bit_length()))
+    return sorted(values, key=lambda value: _sort_key(value, dims))
+
+def _min(ctx: _Context, *args: Value) -> Value:
+    return _ordered(ctx, "min", args)[0]
+
+def _max(ctx: _Context, *args: Value) -> Value:
+    return _ordered(ctx, "max", args)[-1]
+
+def _median(ctx: _Context, *args: Value) -> Value:
+    values = _ordered(ctx, "median", args)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return _apply(ctx, "/", _apply(ctx, "+", values[middle - 1], values[middle]), 2)
+
+def _abs(ctx: _Context, value: Value) -> Value:
+    ctx.tick()
+    if isinstance(value, list):
+        return [_abs(ctx, item) for item in value]
+    if isinstance(value, Quantity):
+        return Quantity(abs(value.value), value.dims, value.unit, value.factor)
+    return abs(value)
+
+def _range(ctx: _Context, *args: Value) -> list:
+    bounds = []
+    for arg in args:
+        value = _plain(arg, "range")
+        if isinstance(value, float):
+            if not value.is_integer():
+                raise MathEvaluationError("range() expects whole numbers")
+            value = int(value)
+        bounds.append(value)
+    if len(bounds) == 3 and bounds[2] == 0:
+        raise MathEvaluationError("range() step must not be zero")
+    if len(bounds) == 1:
+        bounds.insert(0, 0)
+    start, stop, step = bounds[0], bounds[1], bounds[2] if len(bounds) == 3 else 1
+    # len(range(...)) sys.maxsize'ı aşınca OverflowError verir; uzunluğu aritmetik olarak hesapla
+    length = max(0, (stop - start + step - (1 if step > 0 else -1)) // step)
+    if length > MATH_MAX_LIST_LENGTH:
+        raise MathEvaluationError(f"List is too long (limit is {MATH_MAX_LIST_LENGTH} items)")
+    ctx.tick(length)
+    return list(range(start, stop, step))
+
+def _len(ctx: _Context, value: Value) -> int:
+    if not isinstance(value, list):
+        raise MathEvaluationError("len() expects a list")
+    return len(value)
+
+# Fonksiyon adı -> (ctx, *args) alan çağrılabilir ve kabul edilen argüman sayısı aralığı
+FUNCTIONS: Dict[str, Tuple[Callable[..., Value], int, int]] = {
+    "sqrt": (_elementwise("sqrt", math.sqrt), 1, 1),
+    "cbrt": (_elementwise("cbrt", _cbrt), 1, 1),
+    "exp": (_elementwise("exp", math.exp), 1, 1),
+    "ln": (_elementwise("ln", math.log), 1, 1),
+    "log": (_elementwise("log", _log), 1, 2),
+    "log10": (_elementwise("log10", math.log10), 1, 1),
+    "log2": (_elementwise("log2", math.log2), 1, 1),
+    "sin": (_elementwise("sin", math.sin), 1, 1),
+    "cos": (_elementwise("cos", math.cos), 1, 1),
+    "tan": (_elementwise("tan", math.tan), 1, 1),
+    "asin": (_elementwise("asin", math.asin), 1, 1),
+    "acos": (_elementwise("acos", math.acos), 1, 1),
+    "atan": (_elementwise("atan", math.atan), 1, 1),
+    "atan2": (_elementwise("atan2", math.atan2), 2, 2),
+    "sinh": (_elementwise("sinh", math.sinh), 1, 1),
+    "cosh": (_elementwise("cosh", math.cosh), 1, 1),
+    "tanh": (_elementwise("tanh", math.tanh), 1, 1),
+    "degrees": (_elementwise("degrees", math.degrees), 1, 1),
+    "radians": (_elementwise("radians", math.radians), 1, 1),
+    "hypot": (_elementwise("hypot", math.hypot), 2, 2),
+    "floor": (_elementwise("floor", math.floor), 1, 1),
+    "ceil": (_elementwise("ceil", math.ceil), 1, 1),
+    "round": (_elementwise("round", _round), 1, 2),
+    "factorial": (_elementwise("factorial", _factorial), 1, 1),
+    "comb": (_elementwise("comb", _comb), 2, 2),
+    "perm": (_elementwise("perm", _perm), 2, 2),
+    "gcd": (_elementwise("gcd", math.gcd), 2, 2),
+    "lcm": (_elementwise("lcm", math.lcm), 2, 2),
+    "abs": (_abs, 1, 1),
+    "sum": (_sum, 1, MATH_MAX_LIST_LENGTH),
+    "mean": (_mean, 1, MATH_MAX_LIST_LENGTH),
+    "avg": (_mean, 1, MATH_MAX_LIST_LENGTH),
+    "median": (_median, 1, MATH_MAX_LIST_LENGTH),
+    "min": (_min, 1, MATH_MAX_LIST_LENGTH),
+    "max": (_max, 1, MATH_MAX_LIST_LENGTH),
+    "range": (_range, 1, 3),
+    "len": (_len, 1, 1)
+}
+
+_BINARY_OPS = {
+    ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/", ast.FloorDiv: "//",
+    ast.Mod: "%", ast.Pow: "**"
+}
+
+# Sayı sabiti (1e5 gibi bilimsel gösterim dahil, geri izlemede bölünmeden)
+_NUMBER = r"(?<![\w.])(\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)(?![\d.])(?![eE][+-]?\d)"
+# "100 m / 9.58 s" -> "(100*m) / (9.58*s)": sayı ve ardından gelen birim/isim tek terimdir
+_IMPLICIT_TERM = re.compile(_NUMBER + r"\s*([A-Za-z_]\w*(?!\w)(?:\s*\*\*\s*-?\d+)?)(?!\s*\()")
+# "2sqrt(4)", "3(4+5)" gibi diğer örtük çarpmalar; "10 km to mi" gibi dönüşümler
+_IMPLICIT_MULTIPLY = re.compile(_NUMBER + r"\s*(?=[A-Za-z_(])")
+_CLOSE_OPEN = re.compile(r"\)\s*(?=[(\w])")
+_CONVERSION = re.compile(r"^(?P<expression>.+?)\s+(?:to|in|as)\s+(?P<unit>[A-Za-z][\w/*^ ]*)$", re.DOTALL)
+_SYMBOLS = str.maketrans({"×": "*", "·": "*", "÷": "/", "−": "-", "²": "^2", "³": "^3"})
+
+def _preprocess(expression: str) -> str:
+    """İfadeyi Python sözdizimine yaklaştır: sembolleri çevir ve örtük çarpmaları açık yap."""
+    # Hesap makinesi alışkanlığı: 2^10 üs alma anlamına gelir (öncelik de ** ile aynı olmalı)
+    text = expression.translate(_SYMBOLS).replace("^", "**")
+    text = _IMPLICIT_TERM.sub(r"(\1*\2)", text)
+    text = _IMPLICIT_MULTIPLY.sub(r"\1*", text)
+    return _CLOSE_OPEN.sub(")*", text)
+
+def _compile(node: ast.AST, depth: int = 0) -> Callable[[_Context], Value]:
+    """
+    AST düğümünü bir kez, doğrulanmış kapanışlar (closure) zincirine çevir.
+    
+    Yalnızca sayılar, isimler, aritmetik işlemler, liste/demet ve bilinen
+    fonksiyon çağrıları kabul edilir; diğer her şey derleme sırasında reddedilir.
+    """
+    if depth > MAX_DEPTH:
+        raise MathEvaluationError("Expression is nested too deeply")
+    
+    if isinstance(node, ast.Expression):
+        return _compile(node.body, depth + 1)
+    
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise MathEvaluationError(f"Unsupported value: {value!r}")
+        value = _check(value)
+        return lambda ctx: value
+    
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in FUNCTIONS and name not in UNITS:
+            raise MathEvaluationError(f"Function '{name}' must be called, e.g. {name}(x)")
+        
+        constant = CONSTANTS.get(name)
+        unit = UNITS.get(name)
+        
+        def lookup(ctx: _Context) -> Value:
+            if name in ctx.variables:
+                return ctx.variables[name]
+            if constant is not None:
+                return constant
+            if unit is not None:
+                return Quantity(unit[0], unit[1], name, unit[0])
+            raise MathEvaluationError(f"Unknown name '{name}'")
+        return lookup
+    
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = _compile(node.operand, depth + 1)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        return lambda ctx: _apply(ctx, "*", operand(ctx), -1)
+    
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        op = _BINARY_OPS[type(node.op)]
+        left = _compile(node.left, depth + 1)
+        right = _compile(node.right, depth + 1)
+        return lambda ctx: _apply(ctx, op, left(ctx), right(ctx))
+    
+    if isinstance(node, (ast.List, ast.Tuple)):
+        if len(node.elts) > MATH_MAX_LIST_LENGTH:
+            raise MathEvaluationError(f"List is too long (limit is {MATH_MAX_LIST_LENGTH} items)")
+        items = [_compile(item, depth + 1) for item in node.elts]
+        return lambda ctx: [item(ctx) for item in items]
+    
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            name = node.func.id if isinstance(node.func, ast.Name) else type(node.func).__name__
+            raise MathEvaluationError(f"Unknown function '{name}'")
+        if node.keywords or any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise MathEvaluationError(f"{node.func.id}() only takes positional arguments")
+        
+        fn, min_args, max_args = FUNCTIONS[node.func.id]
+        if not min_args <= len(node.args) <= max_args:
+            raise MathEvaluationError(f"{node.func.id}() takes {min_args if min_args == max_args else f'{min_args} to {max_args}'} argument(s)")
+        args = [_compile(arg, depth + 1) for arg in node.args]
+        return lambda ctx: fn(ctx, *(arg(ctx) for arg in args))
+    
+    raise MathEvaluationError(f"Unsupported syntax: {type(node).__name__}")
+
+def _parse(text: str) -> Callable[[_Context], Value]:
+    """Metni ayrıştır ve derle."""
+    try:
+        tree = ast.parse(_preprocess(text).strip(), mode="eval")
+    except (SyntaxError, ValueError) as e:
+        raise MathEvaluationError(f"Invalid expression: {getattr(e, 'msg', None) or str(e)}")
+    except RecursionError:
+        raise MathEvaluationError("Expression is nested too deeply")
+    return _compile(tree)
+
+def _tidy(value: Any) -> Any:
+    """Kayan nokta gürültüsünü temizle (0.1 + 0.2 -> 0.3)."""
+    if isinstance(value, float):
+        return float(f"{value:.12g}")
+    return value
+
+class CompiledExpression:
+    """A parsed and validated expression that can be evaluated many times with different variables."""
+    
+    def __init__(self, expression: str):
+        if len(expression) > MATH_MAX_EXPRESSION_LENGTH:
+            raise MathEvaluationError(f"Expression is too long (limit is {MATH_MAX_EXPRESSION_LENGTH} characters)")
+        
+        self.expression = expression
+        self.target_unit: Optional[str] = None
+        self._target: Optional[Callable[[_Context], Value]] = None
+        
+        # "10 km to mi": dönüşüm hedefi yalnızca birimlerden oluşan ayrı bir ifadedir
+        match = _CONVERSION.match(expression.strip())
+        if match and not any(op in match.group("unit") for op in "+-%"):
+            self.target_unit = " ".join(match.group("unit").split())
+            self._target = _parse(self.target_unit)
+            expression = match.group("expression")
+        self._evaluate = _parse(expression)
+    
+    @staticmethod
+    def _variables(variables: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Değişken değerlerini doğrula (sayı veya sayı listesi)."""
+        checked = {}
+        for name, value in (variables or {}).items():
+            if not isinstance(name, str) or not name.isidentifier() or name in FUNCTIONS:
+                raise MathEvaluationError(f"Invalid variable name: {name!r}")
+            values = value if isinstance(value, list) else [value]
+            if len(values) > MATH_MAX_LIST_LENGTH:
+                raise MathEvaluationError(f"Variable '{name}' has too many values (limit is {MATH_MAX_LIST_LENGTH})")
+            for item in values:
+                if isinstance(item, bool) or not isinstance(item, (int, float)):
+                    raise MathEvaluationError(f"Variable '{name}' must be a number or a list of numbers")
+                _check(item)
+            checked[name] = list(value) if isinstance(value, list) else value
+        return checked
+    
+    def _convert(self, value: Value, target: Value) -> Value:
+        """Değeri hedef birime çevir."""
+        if isinstance(value, list):
+            return [self._convert(item, target) for item in value]
+        if not isinstance(target, Quantity):
+            raise MathEvaluationError(f"'{self.target_unit}' is not a unit")
+        if not isinstance(value, Quantity) or value.dims != target.dims:
+            raise MathEvaluationError(f"Cannot convert {_describe(value)} to {self.target_unit}")
+        return Quantity(value.value, value.dims, self.target_unit, target.value)
+    
+    @staticmethod
+    def _output(value: Value) -> Tuple[Any, Optional[Any]]:
+        """Değeri (sonuç, birim) çiftine çevir."""
+        if isinstance(value, list):
+            pairs = [CompiledExpression._output(item) for item in value]
+            results = [result for result, _ in pairs]
+            units = [unit for _, unit in pairs]
+            if all(unit == units[0] for unit in units[1:]):
+                return results, units[0] if units else None
+            return results, units
+        if isinstance(value, Quantity):
+            return _tidy(_check(value.magnitude)), value.unit
+        return _tidy(value), None
+    
+    def evaluate(self, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        İfadeyi verilen değişkenlerle değerlendir.
+        
+        Args:
+            variables: İfadedeki isimlerin değerleri; liste verilirse ifade her eleman için hesaplanır
+        
+        Returns:
+            Dict: "result" ve birimli sonuçlar için "unit"
+        
+        Raises:
+            MathEvaluationError: Geçersiz değişken, tanımsız işlem veya sınır aşımı
+        """
+        ctx = _Context(self._variables(variables))
+        try:
+            value = self._evaluate(ctx)
+            if self._target is not None:
+                value = self._convert(value, self._target(_Context({})))
+        except RecursionError:
+            raise MathEvaluationError("Expression is nested too deeply")
+        
+        result, unit = self._output(value)
+        output = {"result": result}
+        if unit is not None:
+            output["unit"] = unit
+        return output
+
+@lru_cache(maxsize=MATH_EXPRESSION_CACHE_SIZE)
+def compile_expression(expression: str) -> CompiledExpression:
+    """
+    İfadeyi ayrıştırıp derle; aynı metin tekrar derlenmez.
+    
+    Args:
+        expression: Matematik ifadesi (ör. "2^10", "sqrt([1, 4, 9])", "90 km/h to mph")
+    
+    Returns:
+        CompiledExpression: Tekrar tekrar değerlendirilebilen derlenmiş ifade
+    
+    Raises:
+        MathEvaluationError: Geçersiz veya desteklenmeyen ifade
+    """
+    return CompiledExpression(expression)
+
+def evaluate_expression(expression: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    İfadeyi (önbellekteki derlenmiş haliyle) değerlendir.
+    
+    Args:
+        expression: Matematik ifadesi
+        variables: İfadedeki isimlerin değerleri
+    
+    Returns:
+        Dict: "result" ve birimli sonuçlar için "unit"
+    
+    Raises:
+        MathEvaluationError: Geçersiz ifade, tanımsız işlem veya sınır aşımı
+    """
+    return compile_expression(expression).evaluate(variables)
@@ -0,0 +1,321 @@
+"""
+Model Context Protocol (JSON-RPC 2.0) utilities for serving MCPServer tools over stdio and HTTP.
+"""
+import asyncio
+import json
+import uuid
+from typing import Dict, Any, Optional, Union, List, BinaryIO
+from urllib.parse import urlparse
+
+from utils.config import MCP_ALLOWED_ORIGINS, MCP_STDIO_MAX_CONCURRENCY, MCP_EXPOSE_HOST_UI_TOOLS
+
+# JSON-RPC 2.0 hata kodları
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+class MCPError(Exception):
+    """JSON-RPC error returned to the client instead of a result."""
+    
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+class MCPProtocolHandler:
+    """Transport-independent MCP request dispatcher backed by an MCPServer registry."""
+    
+    # Desteklenen protokol sürümleri (en yenisi başta)
+    PROTOCOL_VERSIONS = ("2025-06-18", "2025-03-26", "2024-11-05")
+    
+    def __init__(self, server, server_version: str = "1.0.0", expose_host_ui_tools: bool = MCP_EXPOSE_HOST_UI_TOOLS):
+        self.server = server
+        self.server_version = server_version
+        self.expose_host_ui_tools = expose_host_ui_tools
+        self._methods = {
+            "initialize": self._initialize,
+            "notifications/initialized": self._notification,
+            "notifications/cancelled": self._notification,
+            "ping": self._ping,
+            "tools/list": self._list_tools,
+            "tools/call": self._call_tool,
+        }
+    
+    @staticmethod
+    def _error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+    
+    async def handle_raw(self, raw: Union[str, bytes]) -> Optional[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Ham bir JSON-RPC mesajını (veya toplu mesajı) işle.
+        
+        Args:
+            raw: İstemciden gelen JSON metni
+        
+        Returns:
+            Dict, List veya None: Yanıt; sadece bildirimlerden oluşan mesajlar için None
+        """
+        try:
+            message = json.loads(raw)
+        except (ValueError, UnicodeDecodeError) as e:
+            return self._error(None, PARSE_ERROR, f"Parse error: {str(e)}")
+        return await self.handle_message(message)
+    
+    async def handle_message(self, message: Any) -> Optional[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Ayrıştırılmış bir mesajı işle; toplu mesajdaki istekler eşzamanlı çalışır.
+        
+        Args:
+            message: Tek bir JSON-RPC nesnesi veya nesne listesi
+        
+        Returns:
+            Dict, List veya None: Yanıt; sadece bildirimlerden oluşan mesajlar için None
+        """
+        if isinstance(message, list):
+            if not message:
+                return self._error(None, INVALID_REQUEST, "Empty batch")
+            responses = await asyncio.gather(*(self._handle_single(item) for item in message))
+            return [response for response in responses if response is not None] or None
+        return await self._handle_single(message)
+    
+    async def _handle_single(self, message: Any) -> Optional[Dict[str, Any]]:
+        if isinstance(message, dict) and "method" not in message and ("result" in message or "error" in message):
+            # İstemcinin yanıtları (sunucu istek göndermediği için) yok sayılır
+            return None
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str):
+            request_id = message.get("id") if isinstance(message, dict) else None
+            return self._error(request_id, INVALID_REQUEST, "Invalid request")
+        
+        is_notification = "id" not in message
+        request_id = message.get("id")
+        params = message.get("params") or {}
+        method = self._methods.get(message["method"])
+        
+        if method is None:
+            return None if is_notification else self._error(
+                request_id, METHOD_NOT_FOUND, f"Method not found: {message['method']}"
+            )
+        if not isinstance(params, dict):
+            return None if is_notification else self._error(request_id, INVALID_PARAMS, "params must be an object")
+        
+        try:
+            result = await method(params)
+        except MCPError as e:
+            return None if is_notification else self._error(request_id, e.code, e.message)
+        except Exception as e:
+            print(f"MCP isteği işlenirken hata ({message['method']}): {str(e)}")
+            return None if is_notification else self._error(request_id, INTERNAL_ERROR, str(e))
+        
+        return None if is_notification else {"jsonrpc": "2.0", "id": request_id, "result": result}
+    
+    async def _initialize(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        requested = params.get("protocolVersion")
+        return {
+            "protocolVersion": requested if requested in self.PROTOCOL_VERSIONS else self.PROTOCOL_VERSIONS[0],
+            "capabilities": {"tools": {"listChanged": False}},
+            "serverInfo": {"name": self.server.server_name, "version": self.server_version}
+        }
+    
+    async def _notification(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {}
+    
+    async def _ping(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {}
+    
+    def _served_tool(self, tool_name: Any):
+        """
+        İstemcilere sunulan aracı döndür (yoksa None).
+        
+        Sunucu makinesinde arayüz açan araçlar (host_ui) yalnızca
+        expose_host_ui_tools açıkken sunulur.
+        """
+        tool = self.server.tools.get(tool_name) if isinstance(tool_name, str) else None
+        if tool is None or (getattr(tool, "host_ui", False) and not self.expose_host_ui_tools):
+            return None
+        return tool
+    
+    async def _list_tools(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "tools": [
+                {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "inputSchema": self.server.schemas.get(tool.name) or {"type": "object"}
+                }
+                for tool in list(self.server.tools.values())
+                if self._served_tool(tool.name) is not None
+            ]
+        }
+    
+    async def _call_tool(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        tool_name = params.get("name")
+        arguments = params.get("arguments") or {}
+        if self._served_tool(tool_name) is None:
+            raise MCPError(INVALID_PARAMS, f"Unknown tool: {tool_name}")
+        if not isinstance(arguments, dict):
+            raise MCPError(INVALID_PARAMS, "arguments must be an object")
+        
+        # İsteğe bağlı: çağrıyı bir sohbet oturumu/mesajıyla ilişkilendir
+        meta = params.get("_meta") or {}
+        result = await self.server.aexecute_tool(
+            tool_name, arguments,
+            session_id=meta.get("sessionId"),
+            message_id=meta.get("messageId")
+        )
+        
+        text = json.dumps(result, ensure_ascii=False, default=str)
+        response = {
+            "content": [{"type": "text", "text": text}],
+            "isError": isinstance(result, dict) and "error" in result
+        }
+        if isinstance(result, dict):
+            response["structuredContent"] = json.loads(text)
+        return response
+
+async def serve_stdio(handler: MCPProtocolHandler, stdin: BinaryIO, stdout: BinaryIO,
+                      max_concurrency: int = MCP_STDIO_MAX_CONCURRENCY) -> None:
+    """
+    Satır başına bir JSON-RPC mesajı okuyan stdio taşımasını çalıştır.
+    
+    İstekler eşzamanlı işlenir (yanıtlar tamamlanma sırasıyla yazılır);
+    max_concurrency dolduğunda yeni satır okunmaz. Standart giriş
+    kapandığında süren istekler bitirilip dönülür.
+    
+    Args:
+        handler: İstekleri işleyen MCPProtocolHandler
+        stdin: İkili standart giriş
+        stdout: İkili standart çıkış (sadece protokol mesajları yazılmalı)
+        max_concurrency: Aynı anda işlenen en fazla istek
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    write_lock = asyncio.Lock()
+    tasks = set()
+    
+    async def process(line: bytes) -> None:
+        try:
+            response = await handler.handle_raw(line)
+            if response is not None:
+                payload = (json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8")
+                async with write_lock:
+                    stdout.write(payload)
+                    stdout.flush()
+        finally:
+            semaphore.release()
+    
+    while True:
+        line = await asyncio.to_thread(stdin.readline)
+        if not line:
+            break
+        if not line.strip():
+            continue
+        
+        await semaphore.acquire()
+        task = asyncio.create_task(process(line))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    
+    if tasks:
+        await asyncio.gather(*tasks)
+
+def _origin_allowed(origin: Optional[str]) -> bool:
+    """
+    DNS rebinding saldırılarına karşı tarayıcı Origin başlığını doğrula.
+    """
+    if not origin:
+        return True
+    return urlparse(origin).hostname in ("localhost", "127.0.0.1", "::1") or origin in MCP_ALLOWED_ORIGINS
+
+def create_http_app(handler: MCPProtocolHandler):
+    """
+    MCP HTTP taşımalarını sunan ASGI uygulamasını oluştur.
+    
+    - POST /mcp: Streamable HTTP (istek başına JSON yanıt)
+    - GET /sse + POST /messages: Eski HTTP+SSE taşıması (2024-11-05)
+    
+    Args:
+        handler: İstekleri işleyen MCPProtocolHandler
+    
+    Returns:
+        Starlette: uvicorn ile çalıştırılabilecek uygulama
+    """
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response, StreamingResponse
+    from starlette.routing import Route
+    
+    # SSE oturum kimliği -> yanıt kuyruğu (oturumlar bu süreçte yaşar)
+    sse_sessions: Dict[str, asyncio.Queue] = {}
+    pending = set()
+    
+    def forbidden(request) -> Optional[Response]:
+        if not _origin_allowed(request.headers.get("origin")):
+            return Response("Forbidden origin", status_code=403)
+        return None
+    
+    async def post_mcp(request):
+        rejected = forbidden(request)
+        if rejected:
+            return rejected
+        
+        response = await handler.handle_raw(await request.body())
+        if response is None:
+            return Response(status_code=202)
+        return JSONResponse(response)
+    
+    async def get_mcp(request):
+        # Sunucu istemciye kendiliğinden mesaj göndermez
+        return Response(status_code=405, headers={"Allow": "POST"})
+    
+    async def get_sse(request):
+        rejected = forbidden(request)
+        if rejected:
+            return rejected
+        
+        session_id = uuid.uuid4().hex
+        messages: asyncio.Queue = asyncio.Queue()
+        sse_sessions[session_id] = messages
+        
+        async def stream():
+            try:
+                yield f"event: endpoint\ndata: /messages?session_id={session_id}\n\n"
+                while True:
+                    try:
+                        message = await asyncio.wait_for(messages.get(), timeout=15)
+                    except asyncio.TimeoutError:
+                        yield ": keepalive\n\n"
+                        continue
+                    yield f"event: message\ndata: {json.dumps(message, ensure_ascii=False)}\n\n"
+            finally:
+                sse_sessions.pop(session_id, None)
+        
+        return StreamingResponse(stream(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache"})
+    
+    async def post_messages(request):
+        rejected = forbidden(request)
+        if rejected:
+            return rejected
+        
+        messages = sse_sessions.get(request.query_params.get("session_id", ""))
+        if messages is None:
+            return Response("Unknown session", status_code=404)
+        
+        body = await request.body()
+        
+        async def respond():
+            response = await handler.handle_raw(body)
+            if response is not None:
+                await messages.put(response)
+        
+        task = asyncio.create_task(respond())
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        return Response(status_code=202)
+    
+    return Starlette(routes=[
+        Route("/mcp", post_mcp, methods=["POST"]),
+        Route("/mcp", get_mcp, methods=["GET"]),
+        Route("/sse", get_sse, methods=["GET"]),
+        Route("/messages", post_messages, methods=["POST"]),
+    ])
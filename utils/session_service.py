@@ -1,29 +1,114 @@
 """
 Session service utilities for handling session data operations.
 """
+import gzip
 import json
-import sqlite3
+import re
 import uuid
 import time
 from datetime import datetime
 from typing import Dict, Any, Optional, List, Tuple
 
-from utils.config import DB_PATH, MAX_HISTORY_MESSAGES, DEFAULT_SESSION_TIMEOUT
+from utils.config import (
+    MAX_HISTORY_MESSAGES,
+    DEFAULT_SESSION_TIMEOUT,
+    SESSION_PAGE_SIZE,
+    MESSAGE_ARCHIVE_CODEC,
+    SEARCH_RESULTS_LIMIT
+)
+
+from utils.content_codec import ContentCodec
+from utils.storage import get_storage_backend
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 class SessionService:
     """Service class for handling session data operations."""
     
+    # list_sessions ile istenebilecek sütunlar
+    SESSION_COLUMNS = (
+        "session_id", "user_id", "session_name", "use_agentic", "system_prompt",
+        "wiki_info", "conversation_context", "session_metadata", "message_count",
+        "tool_usage_count", "last_activity_at", "session_duration_seconds",
+        "session_status", "created_at", "updated_at"
+    )
+    
+    # Listeleme için varsayılan sütunlar (kenar çubuğu için yeterli)
+    DEFAULT_LIST_COLUMNS = ("session_id", "session_name", "last_activity_at")
+    
+    # get_messages ile döndürülen mesaj sütunları (araç çağrıları get_tool_calls ile okunur)
+    MESSAGE_COLUMNS = (
+        "message_id", "session_id", "parent_message_id", "message_role", "message_content",
+        "message_metadata", "processing_time_ms", "token_count", "model_used", "temperature",
+        "message_index", "is_hidden", "created_at", "updated_at"
+    )
+    
+    # sessions.session_status için geçerli değerler
+    SESSION_STATUSES = ("active", "paused", "completed", "expired")
+    
     @staticmethod
     def get_db_connection():
         """
-        SQLite veritabanı bağlantısı oluştur.
+        Yapılandırılmış arka uçtan (SQLite veya PostgreSQL) veritabanı bağlantısı al.
+        
+        Returns:
+            sqlite3.Connection veya uyumlu bağlantı: Veritabanı bağlantısı
+        """
+        return get_storage_backend().connect()
+    
+    @staticmethod
+    def get_read_connection(max_staleness: float = None):
+        """
+        Salt okunur sorgular için bağlantı al (PostgreSQL'de okuma kopyası olabilir).
+        
+        Args:
+            max_staleness: Kabul edilebilir en fazla gecikme (saniye); None ise
+                DB_READ_MAX_STALENESS, 0 ise birincil veritabanı (kendi yazdığını okuma)
         
         Returns:
-            sqlite3.Connection: Veritabanı bağlantısı
+            sqlite3.Connection veya uyumlu bağlantı: Veritabanı bağlantısı
+        """
+        return get_storage_backend().connect_read(max_staleness)
+    
+    @staticmethod
+    def _encode_content(text: Optional[str]):
+        """
+        Metni saklanacak biçime çevir (arka uç destekliyorsa büyük metinler sıkıştırılır).
+        
+        PostgreSQL büyük değerleri TOAST ile kendisi sıkıştırdığı için metin
+        olduğu gibi saklanır.
+        """
+        if not get_storage_backend().supports("content_compression"):
+            return text
+        return ContentCodec.compress(text)
+    
+    @staticmethod
+    def _decode_session(session: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Oturum satırındaki sıkıştırılmış alanları aç.
+        """
+        if "wiki_info" in session:
+            session["wiki_info"] = ContentCodec.decompress(session["wiki_info"])
+        return session
+    
+    @staticmethod
+    def _index_compressed_messages(cursor, rows: List[Tuple[int, str]]) -> None:
+        """
+        Sıkıştırılmış mesajları arama indeksine düz metin olarak ekle.
+        
+        FTS tetikleyicileri yalnızca TEXT olarak saklanan içerikleri indeksler;
+        BLOB olarak saklanan içerikler burada açılmış halleriyle eklenir.
+        
+        Args:
+            cursor: Kullanılacak veritabanı imleci
+            rows: (messages rowid, düz metin) çiftleri
         """
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+        cursor.executemany("""
+            INSERT INTO messages_fts (rowid, message_content) VALUES (?, ?)
+        """, rows)
     
     @staticmethod
     def create_session(system_prompt: str = "", 
@@ -63,7 +148,7 @@ class SessionService:
                     system_prompt, wiki_info, session_status
                 ) VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (session_id, user_id, session_name, 1 if use_agentic else 0, 
-                  system_prompt, wiki_info, 'active'))
+                  system_prompt, SessionService._encode_content(wiki_info), 'active'))
             
             conn.commit()
             conn.close()
@@ -74,18 +159,19 @@ class SessionService:
             raise
     
     @staticmethod
-    def get_session(session_id: str) -> Optional[Dict[str, Any]]:
+    def get_session(session_id: str, max_staleness: float = None) -> Optional[Dict[str, Any]]:
         """
         Bir oturumun bilgilerini getir.
         
         Args:
             session_id: Oturum ID'si
+            max_staleness: Okuma kopyası için izin verilen gecikme (bkz. get_read_connection)
             
         Returns:
             Dict or None: Oturum bilgileri veya bulunamazsa None
         """
         try:
-            conn = SessionService.get_db_connection()
+            conn = SessionService.get_read_connection(max_staleness)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -96,7 +182,7 @@ class SessionService:
             conn.close()
             
             if session:
-                return dict(session)
+                return SessionService._decode_session(dict(session))
             return None
         except Exception as e:
             print(f"Oturum bilgileri alınırken hata: {str(e)}")
@@ -115,7 +201,7 @@ class SessionService:
             List: Oturum bilgilerinin listesi
         """
         try:
-            conn = SessionService.get_db_connection()
+            conn = SessionService.get_read_connection()
             cursor = conn.cursor()
             
             query = "SELECT * FROM sessions"
@@ -129,7 +215,7 @@ class SessionService:
             
             cursor.execute(query, params)
             
-            sessions = [dict(row) for row in cursor.fetchall()]
+            sessions = [SessionService._decode_session(dict(row)) for row in cursor.fetchall()]
             conn.close()
             
             return sessions
@@ -137,10 +223,89 @@ class SessionService:
             print(f"Oturumlar alınırken hata: {str(e)}")
             return []
     
+    @staticmethod
+    def list_sessions(columns: List[str] = None,
+                      user_id: str = None,
+                      status: str = None,
+                      limit: int = SESSION_PAGE_SIZE,
+                      cursor: Tuple[str, str] = None,
+                      max_staleness: float = None) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, str]]]:
+        """
+        Oturumları sayfa sayfa ve yalnızca istenen sütunlarla getir.
+        
+        Sıralama (last_activity_at, session_id) üzerinden azalan yöndedir ve
+        sonraki sayfa OFFSET yerine bu ikili üzerinden (keyset) okunur; böylece
+        her sayfa, sessions üzerindeki bileşik/kısmi indekslerde kaldığı yerden
+        devam eden bir aralık taramasıdır.
+        
+        Args:
+            columns: Döndürülecek sütunlar (belirtilmezse DEFAULT_LIST_COLUMNS)
+            user_id: Sadece bu kullanıcının oturumları
+            status: Sadece bu durumdaki oturumlar ('active', 'completed', ...)
+            limit: Sayfa başına oturum sayısı
+            cursor: Önceki sayfanın döndürdüğü (last_activity_at, session_id) imleci
+            max_staleness: Okuma kopyası için izin verilen gecikme (bkz. get_read_connection)
+            
+        Returns:
+            Tuple: (oturumlar, sonraki_sayfa_imleci); son sayfada imleç None olur
+            
+        Raises:
+            ValueError: Bilinmeyen bir sütun veya durum istenirse
+        """
+        columns = list(columns or SessionService.DEFAULT_LIST_COLUMNS)
+        unknown = [column for column in columns if column not in SessionService.SESSION_COLUMNS]
+        if unknown:
+            raise ValueError(f"Bilinmeyen oturum sütunları: {', '.join(unknown)}")
+        if status is not None and status not in SessionService.SESSION_STATUSES:
+            raise ValueError(f"Bilinmeyen oturum durumu: {status}")
+        
+        # İmleç için sıralama sütunları her zaman okunur, istenmediyse sonradan atılır
+        selected = columns + [key for key in ("last_activity_at", "session_id") if key not in columns]
+        
+        try:
+            conn = SessionService.get_read_connection(max_staleness)
+            db_cursor = conn.cursor()
+            
+            conditions = []
+            params = []
+            
+            if user_id is not None:
+                conditions.append("user_id = ?")
+                params.append(user_id)
+            
+            if status is not None:
+                # Durum parametre yerine sabit olarak yazılır (değer yukarıda
+                # doğrulandı); planlayıcı ancak böyle 'active' kısmi indeksini seçebilir
+                conditions.append(f"session_status = '{status}'")
+            
+            if cursor:
+                conditions.append("(last_activity_at, session_id) < (?, ?)")
+                params.extend(cursor)
+            
+            query = f"SELECT {', '.join(selected)} FROM sessions"
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += " ORDER BY last_activity_at DESC, session_id DESC LIMIT ?"
+            params.append(limit)
+            
+            db_cursor.execute(query, params)
+            rows = [SessionService._decode_session(dict(row)) for row in db_cursor.fetchall()]
+            conn.close()
+            
+            next_cursor = None
+            if len(rows) == limit:
+                next_cursor = (rows[-1]["last_activity_at"], rows[-1]["session_id"])
+            
+            sessions = [{column: row[column] for column in columns} for row in rows]
+            return sessions, next_cursor
+        except Exception as e:
+            print(f"Oturumlar listelenirken hata: {str(e)}")
+            return [], None
+    
     @staticmethod
     def update_session_activity(session_id: str) -> bool:
         """
-        Oturum aktivitesini güncelle.
+        Oturum aktivitesini güncelle. Süresi dolmuş bir oturum yeniden aktif olur.
         
         Args:
             session_id: Oturum ID'si
@@ -155,6 +320,7 @@ class SessionService:
             cursor.execute("""
                 UPDATE sessions 
                 SET last_activity_at = CURRENT_TIMESTAMP,
+                    session_status = CASE WHEN session_status = 'expired' THEN 'active' ELSE session_status END,
                     updated_at = CURRENT_TIMESTAMP
                 WHERE session_id = ?
             """, (session_id,))
@@ -176,7 +342,8 @@ class SessionService:
                    model_used: str = None,
                    temperature: float = None,
                    processing_time_ms: int = None,
-                   token_count: int = None) -> Optional[str]:
+                   token_count: int = None,
+                   message_id: str = None) -> Optional[str]:
         """
         Oturuma yeni bir mesaj ekle.
         
@@ -185,11 +352,14 @@ class SessionService:
             role: Mesaj rolü ('user', 'assistant', 'system')
             content: Mesaj içeriği
             parent_message_id: Üst mesaj ID'si (varsa)
-            tool_calls: Araç çağrıları (varsa)
+            tool_calls: Araç çağrıları (varsa); her biri tool_name, args ve
+                result anahtarlarını içeren sözlükler, message_tool_calls'a yazılır
             model_used: Kullanılan model
             temperature: Sıcaklık değeri
             processing_time_ms: İşlem süresi (ms)
             token_count: Token sayısı
+            message_id: Önceden üretilmiş mesaj ID'si (ör. araç çalıştırmalarını
+                mesaj yazılmadan önce bağlamak için; belirtilmezse oluşturulur)
             
         Returns:
             str or None: Eklenen mesajın ID'si veya hata durumunda None
@@ -213,25 +383,51 @@ class SessionService:
             """, (session_id,))
             message_index = cursor.fetchone()[0]
             
-            # Mesaj ID'si oluştur
-            message_id = str(uuid.uuid4())
+            # Sıcak tabloda mesaj yoksa oturum arşivlenmiş olabilir; sıralama
+            # korunsun diye önce arşivdeki mesajları geri yükle
+            if message_index == 0 and SessionService._restore_archived_messages(cursor, session_id):
+                cursor.execute("""
+                    SELECT COALESCE(MAX(message_index), -1) + 1 as next_index 
+                    FROM messages 
+                    WHERE session_id = ?
+                """, (session_id,))
+                message_index = cursor.fetchone()[0]
             
-            # Araç çağrılarını JSON'a dönüştür
-            tool_calls_json = json.dumps(tool_calls if tool_calls else [])
+            # Mesaj ID'si oluştur
+            message_id = message_id or str(uuid.uuid4())
             
-            # Mesajı ekle
+            # Mesajı ekle (büyük içerikler sıkıştırılmış saklanır)
+            stored_content = SessionService._encode_content(content)
             cursor.execute("""
                 INSERT INTO messages (
                     message_id, session_id, parent_message_id, message_role, 
-                    message_content, tool_calls, processing_time_ms, 
+                    message_content, processing_time_ms, 
                     token_count, model_used, temperature, message_index
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 message_id, session_id, parent_message_id, role, 
-                content, tool_calls_json, processing_time_ms, 
+                stored_content, processing_time_ms, 
                 token_count, model_used, temperature, message_index
             ))
             
+            # Araç çağrılarını mesajla aynı işlemde satır olarak yaz
+            if tool_calls:
+                cursor.executemany("""
+                    INSERT INTO message_tool_calls (
+                        message_id, call_index, session_id, tool_name, call_args, call_result
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """, [
+                    (
+                        message_id, call_index, session_id, call["tool_name"],
+                        json.dumps(call.get("args") or {}, ensure_ascii=False, default=str),
+                        json.dumps(call.get("result"), ensure_ascii=False, default=str)
+                    )
+                    for call_index, call in enumerate(tool_calls)
+                ])
+            
+            if ContentCodec.is_compressed(stored_content):
+                SessionService._index_compressed_messages(cursor, [(cursor.lastrowid, content)])
+            
             # Oturum mesaj sayısını güncelle
             cursor.execute("""
                 UPDATE sessions 
@@ -250,38 +446,48 @@ class SessionService:
             return None
     
     @staticmethod
-    def get_messages(session_id: str, limit: int = MAX_HISTORY_MESSAGES) -> List[Dict[str, Any]]:
+    def get_messages(session_id: str,
+                     limit: int = MAX_HISTORY_MESSAGES,
+                     max_staleness: float = None) -> List[Dict[str, Any]]:
         """
         Bir oturumdaki mesajları getir.
         
         Args:
             session_id: Oturum ID'si
             limit: Maksimum mesaj sayısı
+            max_staleness: Okuma kopyası için izin verilen gecikme (bkz. get_read_connection)
             
         Returns:
             List: Mesajların listesi
         """
         try:
-            conn = SessionService.get_db_connection()
+            conn = SessionService.get_read_connection(max_staleness)
             cursor = conn.cursor()
             
-            cursor.execute("""
-                SELECT * FROM messages 
+            cursor.execute(f"""
+                SELECT {', '.join(SessionService.MESSAGE_COLUMNS)} FROM messages 
                 WHERE session_id = ? AND is_hidden = 0
                 ORDER BY message_index ASC
                 LIMIT ?
             """, (session_id, limit))
             
             messages = [dict(row) for row in cursor.fetchall()]
+            
+            # Sıcak tabloda mesaj yoksa arşivden (varsa) okuyarak döndür
+            if not messages:
+                archived = SessionService._load_archived_messages(cursor, session_id)
+                visible = [message for message in archived if not message.get("is_hidden")]
+                visible.sort(key=lambda message: message["message_index"])
+                messages = [
+                    {column: message.get(column) for column in SessionService.MESSAGE_COLUMNS}
+                    for message in visible[:limit]
+                ]
+            
             conn.close()
             
-            # JSON alanlarını parse et
+            # Sıkıştırılmış içerikleri aç ve JSON alanlarını parse et
             for message in messages:
-                if 'tool_calls' in message and message['tool_calls']:
-                    try:
-                        message['tool_calls'] = json.loads(message['tool_calls'])
-                    except:
-                        message['tool_calls'] = []
+                message['message_content'] = ContentCodec.decompress(message['message_content'])
                 
                 if 'message_metadata' in message and message['message_metadata']:
                     try:
@@ -295,18 +501,21 @@ class SessionService:
             return []
     
     @staticmethod
-    def format_chat_history(session_id: str, limit: int = MAX_HISTORY_MESSAGES) -> str:
+    def format_chat_history(session_id: str,
+                            limit: int = MAX_HISTORY_MESSAGES,
+                            max_staleness: float = None) -> str:
         """
         Sohbet geçmişini formatlı metin olarak getir.
         
         Args:
             session_id: Oturum ID'si
             limit: Maksimum mesaj sayısı
+            max_staleness: Okuma kopyası için izin verilen gecikme (bkz. get_read_connection)
             
         Returns:
             str: Formatlı sohbet geçmişi
         """
-        messages = SessionService.get_messages(session_id, limit)
+        messages = SessionService.get_messages(session_id, limit, max_staleness)
         history_text = ""
         
         for message in messages:
@@ -323,6 +532,232 @@ class SessionService:
         
         return history_text
     
+    @staticmethod
+    def get_tool_calls(message_id: str, max_staleness: float = None) -> List[Dict[str, Any]]:
+        """
+        Bir mesajda yapılan araç çağrılarını getir.
+        
+        Argüman ve sonuçlar yalnızca burada parse edilir; geçmiş okuma yolu
+        (get_messages) araç çağrılarını okumaz. Aynı message_id, araçların
+        süre/durum kayıtlarını tutan tool_executions satırlarında da bulunur.
+        
+        Args:
+            message_id: Mesaj ID'si
+            max_staleness: Okuma kopyası için izin verilen gecikme (bkz. get_read_connection)
+            
+        Returns:
+            List: call_index sırasıyla tool_name, args, result ve created_at alanlarını içeren çağrılar
+        """
+        try:
+            conn = SessionService.get_read_connection(max_staleness)
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT call_index, tool_name, call_args, call_result, created_at
+                FROM message_tool_calls
+                WHERE message_id = ?
+                ORDER BY call_index
+            """, (message_id,))
+            rows = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+        except Exception as e:
+            print(f"Araç çağrıları alınırken hata: {str(e)}")
+            return []
+        
+        calls = []
+        for row in rows:
+            try:
+                args = json.loads(row["call_args"]) if row["call_args"] else {}
+            except ValueError:
+                args = {}
+            try:
+                result = json.loads(row["call_result"]) if row["call_result"] else None
+            except ValueError:
+                result = row["call_result"]
+            calls.append({
+                "call_index": row["call_index"],
+                "tool_name": row["tool_name"],
+                "args": args,
+                "result": result,
+                "created_at": row["created_at"]
+            })
+        return calls
+    
+    @staticmethod
+    def _build_search_query(query: str) -> str:
+        """
+        Kullanıcı arama metnini güvenli bir FTS5 sorgusuna dönüştür.
+        
+        Her kelime tırnak içine alınır (FTS5 operatörleri ve özel karakterler
+        sözdizimi hatasına yol açmasın diye) ve kelimeler VE ile birleştirilir.
+        Son kelime önek olarak aranır.
+        
+        Args:
+            query: Kullanıcının girdiği arama metni
+            
+        Returns:
+            str: FTS5 MATCH ifadesi (arama yapılacak kelime yoksa boş)
+        """
+        terms = [term.replace('"', '""') for term in query.split()]
+        terms = [term for term in terms if term.strip('"')]
+        if not terms:
+            return ""
+        
+        phrases = [f'"{term}"' for term in terms]
+        phrases[-1] += "*"
+        return " ".join(phrases)
+    
+    @staticmethod
+    def search_messages(query: str,
+                        session_id: str = None,
+                        limit: int = SEARCH_RESULTS_LIMIT,
+                        offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Mesaj içeriklerinde tam metin arama yap (BM25 sıralı, vurgulu özetlerle).
+        
+        Arama SQLite'ta messages_fts FTS5 indeksi, PostgreSQL'de tsvector
+        ifade indeksi üzerinde çalışır; arşivlenmiş oturumların mesajları
+        sıcak tabloda olmadıkları için sonuçlarda yer almaz.
+        
+        Args:
+            query: Arama metni
+            session_id: Sadece bu oturumda ara (belirtilmezse tüm oturumlar)
+            limit: Döndürülecek en fazla sonuç
+            offset: Atlanacak sonuç sayısı (sayfalama için)
+            
+        Returns:
+            List: message_id, session_id, session_name, message_role, created_at,
+                snippet ve score (düşük = daha alakalı) alanlarını içeren sonuçlar
+        """
+        match = SessionService._build_search_query(query or "")
+        if not match:
+            return []
+        
+        if not get_storage_backend().supports("fts5"):
+            return SessionService._search_messages_postgres(query, session_id, limit, offset)
+        
+        try:
+            conn = SessionService.get_read_connection()
+            cursor = conn.cursor()
+            
+            # Gizli mesaj ve oturum filtreleri sayfalamadan önce uygulanır; aksi
+            # halde ilk N eşleşmedeki gizli mesajlar sayfayı kısaltır ve sonraki
+            # sayfaların başlangıcı kayar
+            conditions = ["messages_fts MATCH ?", "m.is_hidden = 0"]
+            params = [match]
+            if session_id:
+                conditions.append("m.session_id = ?")
+                params.append(session_id)
+            params.extend([limit, offset])
+            
+            cursor.execute(f"""
+                SELECT m.message_id, m.session_id, s.session_name, m.message_role, m.created_at,
+                       snippet(messages_fts, 0, '**', '**', '…', 16) AS snippet,
+                       bm25(messages_fts) AS score
+                FROM messages_fts
+                JOIN messages m ON m.rowid = messages_fts.rowid
+                LEFT JOIN sessions s ON s.session_id = m.session_id
+                WHERE {' AND '.join(conditions)}
+                ORDER BY score
+                LIMIT ? OFFSET ?
+            """, params)
+            
+            results = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            
+            return results
+        except Exception as e:
+            print(f"Mesajlarda arama yapılırken hata: {str(e)}")
+            return []
+    
+    @staticmethod
+    def _search_messages_postgres(query: str,
+                                  session_id: str,
+                                  limit: int,
+                                  offset: int) -> List[Dict[str, Any]]:
+        """
+        PostgreSQL'de tsvector ifade indeksi (idx_messages_fts) üzerinden arama yap.
+        
+        search_messages ile aynı sonuç alanlarını döndürür; son kelime önek olarak aranır.
+        """
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return []
+        
+        ts_query = " & ".join(f"'{term}'" for term in terms) + ":*"
+        
+        try:
+            conn = SessionService.get_read_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT m.message_id, m.session_id, s.session_name, m.message_role, m.created_at,
+                       ts_headline('simple', m.message_content, q,
+                                   'StartSel=**, StopSel=**, MaxFragments=1, MaxWords=16, MinWords=4') AS snippet,
+                       -ts_rank(to_tsvector('simple', m.message_content), q) AS score
+                FROM messages m
+                CROSS JOIN to_tsquery('simple', ?) AS q
+                LEFT JOIN sessions s ON s.session_id = m.session_id
+                WHERE to_tsvector('simple', m.message_content) @@ q
+                  AND m.is_hidden = 0
+                  AND (? IS NULL OR m.session_id = ?)
+                ORDER BY score
+                LIMIT ? OFFSET ?
+            """, (ts_query, session_id, session_id, limit, offset))
+            
+            results = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            
+            return results
+        except Exception as e:
+            print(f"Mesajlarda arama yapılırken hata: {str(e)}")
+            return []
+    
+    @staticmethod
+    def rebuild_search_index() -> bool:
+        """
+        Tam metin arama indeksini messages tablosundan yeniden oluştur.
+        
+        FTS satırları messages rowid'lerine bağlıdır; tam bir VACUUM rowid'leri
+        değiştirebileceğinden, böyle bir işlemden sonra çağrılmalıdır.
+        
+        Returns:
+            bool: Başarılı ise True, değilse False
+        """
+        # PostgreSQL'de arama indeksi messages üzerindeki bir ifade indeksidir, ayrıca bakım gerektirmez
+        if not get_storage_backend().supports("fts5"):
+            return True
+        
+        try:
+            conn = SessionService.get_db_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute("DELETE FROM messages_fts")
+            cursor.execute("""
+                INSERT INTO messages_fts (rowid, message_content)
+                SELECT rowid, message_content FROM messages
+                WHERE typeof(message_content) = 'text'
+            """)
+            
+            reader = conn.cursor()
+            reader.execute("""
+                SELECT rowid, message_content FROM messages
+                WHERE typeof(message_content) = 'blob'
+            """)
+            while True:
+                rows = reader.fetchmany(500)
+                if not rows:
+                    break
+                SessionService._index_compressed_messages(
+                    cursor, [(row[0], ContentCodec.decompress(row[1])) for row in rows]
+                )
+            
+            conn.commit()
+            conn.close()
+            
+            return True
+        except Exception as e:
+            print(f"Arama indeksi yeniden oluşturulurken hata: {str(e)}")
+            return False
+    
     @staticmethod
     def clear_session_messages(session_id: str) -> bool:
         """
@@ -338,10 +773,16 @@ class SessionService:
             conn = SessionService.get_db_connection()
             cursor = conn.cursor()
             
-            # Mesajları sil
+            # Mesajları (ve varsa arşivlerini ve araç çağrılarını) sil
             cursor.execute("""
                 DELETE FROM messages WHERE session_id = ?
             """, (session_id,))
+            cursor.execute("""
+                DELETE FROM message_archive WHERE session_id = ?
+            """, (session_id,))
+            cursor.execute("""
+                DELETE FROM message_tool_calls WHERE session_id = ?
+            """, (session_id,))
             
             # Oturum mesaj sayısını sıfırla
             cursor.execute("""
@@ -390,6 +831,216 @@ class SessionService:
             print(f"Oturum kapatılırken hata: {str(e)}")
             return False
     
+    @staticmethod
+    def _compress_archive(payload: bytes, codec: str) -> bytes:
+        """
+        Arşiv verisini belirtilen codec ile sıkıştır.
+        
+        Args:
+            payload: Sıkıştırılacak JSONL verisi
+            codec: 'gzip' veya 'zstd'
+            
+        Returns:
+            bytes: Sıkıştırılmış veri
+        """
+        if codec == "zstd":
+            return zstandard.ZstdCompressor(level=10).compress(payload)
+        return gzip.compress(payload, compresslevel=6, mtime=0)
+    
+    @staticmethod
+    def _decompress_archive(payload: bytes, codec: str) -> bytes:
+        """
+        Arşiv verisini aç.
+        
+        Args:
+            payload: Sıkıştırılmış veri
+            codec: Verinin sıkıştırıldığı codec
+            
+        Returns:
+            bytes: JSONL verisi
+        """
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstd arşivlerini okumak için zstandard paketi gerekli")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        return gzip.decompress(payload)
+    
+    @staticmethod
+    def _load_archived_messages(cursor, session_id: str) -> List[Dict[str, Any]]:
+        """
+        Bir oturumun arşivlenmiş mesajlarını (varsa) bellekte aç.
+        
+        Args:
+            cursor: Kullanılacak veritabanı imleci
+            session_id: Oturum ID'si
+            
+        Returns:
+            List: Mesaj satırları (arşiv yoksa boş liste)
+        """
+        cursor.execute("""
+            SELECT archive_codec, archive_payload FROM message_archive WHERE session_id = ?
+        """, (session_id,))
+        archive = cursor.fetchone()
+        if not archive:
+            return []
+        
+        payload = SessionService._decompress_archive(archive[1], archive[0])
+        return [json.loads(line) for line in payload.decode("utf-8").splitlines() if line]
+    
+    @staticmethod
+    def _restore_archived_messages(cursor, session_id: str) -> int:
+        """
+        Arşivlenmiş mesajları sıcak tabloya geri taşı (işlemi çağıran commit eder).
+        
+        Args:
+            cursor: Kullanılacak veritabanı imleci
+            session_id: Oturum ID'si
+            
+        Returns:
+            int: Geri yüklenen mesaj sayısı
+        """
+        messages = SessionService._load_archived_messages(cursor, session_id)
+        if messages:
+            for message in messages:
+                message["message_content"] = SessionService._encode_content(message["message_content"])
+            
+            columns = list(messages[0].keys())
+            cursor.executemany(f"""
+                INSERT INTO messages ({', '.join(columns)})
+                VALUES ({', '.join('?' for _ in columns)})
+            """, [tuple(message[column] for column in columns) for message in messages])
+            
+            if any(ContentCodec.is_compressed(message["message_content"]) for message in messages):
+                cursor.execute("""
+                    SELECT rowid, message_content FROM messages
+                    WHERE session_id = ? AND typeof(message_content) = 'blob'
+                """, (session_id,))
+                SessionService._index_compressed_messages(
+                    cursor, [(row[0], ContentCodec.decompress(row[1])) for row in cursor.fetchall()]
+                )
+        
+        cursor.execute("DELETE FROM message_archive WHERE session_id = ?", (session_id,))
+        return len(messages)
+    
+    @staticmethod
+    def archive_session(session_id: str, codec: str = MESSAGE_ARCHIVE_CODEC) -> bool:
+        """
+        Bir oturumun mesajlarını sıkıştırılmış tek bir arşiv kaydına taşı.
+        
+        Mesajlar sıcak messages tablosundan (ve indekslerinden) silinir;
+        get_messages gerektiğinde arşivden okur, add_message ise oturuma yeni
+        mesaj eklenirken arşivi geri yükler.
+        
+        Args:
+            session_id: Oturum ID'si
+            codec: 'gzip' veya 'zstd'
+            
+        Returns:
+            bool: Arşivlenecek mesaj varsa ve işlem başarılıysa True
+        """
+        if codec == "zstd" and zstandard is None:
+            print("zstandard paketi bulunamadı, arşiv gzip ile sıkıştırılacak")
+            codec = "gzip"
+        
+        try:
+            conn = SessionService.get_db_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT * FROM messages WHERE session_id = ? ORDER BY message_index ASC
+            """, (session_id,))
+            messages = [dict(row) for row in cursor.fetchall()]
+            
+            if not messages:
+                conn.close()
+                return False
+            
+            # Arşiv kendi içinde sıkıştırıldığından mesajlar düz metin olarak yazılır
+            for message in messages:
+                message["message_content"] = ContentCodec.decompress(message["message_content"])
+            
+            # Önceki bir arşiv varsa (ör. kısmen geri yüklenmiş), mesajları birleştir
+            messages = SessionService._load_archived_messages(cursor, session_id) + messages
+            
+            payload = "\n".join(
+                json.dumps(message, ensure_ascii=False, default=str) for message in messages
+            ).encode("utf-8")
+            compressed = SessionService._compress_archive(payload, codec)
+            
+            cursor.execute("""
+                INSERT INTO message_archive (
+                    session_id, archive_codec, message_count, archive_payload,
+                    uncompressed_bytes, compressed_bytes
+                ) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    archive_codec = excluded.archive_codec,
+                    message_count = excluded.message_count,
+                    archive_payload = excluded.archive_payload,
+                    uncompressed_bytes = excluded.uncompressed_bytes,
+                    compressed_bytes = excluded.compressed_bytes,
+                    archived_at = CURRENT_TIMESTAMP
+            """, (session_id, codec, len(messages), compressed, len(payload), len(compressed)))
+            
+            cursor.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            
+            conn.commit()
+            conn.close()
+            
+            return True
+        except Exception as e:
+            print(f"Oturum arşivlenirken hata: {str(e)}")
+            return False
+    
+    @staticmethod
+    def get_compression_stats() -> Dict[str, Any]:
+        """
+        Mesaj içerikleri ve wiki_info için sıkıştırma oranını hesapla.
+        
+        SQLite'ta sıkıştırılmış BLOB'ların başlığındaki orijinal boyut ile
+        saklanan boyut, PostgreSQL'de değerlerin metin boyutu ile TOAST
+        sonrası boyutu (pg_column_size) karşılaştırılır.
+        
+        Returns:
+            Dict: compressed_values, original_bytes, stored_bytes ve ratio
+                (original_bytes / stored_bytes; sıkıştırma yoksa 1.0)
+        """
+        stats = {"compressed_values": 0, "original_bytes": 0, "stored_bytes": 0, "ratio": 1.0}
+        
+        try:
+            conn = SessionService.get_read_connection()
+            cursor = conn.cursor()
+            
+            if get_storage_backend().supports("content_compression"):
+                # Başlık (işaret + boyut) dışındaki veri okunmaz
+                cursor.execute("""
+                    SELECT substr(message_content, 1, 5), length(message_content) FROM messages
+                    WHERE typeof(message_content) = 'blob'
+                    UNION ALL
+                    SELECT substr(wiki_info, 1, 5), length(wiki_info) FROM sessions
+                    WHERE typeof(wiki_info) = 'blob'
+                """)
+                for header, stored in cursor.fetchall():
+                    stats["compressed_values"] += 1
+                    stats["original_bytes"] += ContentCodec.original_size(header)
+                    stats["stored_bytes"] += stored
+            else:
+                cursor.execute("""
+                    SELECT COUNT(*), COALESCE(SUM(octet_length(message_content)), 0),
+                           COALESCE(SUM(pg_column_size(message_content)), 0)
+                    FROM messages
+                    WHERE pg_column_size(message_content) < octet_length(message_content)
+                """)
+                row = cursor.fetchone()
+                stats.update(compressed_values=row[0], original_bytes=row[1], stored_bytes=row[2])
+            
+            conn.close()
+        except Exception as e:
+            print(f"Sıkıştırma istatistikleri alınırken hata: {str(e)}")
+        
+        if stats["stored_bytes"]:
+            stats["ratio"] = round(stats["original_bytes"] / stats["stored_bytes"], 2)
+        return stats
+    
     @staticmethod
     def delete_session(session_id: str) -> bool:
         """
@@ -405,10 +1056,16 @@ class SessionService:
             conn = SessionService.get_db_connection()
             cursor = conn.cursor()
             
-            # Önce oturuma ait mesajları sil
+            # Önce oturuma ait mesajları, arşivlerini ve araç çağrılarını sil
             cursor.execute("""
                 DELETE FROM messages WHERE session_id = ?
             """, (session_id,))
+            cursor.execute("""
+                DELETE FROM message_archive WHERE session_id = ?
+            """, (session_id,))
+            cursor.execute("""
+                DELETE FROM message_tool_calls WHERE session_id = ?
+            """, (session_id,))
             
             # Sonra oturumu sil
             cursor.execute("""
@@ -440,7 +1097,8 @@ class SessionService:
         """
         # Oturum ID'si belirtilmişse, varlığını kontrol et
         if session_id:
-            session = SessionService.get_session(session_id)
+            # Oturum az önce oluşturulmuş olabilir; kopya yerine birincilden oku
+            session = SessionService.get_session(session_id, max_staleness=0)
             if session:
                 # Oturum varsa, aktiviteyi güncelle
                 SessionService.update_session_activity(session_id)
@@ -0,0 +1,386 @@
+"""
+Session maintenance utilities for expiring idle sessions and enforcing retention.
+"""
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+
+from utils.config import (
+    DEFAULT_SESSION_TIMEOUT,
+    SESSION_SWEEP_INTERVAL,
+    SESSION_SWEEP_BATCH_SIZE,
+    MESSAGE_RETENTION_DAYS,
+    MESSAGE_RETENTION_ACTION,
+    INCREMENTAL_VACUUM_PAGES,
+    MESSAGE_ARCHIVE_ENABLED,
+    MESSAGE_ARCHIVE_AFTER_DAYS
+)
+from utils.analytics_service import AnalyticsService
+from utils.session_service import SessionService
+from utils.storage import get_storage_backend
+from utils.tool_cache import ToolResultCache
+
+class SessionSweeper:
+    """Periodic background job that keeps the active working set bounded."""
+    
+    _thread: Optional[threading.Thread] = None
+    _stop_event = threading.Event()
+    
+    @staticmethod
+    def _cutoff(seconds: float) -> str:
+        """
+        Şu andan belirtilen süre önceki zamanı CURRENT_TIMESTAMP biçiminde döndür.
+        
+        Args:
+            seconds: Geriye gidilecek süre (saniye)
+        
+        Returns:
+            str: 'YYYY-MM-DD HH:MM:SS' biçiminde UTC zaman damgası
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+        return cutoff.strftime("%Y-%m-%d %H:%M:%S")
+    
+    @staticmethod
+    def expire_idle_sessions(timeout_seconds: int = DEFAULT_SESSION_TIMEOUT,
+                             batch_size: int = SESSION_SWEEP_BATCH_SIZE) -> int:
+        """
+        Belirtilen süreden uzun süredir işlem görmeyen aktif oturumları 'expired' yap.
+        
+        Güncellemeler küçük partiler halinde ayrı işlemlerde yapılır; böylece
+        sohbet yazmaları uzun süre kilit beklemez.
+        
+        Args:
+            timeout_seconds: Hareketsizlik süresi (saniye)
+            batch_size: Tek işlemde güncellenecek en fazla oturum sayısı
+        
+        Returns:
+            int: Süresi dolan oturum sayısı
+        """
+        cutoff = SessionSweeper._cutoff(timeout_seconds)
+        total = 0
+        
+        try:
+            conn = SessionService.get_db_connection()
+            cursor = conn.cursor()
+            
+            while True:
+                cursor.execute("""
+                    UPDATE sessions
+                    SET session_status = 'expired',
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE session_id IN (
+                        SELECT session_id FROM sessions
+                        WHERE session_status = 'active' AND last_activity_at < ?
+                        LIMIT ?
+                    )
+                """, (cutoff, batch_size))
+                conn.commit()
+                
+                total += cursor.rowcount
+                if cursor.rowcount < batch_size:
+                    break
+            
+            conn.close()
+        except Exception as e:
+            print(f"Süresi dolan oturumlar işaretlenirken hata: {str(e)}")
+        
+        return total
+    
+    @staticmethod
+    def apply_retention_policy(retention_days: Optional[int] = MESSAGE_RETENTION_DAYS,
+                               action: str = MESSAGE_RETENTION_ACTION,
+                               batch_size: int = SESSION_SWEEP_BATCH_SIZE) -> int:
+        """
+        Saklama süresi dolan kapanmış/süresi dolmuş oturumların mesajlarını temizle.
+        
+        Args:
+            retention_days: Son aktiviteden sonra mesajların saklanacağı gün sayısı
+                (None veya 0 ise politika uygulanmaz)
+            action: Uygulanacak işlem ('delete')
+            batch_size: Tek işlemde işlenecek en fazla oturum sayısı
+        
+        Returns:
+            int: Etkilenen mesaj sayısı
+        """
+        if not retention_days:
+            return 0
+        
+        if action != "delete":
+            print(f"Bilinmeyen saklama politikası işlemi: {action}")
+            return 0
+        
+        cutoff = SessionSweeper._cutoff(retention_days * 24 * 60 * 60)
+        total = 0
+        
+        try:
+            conn = SessionService.get_db_connection()
+            cursor = conn.cursor()
+            
+            while True:
+                cursor.execute("""
+                    SELECT session_id FROM sessions
+                    WHERE session_status IN ('completed', 'expired')
+                      AND last_activity_at < ?
+                      AND message_count > 0
+                    LIMIT ?
+                """, (cutoff, batch_size))
+                session_ids = [row[0] for row in cursor.fetchall()]
+                
+                if not session_ids:
+                    break
+                
+                placeholders = ", ".join("?" for _ in session_ids)
+                cursor.execute(f"DELETE FROM messages WHERE session_id IN ({placeholders})", session_ids)
+                total += cursor.rowcount
+                
+                # Arşivlenmiş mesajlar da saklama politikasına tabidir
+                cursor.execute(f"""
+                    SELECT COALESCE(SUM(message_count), 0) FROM message_archive
+                    WHERE session_id IN ({placeholders})
+                """, session_ids)
+                total += cursor.fetchone()[0]
+                cursor.execute(f"DELETE FROM message_archive WHERE session_id IN ({placeholders})", session_ids)
+                cursor.execute(f"DELETE FROM message_tool_calls WHERE session_id IN ({placeholders})", session_ids)
+                
+                cursor.execute(f"""
+                    UPDATE sessions
+                    SET message_count = 0,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE session_id IN ({placeholders})
+                """, session_ids)
+                conn.commit()
+                
+                if len(session_ids) < batch_size:
+                    break
+            
+            conn.close()
+        except Exception as e:
+            print(f"Saklama politikası uygulanırken hata: {str(e)}")
+        
+        return total
+    
+    @staticmethod
+    def archive_inactive_sessions(archive_after_days: int = MESSAGE_ARCHIVE_AFTER_DAYS,
+                                  batch_size: int = SESSION_SWEEP_BATCH_SIZE) -> int:
+        """
+        Kapanmış/süresi dolmuş oturumların mesajlarını sıkıştırılmış arşive taşı.
+        
+        Args:
+            archive_after_days: Son aktiviteden sonra arşivlemeden önce beklenecek gün sayısı
+            batch_size: Bir süpürmede arşivlenecek en fazla oturum sayısı
+        
+        Returns:
+            int: Arşivlenen oturum sayısı
+        """
+        cutoff = SessionSweeper._cutoff(archive_after_days * 24 * 60 * 60)
+        
+        try:
+            conn = SessionService.get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT s.session_id FROM sessions s
+                WHERE s.session_status IN ('completed', 'expired')
+                  AND s.last_activity_at < ?
+                  AND EXISTS (SELECT 1 FROM messages m WHERE m.session_id = s.session_id)
+                LIMIT ?
+            """, (cutoff, batch_size))
+            session_ids = [row[0] for row in cursor.fetchall()]
+            conn.close()
+        except Exception as e:
+            print(f"Arşivlenecek oturumlar alınırken hata: {str(e)}")
+            return 0
+        
+        # Her oturum kendi kısa işleminde arşivlenir
+        return sum(1 for session_id in session_ids if SessionService.archive_session(session_id))
+    
+    @staticmethod
+    def incremental_vacuum(pages: int = INCREMENTAL_VACUUM_PAGES) -> int:
+        """
+        Boş sayfaları parça parça dosya sisteme geri ver.
+        
+        Veritabanı auto_vacuum = INCREMENTAL ile oluşturulmamışsa veya arka uç
+        PostgreSQL ise (autovacuum kendi yönetir) işlem yapılmaz.
+        
+        Args:
+            pages: Geri kazanılacak en fazla sayfa sayısı
+        
+        Returns:
+            int: Geri kazanılan sayfa sayısı
+        """
+        if not get_storage_backend().supports("incremental_vacuum"):
+            return 0
+        
+        try:
+            conn = SessionService.get_db_connection()
+            cursor = conn.cursor()
+            
+            # 2 = INCREMENTAL
+            if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.close()
+                return 0
+            
+            before = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            cursor.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            after = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            conn.close()
+            
+            return before - after
+        except Exception as e:
+            print(f"Artımlı vacuum sırasında hata: {str(e)}")
+            return 0
+    
+    @staticmethod
+    def _record_report(report: Dict[str, Any]) -> None:
+        """
+        Süpürme raporunu performance_metrics tablosuna yaz.
+        
+        Args:
+            report: run_sweep tarafından üretilen rapor
+        """
+        metrics = [
+            ("sweep_duration_ms", report["duration_ms"], "ms"),
+            ("analytics_rows", report["analytics_rows"], "rows"),
+            ("sessions_expired", report["sessions_expired"], "rows"),
+            ("retention_messages", report["messages_affected"], "rows"),
+            ("sessions_archived", report["sessions_archived"], "rows"),
+            ("cache_entries_purged", report["cache_entries_purged"], "rows"),
+            ("pages_vacuumed", report["pages_vacuumed"], "pages"),
+            ("content_compression_ratio", report["compression"]["ratio"], "ratio"),
+            ("content_compressed_bytes", report["compression"]["stored_bytes"], "bytes"),
+        ]
+        
+        try:
+            conn = SessionService.get_db_connection()
+            cursor = conn.cursor()
+            metadata = json.dumps({
+                "step_durations_ms": report["step_durations_ms"],
+                "compression": report["compression"]
+            })
+            cursor.executemany("""
+                INSERT INTO performance_metrics (
+                    metric_type, metric_name, metric_value, metric_unit, metric_metadata
+                ) VALUES ('maintenance', ?, ?, ?, ?)
+            """, [(name, value, unit, metadata) for name, value, unit in metrics])
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Süpürme metrikleri kaydedilirken hata: {str(e)}")
+    
+    @staticmethod
+    def run_sweep() -> Dict[str, Any]:
+        """
+        Tüm bakım adımlarını bir kez çalıştır ve sonucu raporla.
+        
+        Returns:
+            Dict: Süreler ve etkilenen satır sayılarını içeren rapor
+        """
+        step_durations = {}
+        sweep_start = time.perf_counter()
+        
+        # Özetleme, mesajlar arşivlenmeden veya silinmeden önce yapılır
+        step_start = time.perf_counter()
+        rolled_up = AnalyticsService.run_rollup()
+        analytics_rows = rolled_up["messages"] + rolled_up["tool_executions"]
+        step_durations["analytics"] = round((time.perf_counter() - step_start) * 1000, 2)
+        
+        step_start = time.perf_counter()
+        sessions_expired = SessionSweeper.expire_idle_sessions()
+        step_durations["expire"] = round((time.perf_counter() - step_start) * 1000, 2)
+        
+        step_start = time.perf_counter()
+        messages_affected = SessionSweeper.apply_retention_policy()
+        step_durations["retention"] = round((time.perf_counter() - step_start) * 1000, 2)
+        
+        sessions_archived = 0
+        if MESSAGE_ARCHIVE_ENABLED:
+            step_start = time.perf_counter()
+            sessions_archived = SessionSweeper.archive_inactive_sessions()
+            step_durations["archive"] = round((time.perf_counter() - step_start) * 1000, 2)
+        
+        # Süresi dolan önbellek satırları, boşalan sayfalar vacuum ile geri kazanılmadan önce silinir
+        step_start = time.perf_counter()
+        cache_entries_purged = ToolResultCache.purge_expired()
+        step_durations["cache"] = round((time.perf_counter() - step_start) * 1000, 2)
+        
+        step_start = time.perf_counter()
+        pages_vacuumed = SessionSweeper.incremental_vacuum()
+        step_durations["vacuum"] = round((time.perf_counter() - step_start) * 1000, 2)
+        
+        step_start = time.perf_counter()
+        compression = SessionService.get_compression_stats()
+        step_durations["compression"] = round((time.perf_counter() - step_start) * 1000, 2)
+        
+        report = {
+            "duration_ms": round((time.perf_counter() - sweep_start) * 1000, 2),
+            "step_durations_ms": step_durations,
+            "analytics_rows": analytics_rows,
+            "sessions_expired": sessions_expired,
+            "messages_affected": messages_affected,
+            "sessions_archived": sessions_archived,
+            "cache_entries_purged": cache_entries_purged,
+            "pages_vacuumed": pages_vacuumed,
+            "compression": compression
+        }
+        
+        print(
+            f"Oturum süpürmesi tamamlandı ({report['duration_ms']} ms): "
+            f"{analytics_rows} satır özetlendi, "
+            f"{sessions_expired} oturumun süresi doldu, {messages_affected} mesaj işlendi, "
+            f"{sessions_archived} oturum arşivlendi, "
+            f"{cache_entries_purged} önbellek kaydı silindi, "
+            f"{pages_vacuumed} sayfa geri kazanıldı, "
+            f"sıkıştırma oranı {compression['ratio']}x"
+        )
+        SessionSweeper._record_report(report)
+        
+        return report
+    
+    @staticmethod
+    def _run_loop(interval_seconds: float) -> None:
+        """
+        Durdurulana kadar belirtilen aralıklarla süpürme yap.
+        
+        Args:
+            interval_seconds: İki süpürme arasındaki süre (saniye)
+        """
+        while not SessionSweeper._stop_event.is_set():
+            try:
+                SessionSweeper.run_sweep()
+            except Exception as e:
+                print(f"Oturum süpürmesi sırasında hata: {str(e)}")
+            SessionSweeper._stop_event.wait(interval_seconds)
+    
+    @staticmethod
+    def start(interval_seconds: float = SESSION_SWEEP_INTERVAL) -> None:
+        """
+        Süpürücüyü arka plan thread'inde başlat (zaten çalışıyorsa bir şey yapmaz).
+        
+        Args:
+            interval_seconds: İki süpürme arasındaki süre (saniye)
+        """
+        if SessionSweeper._thread and SessionSweeper._thread.is_alive():
+            return
+        
+        SessionSweeper._stop_event.clear()
+        SessionSweeper._thread = threading.Thread(
+            target=SessionSweeper._run_loop,
+            args=(interval_seconds,),
+            name="session-sweeper",
+            daemon=True
+        )
+        SessionSweeper._thread.start()
+    
+    @staticmethod
+    def stop(timeout: float = None) -> None:
+        """
+        Arka plan süpürücüsünü durdur.
+        
+        Args:
+            timeout: Thread'in bitmesi için beklenecek en fazla süre (saniye)
+        """
+        SessionSweeper._stop_event.set()
+        if SessionSweeper._thread:
+            SessionSweeper._thread.join(timeout)
+            SessionSweeper._thread = None
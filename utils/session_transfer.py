@@ -0,0 +1,354 @@
+"""
+Session transfer utilities for streaming sessions to and from JSONL files.
+"""
+import gzip
+import io
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Tuple, Callable, Iterator, TextIO
+
+from utils.config import (
+    SESSION_TRANSFER_BATCH_SIZE,
+    SESSION_TRANSFER_PROGRESS_INTERVAL
+)
+from utils.content_codec import ContentCodec
+from utils.session_service import SessionService
+from utils.storage import get_storage_backend
+
+class TransferProgress:
+    """Counts transferred records and periodically reports throughput."""
+    
+    def __init__(self, action: str,
+                 interval: float = SESSION_TRANSFER_PROGRESS_INTERVAL,
+                 callback: Callable[[Dict[str, Any]], None] = None):
+        self.action = action
+        self.interval = interval
+        self.callback = callback or TransferProgress.print_report
+        self.counts = {"sessions": 0, "messages": 0, "tool_calls": 0}
+        self.started_at = time.perf_counter()
+        self._last_report = self.started_at
+    
+    def add(self, kind: str, count: int = 1) -> None:
+        """
+        Aktarılan kayıtları say ve aralık dolduysa rapor ver.
+        
+        Args:
+            kind: 'sessions', 'messages' veya 'tool_calls'
+            count: Eklenecek kayıt sayısı
+        """
+        self.counts[kind] += count
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.callback(self.snapshot())
+    
+    def snapshot(self, done: bool = False) -> Dict[str, Any]:
+        """
+        Anlık sayaçları ve saniyedeki mesaj sayısını döndür.
+        """
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        return {
+            "action": self.action,
+            "done": done,
+            "elapsed_seconds": round(elapsed, 2),
+            "messages_per_second": round(self.counts["messages"] / elapsed, 1),
+            **self.counts
+        }
+    
+    def finish(self) -> Dict[str, Any]:
+        """
+        Son raporu ver ve döndür.
+        """
+        report = self.snapshot(done=True)
+        self.callback(report)
+        return report
+    
+    @staticmethod
+    def print_report(report: Dict[str, Any]) -> None:
+        """Varsayılan raporlayıcı: ilerlemeyi stderr'e yaz (stdout dışa aktarım için kullanılabilir)."""
+        status = "tamamlandı" if report["done"] else "sürüyor"
+        print(
+            f"{report['action']} {status}: {report['sessions']} oturum, "
+            f"{report['messages']} mesaj, {report['tool_calls']} araç çağrısı "
+            f"({report['elapsed_seconds']} sn, {report['messages_per_second']} mesaj/sn)",
+            file=sys.stderr
+        )
+
+class SessionTransfer:
+    """Service class for exporting and importing sessions as streaming JSONL."""
+    
+    FORMAT = "agentic_llm.sessions"
+    FORMAT_VERSION = 1
+    
+    # Kayıt tipi -> (tablo, izin verilen sütunlar); içe aktarmada bilinmeyen
+    # anahtarlar yok sayılır, tablolar bu sırayla yazılır
+    TOOL_CALL_COLUMNS = (
+        "message_id", "call_index", "session_id", "tool_name", "call_args", "call_result", "created_at"
+    )
+    RECORD_TABLES = {
+        "session": ("sessions", SessionService.SESSION_COLUMNS),
+        "message": ("messages", SessionService.MESSAGE_COLUMNS),
+        "tool_call": ("message_tool_calls", TOOL_CALL_COLUMNS),
+    }
+    PROGRESS_KEYS = {"session": "sessions", "message": "messages", "tool_call": "tool_calls"}
+    
+    @staticmethod
+    def _open(path: str, mode: str) -> TextIO:
+        """
+        JSONL dosyasını aç ('-' standart giriş/çıkış, '.gz' uzantısı gzip akışı).
+        """
+        if path == "-":
+            stream = sys.stdout if mode == "w" else sys.stdin
+            return io.TextIOWrapper(stream.buffer, encoding="utf-8", newline="\n", write_through=True)
+        if path.endswith(".gz"):
+            return gzip.open(path, mode + "t", encoding="utf-8", newline="\n")
+        return open(path, mode, encoding="utf-8", newline="\n")
+    
+    @staticmethod
+    def _write(out: TextIO, record_type: str, data: Dict[str, Any]) -> None:
+        """Bir kaydı tek JSON satırı olarak yaz."""
+        out.write(json.dumps({"type": record_type, "data": data}, ensure_ascii=False, default=str))
+        out.write("\n")
+    
+    @staticmethod
+    def _iter_session_messages(cursor, session_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Bir oturumun mesajlarını (arşivdekiler dahil) message_index sırasıyla akıt.
+        """
+        columns = SessionService.MESSAGE_COLUMNS
+        
+        # Arşiv tek kayıt olarak saklandığından oturum başına bellekte açılır
+        archived = SessionService._load_archived_messages(cursor, session_id)
+        archived.sort(key=lambda message: message["message_index"])
+        for message in archived:
+            yield {column: message.get(column) for column in columns}
+        
+        cursor.execute(f"""
+            SELECT {', '.join(columns)} FROM messages
+            WHERE session_id = ?
+            ORDER BY message_index ASC
+        """, (session_id,))
+        while True:
+            rows = cursor.fetchmany(SESSION_TRANSFER_BATCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                message = dict(row)
+                message["message_content"] = ContentCodec.decompress(message["message_content"])
+                yield message
+    
+    @staticmethod
+    def export_sessions(path: str,
+                        session_ids: List[str] = None,
+                        status: str = None,
+                        progress: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """
+        Oturumları, mesajlarını ve araç çağrılarını JSONL olarak dışa aktar.
+        
+        Oturumlar session_id sırasıyla sayfa sayfa okunur ve her oturumdan
+        hemen sonra mesajları ve araç çağrıları yazılır; bellek kullanımı
+        toplam veri boyutundan bağımsızdır. Sıkıştırılmış içerikler ve
+        arşivlenmiş mesajlar düz metin olarak yazılır.
+        
+        Args:
+            path: Hedef dosya ('-' standart çıkış, '.gz' ile biterse gzip)
+            session_ids: Sadece bu oturumlar (belirtilmezse tümü)
+            status: Sadece bu durumdaki oturumlar
+            progress: İlerleme raporlarını alacak fonksiyon (varsayılan stderr'e yazar)
+        
+        Returns:
+            Dict: Aktarılan kayıt sayıları ve süre
+        """
+        reporter = TransferProgress("Dışa aktarma", callback=progress)
+        session_columns = SessionService.SESSION_COLUMNS
+        
+        conn = SessionService.get_read_connection()
+        out = SessionTransfer._open(path, "w")
+        try:
+            sessions_cursor = conn.cursor()
+            cursor = conn.cursor()
+            
+            SessionTransfer._write(out, "header", {
+                "format": SessionTransfer.FORMAT,
+                "version": SessionTransfer.FORMAT_VERSION,
+                "dialect": get_storage_backend().dialect,
+                "exported_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            })
+            
+            last_session_id = ""
+            while True:
+                conditions = ["session_id > ?"]
+                params: List[Any] = [last_session_id]
+                if session_ids:
+                    conditions.append(f"session_id IN ({', '.join('?' for _ in session_ids)})")
+                    params.extend(session_ids)
+                if status:
+                    conditions.append("session_status = ?")
+                    params.append(status)
+                
+                sessions_cursor.execute(f"""
+                    SELECT {', '.join(session_columns)} FROM sessions
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY session_id
+                    LIMIT ?
+                """, params + [SESSION_TRANSFER_BATCH_SIZE])
+                sessions = [SessionService._decode_session(dict(row)) for row in sessions_cursor.fetchall()]
+                if not sessions:
+                    break
+                last_session_id = sessions[-1]["session_id"]
+                
+                for session in sessions:
+                    SessionTransfer._write(out, "session", session)
+                    reporter.add("sessions")
+                    
+                    for message in SessionTransfer._iter_session_messages(cursor, session["session_id"]):
+                        SessionTransfer._write(out, "message", message)
+                        reporter.add("messages")
+                    
+                    cursor.execute(f"""
+                        SELECT {', '.join(SessionTransfer.TOOL_CALL_COLUMNS)} FROM message_tool_calls
+                        WHERE session_id = ?
+                        ORDER BY message_id, call_index
+                    """, (session["session_id"],))
+                    for row in cursor.fetchall():
+                        SessionTransfer._write(out, "tool_call", dict(row))
+                        reporter.add("tool_calls")
+        finally:
+            out.flush()
+            if path != "-":
+                out.close()
+            conn.close()
+        
+        return reporter.finish()
+    
+    @staticmethod
+    def _flush(cursor, buffers: Dict[Tuple[str, Tuple[str, ...]], List[tuple]]) -> None:
+        """
+        Tamponlanan satırları tablo sırasıyla (oturum, mesaj, araç çağrısı) yaz.
+        
+        Aynı ID'ye sahip mevcut satırlar korunur (ON CONFLICT DO NOTHING).
+        """
+        sqlite_fts = get_storage_backend().supports("fts5")
+        
+        for record_type in SessionTransfer.RECORD_TABLES:
+            table = SessionTransfer.RECORD_TABLES[record_type][0]
+            for (buffered_type, columns), rows in buffers.items():
+                if buffered_type != record_type or not rows:
+                    continue
+                
+                cursor.executemany(f"""
+                    INSERT INTO {table} ({', '.join(columns)})
+                    VALUES ({', '.join('?' for _ in columns)})
+                    ON CONFLICT DO NOTHING
+                """, rows)
+                
+                # Sıkıştırılmış mesajları FTS tetikleyicisi indekslemez
+                if record_type == "message" and sqlite_fts:
+                    SessionTransfer._index_compressed(cursor, columns, rows)
+        
+        buffers.clear()
+    
+    @staticmethod
+    def _index_compressed(cursor, columns: Tuple[str, ...], rows: List[tuple]) -> None:
+        """
+        Yazılan partideki sıkıştırılmış mesajları (henüz indekste yoksa) arama indeksine ekle.
+        """
+        id_position = columns.index("message_id")
+        content_position = columns.index("message_content")
+        compressed = {
+            row[id_position]: row[content_position]
+            for row in rows if ContentCodec.is_compressed(row[content_position])
+        }
+        if not compressed:
+            return
+        
+        cursor.execute(f"""
+            SELECT rowid, message_id FROM messages
+            WHERE message_id IN ({', '.join('?' for _ in compressed)})
+        """, list(compressed))
+        for rowid, message_id in cursor.fetchall():
+            cursor.execute("""
+                INSERT INTO messages_fts (rowid, message_content)
+                SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM messages_fts WHERE rowid = ?)
+            """, (rowid, ContentCodec.decompress(compressed[message_id]), rowid))
+    
+    @staticmethod
+    def import_sessions(path: str,
+                        batch_size: int = SESSION_TRANSFER_BATCH_SIZE,
+                        progress: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """
+        export_sessions ile üretilmiş JSONL dosyasını içe aktar.
+        
+        Dosya satır satır okunur; kayıtlar batch_size satırlık partiler
+        halinde executemany ile ve her parti kendi işleminde yazılır. ID'ler,
+        message_index değerleri ve dosyadaki sıra korunur; veritabanında zaten
+        bulunan oturum/mesaj ID'leri atlanır. Arşivlenmiş mesajlar sıcak tabloya
+        yazılır (süpürücü gerekirse yeniden arşivler).
+        
+        Args:
+            path: Kaynak dosya ('-' standart giriş, '.gz' ile biterse gzip)
+            batch_size: Tek işlemde yazılacak en fazla satır
+            progress: İlerleme raporlarını alacak fonksiyon (varsayılan stderr'e yazar)
+        
+        Returns:
+            Dict: Okunan kayıt sayıları ve süre
+        
+        Raises:
+            ValueError: Dosya bu uygulamanın dışa aktarım biçiminde değilse
+        """
+        reporter = TransferProgress("İçe aktarma", callback=progress)
+        buffers: Dict[Tuple[str, Tuple[str, ...]], List[tuple]] = {}
+        pending = 0
+        
+        conn = SessionService.get_db_connection()
+        source = SessionTransfer._open(path, "r")
+        try:
+            cursor = conn.cursor()
+            
+            for line_number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                
+                record = json.loads(line)
+                record_type = record.get("type")
+                
+                if record_type == "header":
+                    header = record.get("data", {})
+                    if header.get("format") != SessionTransfer.FORMAT or header.get("version", 0) > SessionTransfer.FORMAT_VERSION:
+                        raise ValueError(f"Desteklenmeyen dışa aktarım biçimi: {header}")
+                    continue
+                
+                if record_type not in SessionTransfer.RECORD_TABLES:
+                    raise ValueError(f"{line_number}. satırda bilinmeyen kayıt tipi: {record_type}")
+                
+                allowed = SessionTransfer.RECORD_TABLES[record_type][1]
+                data = {key: value for key, value in record["data"].items() if key in allowed}
+                if record_type == "session" and "wiki_info" in data:
+                    data["wiki_info"] = SessionService._encode_content(data["wiki_info"])
+                elif record_type == "message":
+                    data["message_content"] = SessionService._encode_content(data["message_content"])
+                
+                columns = tuple(data)
+                buffers.setdefault((record_type, columns), []).append(tuple(data.values()))
+                pending += 1
+                
+                if pending >= batch_size:
+                    SessionTransfer._flush(cursor, buffers)
+                    conn.commit()
+                    pending = 0
+                
+                reporter.add(SessionTransfer.PROGRESS_KEYS[record_type])
+            
+            SessionTransfer._flush(cursor, buffers)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if path != "-":
+                source.close()
+            conn.close()
+        
+        return reporter.finish()
@@ -0,0 +1,425 @@
+"""
+Storage backend utilities for running the application on SQLite or PostgreSQL.
+"""
+import itertools
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from utils.config import (
+    DB_PATH,
+    DB_BACKEND,
+    DATABASE_URL,
+    DB_POOL_MIN_CONNECTIONS,
+    DB_POOL_MAX_CONNECTIONS,
+    SQLITE_WAL_ENABLED,
+    DATABASE_READ_URLS,
+    DB_READ_MAX_STALENESS,
+    DB_REPLICA_LAG_CHECK_INTERVAL
+)
+
+try:
+    import psycopg2
+    import psycopg2.extras
+    import psycopg2.pool
+except ImportError:
+    psycopg2 = None
+
+class StorageBackend:
+    """Base class for database backends used by the services."""
+    
+    # 'sqlite' veya 'postgresql'
+    dialect: str = ""
+    
+    # Arka ucun desteklediği isteğe bağlı özellikler (ör. 'fts5', 'incremental_vacuum')
+    features: frozenset = frozenset()
+    
+    def connect(self):
+        """
+        sqlite3 arayüzüyle uyumlu bir bağlantı döndür.
+        
+        Bağlantı ? yer tutucularını, isim veya sıra ile erişilebilen satırları
+        ve commit/rollback/close çağrılarını destekler.
+        """
+        raise NotImplementedError("Subclasses must implement connect method")
+    
+    def connect_read(self, max_staleness: Optional[float] = None):
+        """
+        Salt okunur sorgular için bir bağlantı döndür.
+        
+        Varsayılan uygulama birincil bağlantıyı kullanır; alt sınıflar
+        okumaları yazmalarla aynı kuyruğa girmeyen bağlantılara yönlendirir.
+        
+        Args:
+            max_staleness: Kabul edilebilir en fazla veri gecikmesi (saniye);
+                None ise DB_READ_MAX_STALENESS, 0 ise birincil veritabanı
+        """
+        return self.connect()
+    
+    def supports(self, feature: str) -> bool:
+        """
+        Arka ucun isteğe bağlı bir özelliği destekleyip desteklemediğini döndür.
+        """
+        return feature in self.features
+    
+    def bucket_expression(self, period_type: str, column: str) -> str:
+        """
+        Zaman damgasını saatlik/günlük kova metnine çeviren SQL ifadesini döndür.
+        
+        Args:
+            period_type: 'hourly' ('YYYY-MM-DD HH:00:00') veya 'daily' ('YYYY-MM-DD')
+            column: Zaman damgası sütunu
+        """
+        raise NotImplementedError("Subclasses must implement bucket_expression method")
+    
+    def settled_row_condition(self) -> Optional[str]:
+        """
+        Satırın rowid sırasına göre kesinleştiğini (settled) belirten SQL koşulunu döndür.
+        
+        Kesinleşmiş bir satırdan daha küçük rowid'li, henüz commit edilmemiş
+        bir satır artık ortaya çıkamaz; rowid watermark'ı yalnızca bu
+        satırların üzerinden ilerletilebilir. None ise tüm görünür satırlar
+        kesinleşmiştir (yazmalar rowid sırasıyla commit edilir).
+        """
+        return None
+    
+    def describe(self) -> str:
+        """Kayıtlarda gösterilecek kısa açıklama."""
+        return self.dialect
+
+class SQLiteBackend(StorageBackend):
+    """Single-file SQLite backend (default)."""
+    
+    dialect = "sqlite"
+    features = frozenset({"fts5", "incremental_vacuum", "content_compression"})
+    
+    BUCKET_FORMATS = {
+        "hourly": "%Y-%m-%d %H:00:00",
+        "daily": "%Y-%m-%d"
+    }
+    
+    def __init__(self, db_path: Path = DB_PATH, wal: bool = SQLITE_WAL_ENABLED):
+        self.db_path = db_path
+        self.wal = wal
+        self._wal_checked = False
+    
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        
+        # WAL kipi dosyada kalıcıdır; süreç başına bir kez ayarlamak yeterli
+        if self.wal and not self._wal_checked:
+            conn.execute("PRAGMA journal_mode = WAL")
+            self._wal_checked = True
+        return conn
+    
+    def connect_read(self, max_staleness: Optional[float] = None):
+        """
+        Dosyayı salt okunur açan ayrı bir bağlantı döndür.
+        
+        WAL kipinde okuyucular her işlemde tutarlı bir anlık görüntü (snapshot)
+        okur ve yazıcıyı beklemez; okumalar her zaman günceldir, bu yüzden
+        max_staleness yok sayılır. Dosya henüz yoksa birincil bağlantı döner.
+        """
+        if not self.wal or not Path(self.db_path).exists():
+            return self.connect()
+        
+        conn = sqlite3.connect(f"{Path(self.db_path).resolve().as_uri()}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+    
+    def bucket_expression(self, period_type: str, column: str) -> str:
+        return f"strftime('{self.BUCKET_FORMATS[period_type]}', {column})"
+    
+    def describe(self) -> str:
+        return f"sqlite ({self.db_path})"
+
+def translate_placeholders(sql: str) -> str:
+    """
+    sqlite3 tarzı ? yer tutucularını psycopg2'nin %s biçimine çevir.
+    
+    Tırnak içindeki metinlere ve yorumlara (-- ve /* */) dokunulmaz; yorumdaki
+    kesme işaretleri tırnak sayılmaz. psycopg2 parametreli sorgunun tamamını
+    biçimlendirdiğinden % karakterleri her yerde %% olarak kaçışlanır.
+    
+    Args:
+        sql: ? yer tutuculu SQL
+    
+    Returns:
+        str: %s yer tutuculu SQL
+    """
+    translated = []
+    # Kapanış işareti: tırnak karakteri, satır sonu veya "*/"
+    closing = None
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if closing:
+            if sql.startswith(closing, i):
+                translated.append(closing)
+                i += len(closing)
+                closing = None
+                continue
+        elif char in ("'", '"'):
+            closing = char
+        elif sql.startswith("--", i):
+            closing = "\n"
+        elif sql.startswith("/*", i):
+            translated.append("/*")
+            i += 2
+            closing = "*/"
+            continue
+        elif char == "?":
+            translated.append("%s")
+            i += 1
+            continue
+        
+        translated.append("%%" if char == "%" else char)
+        i += 1
+    
+    return "".join(translated)
+
+class PostgresCursor:
+    """sqlite3.Cursor-like wrapper around a psycopg2 cursor."""
+    
+    def __init__(self, cursor):
+        self._cursor = cursor
+    
+    def execute(self, sql: str, params: Sequence[Any] = ()):
+        self._cursor.execute(translate_placeholders(sql), tuple(params))
+        return self
+    
+    def executemany(self, sql: str, seq_of_params):
+        self._cursor.executemany(translate_placeholders(sql), [tuple(params) for params in seq_of_params])
+        return self
+    
+    def fetchone(self):
+        return self._cursor.fetchone()
+    
+    def fetchall(self):
+        return self._cursor.fetchall()
+    
+    def fetchmany(self, size: int = None):
+        return self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+    
+    def close(self):
+        self._cursor.close()
+    
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+    
+    @property
+    def description(self):
+        return self._cursor.description
+    
+    def __iter__(self):
+        return iter(self._cursor)
+
+class PostgresConnection:
+    """sqlite3.Connection-like wrapper that returns its connection to the pool on close."""
+    
+    def __init__(self, backend: "PostgresBackend", conn, pool=None):
+        self._backend = backend
+        self._conn = conn
+        self._pool = pool
+    
+    def cursor(self) -> PostgresCursor:
+        return PostgresCursor(self._conn.cursor(cursor_factory=psycopg2.extras.DictCursor))
+    
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> PostgresCursor:
+        return self.cursor().execute(sql, params)
+    
+    def commit(self) -> None:
+        self._conn.commit()
+    
+    def rollback(self) -> None:
+        self._conn.rollback()
+    
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        
+        # Yarım kalmış işlemler havuza geri dönen bağlantıda kalmasın
+        self._conn.rollback()
+        self._backend.release(self._conn, self._pool)
+        self._conn = None
+
+class PostgresBackend(StorageBackend):
+    """PostgreSQL backend with a thread-safe connection pool, for multi-node deployments."""
+    
+    dialect = "postgresql"
+    features = frozenset({"tsvector"})
+    
+    BUCKET_FORMATS = {
+        "hourly": "YYYY-MM-DD HH24:00:00",
+        "daily": "YYYY-MM-DD"
+    }
+    
+    # Kopyanın birincilden ne kadar geride olduğu (saniye); tüm WAL oynatıldıysa 0
+    REPLICA_LAG_SQL = """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """
+    
+    def __init__(self, dsn: str = DATABASE_URL,
+                 min_connections: int = DB_POOL_MIN_CONNECTIONS,
+                 max_connections: int = DB_POOL_MAX_CONNECTIONS,
+                 read_dsns: List[str] = None):
+        if psycopg2 is None:
+            raise RuntimeError("PostgreSQL arka ucu için psycopg2 paketi gerekli (pip install psycopg2-binary)")
+        if not dsn:
+            raise RuntimeError("PostgreSQL arka ucu için DATABASE_URL ayarlanmalı")
+        
+        self.dsn = dsn
+        self.read_dsns = list(DATABASE_READ_URLS if read_dsns is None else read_dsns)
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self._pools: Dict[str, Any] = {}
+        self._pool_lock = threading.Lock()
+        self._replica_order = itertools.cycle(range(len(self.read_dsns))) if self.read_dsns else None
+        # dsn -> (ölçüm zamanı, gecikme)
+        self._replica_lag: Dict[str, tuple] = {}
+    
+    def _get_pool(self, dsn: str = None):
+        dsn = dsn or self.dsn
+        pool = self._pools.get(dsn)
+        if pool is None:
+            with self._pool_lock:
+                pool = self._pools.get(dsn)
+                if pool is None:
+                    # CURRENT_TIMESTAMP, SQLite'taki gibi UTC olsun; kopyalara yalnızca okuma yapılır
+                    options = "-c timezone=UTC"
+                    if dsn != self.dsn:
+                        options += " -c default_transaction_read_only=on"
+                    pool = psycopg2.pool.ThreadedConnectionPool(
+                        self.min_connections, self.max_connections, dsn,
+                        options=options
+                    )
+                    self._pools[dsn] = pool
+        return pool
+    
+    def connect(self) -> PostgresConnection:
+        return PostgresConnection(self, self._get_pool().getconn(), self._get_pool())
+    
+    def _replica_lag_seconds(self, dsn: str, conn) -> float:
+        """
+        Kopyanın gecikmesini döndür (DB_REPLICA_LAG_CHECK_INTERVAL boyunca önbelleklenir).
+        """
+        measured_at, lag = self._replica_lag.get(dsn, (0.0, None))
+        if lag is None or time.monotonic() - measured_at > DB_REPLICA_LAG_CHECK_INTERVAL:
+            cursor = conn.cursor()
+            cursor.execute(self.REPLICA_LAG_SQL)
+            lag = float(cursor.fetchone()[0])
+            cursor.close()
+            conn.rollback()
+            self._replica_lag[dsn] = (time.monotonic(), lag)
+        return lag
+    
+    def connect_read(self, max_staleness: Optional[float] = None):
+        """
+        Gecikmesi max_staleness sınırında kalan bir okuma kopyasına bağlan.
+        
+        Kopyalar sırayla denenir; hiçbiri sınırı sağlamıyorsa veya kopya
+        tanımlı değilse (ya da max_staleness 0 ise) birincil veritabanı kullanılır.
+        """
+        if max_staleness is None:
+            max_staleness = DB_READ_MAX_STALENESS
+        
+        if self._replica_order is None or max_staleness <= 0:
+            return self.connect()
+        
+        for _ in range(len(self.read_dsns)):
+            dsn = self.read_dsns[next(self._replica_order)]
+            try:
+                pool = self._get_pool(dsn)
+                conn = pool.getconn()
+            except Exception as e:
+                print(f"Okuma kopyasına bağlanılamadı: {str(e)}")
+                continue
+            
+            try:
+                if self._replica_lag_seconds(dsn, conn) <= max_staleness:
+                    return PostgresConnection(self, conn, pool)
+            except Exception as e:
+                print(f"Okuma kopyası gecikmesi ölçülemedi: {str(e)}")
+            pool.putconn(conn)
+        
+        return self.connect()
+    
+    def release(self, conn, pool=None) -> None:
+        """Bağlantıyı alındığı havuza geri ver."""
+        (pool or self._get_pool()).putconn(conn)
+    
+    def bucket_expression(self, period_type: str, column: str) -> str:
+        return f"to_char({column}, '{self.BUCKET_FORMATS[period_type]}')"
+    
+    def settled_row_condition(self) -> Optional[str]:
+        """
+        Satırı ekleyen işlem, hâlâ süren tüm işlemlerden eskiyse satır kesinleşmiştir.
+        
+        BIGSERIAL değerleri commit sırasında değil ekleme sırasında alınır;
+        süren bir işlemin daha küçük rowid'li satırı daha sonra commit
+        edilebilir. Bu işlemlerin ve onlardan yeni olanların satırları,
+        anlık görüntünün (snapshot) xmin sınırına göre ayıklanır. age(),
+        txid_current() ile atanan işlem kimliğine göre hesaplandığından
+        iki taraf aynı noktadan ölçülür.
+        """
+        return "age(xmin) > txid_current() - txid_snapshot_xmin(txid_current_snapshot())"
+    
+    def describe(self) -> str:
+        # Parolayı kayıtlara yazma
+        return f"postgresql ({self.dsn.rsplit('@', 1)[-1]})"
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+def get_storage_backend() -> StorageBackend:
+    """
+    Yapılandırmaya (DB_BACKEND) göre süreç genelinde paylaşılan arka ucu döndür.
+    
+    Returns:
+        StorageBackend: SQLite veya PostgreSQL arka ucu
+    """
+    global _backend
+    
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_storage_backend(DB_BACKEND)
+    return _backend
+
+def create_storage_backend(backend_name: str, **options) -> StorageBackend:
+    """
+    İsme göre yeni bir arka uç oluştur.
+    
+    Args:
+        backend_name: 'sqlite' veya 'postgresql'
+        **options: Arka uca özgü ayarlar (db_path, wal, dsn, min_connections, max_connections, read_dsns)
+    
+    Returns:
+        StorageBackend: Oluşturulan arka uç
+    
+    Raises:
+        ValueError: Bilinmeyen bir arka uç adı verilirse
+    """
+    if backend_name == "sqlite":
+        return SQLiteBackend(**options)
+    if backend_name in ("postgresql", "postgres"):
+        return PostgresBackend(**options)
+    raise ValueError(f"Bilinmeyen veritabanı arka ucu: {backend_name}")
+
+def set_storage_backend(backend: StorageBackend) -> None:
+    """
+    Süreç genelinde kullanılacak arka ucu değiştir (ör. testlerde geçici bir veritabanı için).
+    """
+    global _backend
+    
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,320 @@
+"""
+Tool result cache utilities with TTLs, stale-while-revalidate and an optional database tier.
+"""
+import copy
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Tuple, Callable
+
+from utils.config import (
+    TOOL_CACHE_ENABLED,
+    TOOL_CACHE_MAX_ENTRIES,
+    TOOL_CACHE_L2_ENABLED,
+    TOOL_CACHE_REFRESH_WORKERS,
+    TOOL_CACHE_TTLS
+)
+from utils.session_service import SessionService
+
+class ToolResultCache:
+    """Bounded in-memory LRU of tool results backed by the response_cache table."""
+    
+    CACHE_TYPE = "tool_result"
+    
+    def __init__(self,
+                 max_entries: int = TOOL_CACHE_MAX_ENTRIES,
+                 l2_enabled: bool = TOOL_CACHE_L2_ENABLED,
+                 refresh_workers: int = TOOL_CACHE_REFRESH_WORKERS):
+        self.max_entries = max_entries
+        self.l2_enabled = l2_enabled
+        # anahtar -> (sonuç, taze_bitiş, bayat_bitiş) (time.time() cinsinden)
+        self._entries: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+        self._refresh_pool = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="tool-cache")
+        self._stats: Dict[str, Dict[str, int]] = {}
+    
+    @staticmethod
+    def policy_for(tool) -> Optional[Tuple[float, float]]:
+        """
+        Aracın önbellek süresini döndür.
+        
+        Aracın cache_ttl niteliği öncelikli; yoksa araç adında geçen ilk
+        TOOL_CACHE_TTLS anahtarı kullanılır.
+        
+        Args:
+            tool: MCPTool örneği
+        
+        Returns:
+            Tuple veya None: (taze süre, bayat kullanım süresi) saniye; önbelleklenmiyorsa None
+        """
+        if not TOOL_CACHE_ENABLED:
+            return None
+        
+        ttl = getattr(tool, "cache_ttl", None)
+        if ttl is not None:
+            return (ttl, getattr(tool, "cache_stale_ttl", 0)) if ttl > 0 else None
+        
+        tool_name = tool.name.lower()
+        for keyword, policy in TOOL_CACHE_TTLS.items():
+            if keyword in tool_name:
+                return policy
+        return None
+    
+    @staticmethod
+    def _canonicalize(value: Any) -> Any:
+        """
+        Argümanları anahtar için normalleştir (boşluklar kırpılır, Unicode NFC, None değerler atılır).
+        """
+        if isinstance(value, dict):
+            return {
+                str(key): ToolResultCache._canonicalize(item)
+                for key, item in value.items() if item is not None
+            }
+        if isinstance(value, (list, tuple)):
+            return [ToolResultCache._canonicalize(item) for item in value]
+        if isinstance(value, str):
+            return unicodedata.normalize("NFC", value.strip())
+        return value
+    
+    @staticmethod
+    def make_key(tool_name: str, args: Dict[str, Any]) -> str:
+        """
+        Araç adı ve normalleştirilmiş argümanlardan önbellek anahtarı üret.
+        
+        Args:
+            tool_name: Araç adı
+            args: Araç argümanları
+        
+        Returns:
+            str: 'tool:<araç>:<sha256>' biçiminde anahtar
+        """
+        canonical = json.dumps(
+            ToolResultCache._canonicalize(args or {}),
+            sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+        )
+        return f"tool:{tool_name}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+    
+    def _count(self, tool_name: str, outcome: str) -> None:
+        stats = self._stats.setdefault(tool_name, {"hits": 0, "stale_hits": 0, "l2_hits": 0, "misses": 0})
+        stats[outcome] += 1
+    
+    def _store_local(self, key: str, entry: Tuple[Any, float, float]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def _load_l2(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """
+        Kaydı response_cache tablosundan oku (yoksa veya bayatlık süresi geçtiyse None).
+        """
+        try:
+            conn = SessionService.get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT cache_value, cache_metadata FROM response_cache
+                WHERE cache_key = ?
+            """, (key,))
+            row = cursor.fetchone()
+            if not row:
+                conn.close()
+                return None
+            
+            metadata = json.loads(row[1] or "{}")
+            if metadata.get("stale_until", 0) <= time.time():
+                conn.close()
+                return None
+            
+            cursor.execute("""
+                UPDATE response_cache
+                SET hit_count = hit_count + 1,
+                    last_accessed_at = CURRENT_TIMESTAMP
+                WHERE cache_key = ?
+            """, (key,))
+            conn.commit()
+            conn.close()
+            return json.loads(row[0]), metadata["fresh_until"], metadata["stale_until"]
+        except Exception as e:
+            print(f"Araç önbelleği okunurken hata: {str(e)}")
+            return None
+    
+    def _store_l2(self, key: str, tool_name: str, entry: Tuple[Any, float, float]) -> None:
+        """
+        Kaydı response_cache tablosuna yaz; JSON'a çevrilemeyen sonuçlar sadece bellekte kalır.
+        """
+        result, fresh_until, stale_until = entry
+        try:
+            value = json.dumps(result, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return
+        
+        metadata = json.dumps({"tool_name": tool_name, "fresh_until": fresh_until, "stale_until": stale_until})
+        # expires_at, süresi dolan satırların purge_expired ile silinmesi içindir
+        expires_at = datetime.fromtimestamp(stale_until, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        
+        try:
+            conn = SessionService.get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO response_cache (cache_key, cache_value, cache_metadata, cache_type, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    cache_value = excluded.cache_value,
+                    cache_metadata = excluded.cache_metadata,
+                    expires_at = excluded.expires_at,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (key, value, metadata, ToolResultCache.CACHE_TYPE, expires_at))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Araç önbelleği yazılırken hata: {str(e)}")
+    
+    def get(self, tool_name: str, key: str) -> Tuple[Optional[Any], str]:
+        """
+        Önbellekteki sonucu getir.
+        
+        Args:
+            tool_name: Araç adı (istatistikler için)
+            key: make_key ile üretilmiş anahtar
+        
+        Returns:
+            Tuple: (sonucun kopyası veya None, 'fresh' | 'stale' | 'miss')
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[2] <= now:
+                    del self._entries[key]
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+        
+        if entry is None and self.l2_enabled:
+            entry = self._load_l2(key)
+            if entry is not None:
+                self._store_local(key, entry)
+                with self._lock:
+                    self._count(tool_name, "l2_hits")
+        
+        with self._lock:
+            if entry is None:
+                self._count(tool_name, "misses")
+                return None, "miss"
+            
+            state = "fresh" if entry[1] > now else "stale"
+            self._count(tool_name, "hits" if state == "fresh" else "stale_hits")
+        
+        return copy.deepcopy(entry[0]), state
+    
+    def put(self, tool_name: str, key: str, result: Any, policy: Tuple[float, float]) -> None:
+        """
+        Başarılı bir sonucu önbelleğe yaz.
+        
+        Args:
+            tool_name: Araç adı
+            key: make_key ile üretilmiş anahtar
+            result: Aracın sonucu
+            policy: (taze süre, bayat kullanım süresi) saniye
+        """
+        now = time.time()
+        entry = (copy.deepcopy(result), now + policy[0], now + policy[0] + policy[1])
+        self._store_local(key, entry)
+        if self.l2_enabled:
+            self._store_l2(key, tool_name, entry)
+    
+    def refresh_async(self, key: str, refresh: Callable[[], None]) -> bool:
+        """
+        Bayat bir kaydı arka planda yenile (aynı anahtar için tek yenileme çalışır).
+        
+        Args:
+            key: Yenilenecek anahtar
+            refresh: Aracı çalıştırıp sonucu put ile yazan fonksiyon
+        
+        Returns:
+            bool: Yenileme başlatıldıysa True (zaten sürüyorsa False)
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+        
+        def run():
+            try:
+                refresh()
+            except Exception as e:
+                print(f"Araç önbelleği yenilenirken hata: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+        
+        self._refresh_pool.submit(run)
+        return True
+    
+    def invalidate(self, tool_name: str) -> None:
+        """
+        Bir aracın bellekteki ve tablodaki tüm kayıtlarını sil (ör. araç yeniden yüklendiğinde).
+        """
+        prefix = f"tool:{tool_name}:"
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+        
+        if self.l2_enabled:
+            try:
+                conn = SessionService.get_db_connection()
+                cursor = conn.cursor()
+                # Anahtar öneki aralığı birincil anahtar indeksi üzerinde taranır
+                cursor.execute("""
+                    DELETE FROM response_cache WHERE cache_key >= ? AND cache_key < ?
+                """, (prefix, prefix[:-1] + ";"))
+                conn.commit()
+                conn.close()
+            except Exception as e:
+                print(f"Araç önbelleği temizlenirken hata: {str(e)}")
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Araç başına önbellek isabet istatistiklerini döndür.
+        
+        Returns:
+            Dict: Araç adı -> hits, stale_hits, l2_hits, misses ve hit_rate
+                (taze veya bayat isabetlerin tüm çağrılara oranı)
+        """
+        with self._lock:
+            stats = {tool_name: dict(counts) for tool_name, counts in self._stats.items()}
+        
+        for counts in stats.values():
+            total = counts["hits"] + counts["stale_hits"] + counts["misses"]
+            counts["hit_rate"] = round((counts["hits"] + counts["stale_hits"]) / total, 3) if total else 0.0
+        return stats
+    
+    @staticmethod
+    def purge_expired() -> int:
+        """
+        Bayat kullanım süresi de dolmuş araç sonuçlarını response_cache tablosundan sil.
+        
+        Returns:
+            int: Silinen kayıt sayısı
+        """
+        try:
+            conn = SessionService.get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                DELETE FROM response_cache
+                WHERE cache_type = ? AND expires_at < CURRENT_TIMESTAMP
+            """, (ToolResultCache.CACHE_TYPE,))
+            purged = cursor.rowcount
+            conn.commit()
+            conn.close()
+            return purged
+        except Exception as e:
+            print(f"Süresi dolan önbellek kayıtları silinirken hata: {str(e)}")
+            return 0
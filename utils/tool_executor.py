@@ -0,0 +1,229 @@
+"""
+Tool execution utilities with a managed worker pool, timeouts and cooperative cancellation.
+"""
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, Callable
+
+from utils.config import (
+    TOOL_EXECUTOR_WORKERS,
+    TOOL_EXECUTOR_MAX_ABANDONED
+)
+
+# Çalışan iş parçacığının o anki çağrısına ait iptal sinyali
+_execution_context = threading.local()
+
+def current_cancel_event() -> Optional[threading.Event]:
+    """
+    Bu iş parçacığında çalışan araç çağrısının iptal sinyalini döndür.
+    
+    Returns:
+        threading.Event veya None: Havuz dışında çağrılırsa None
+    """
+    return getattr(_execution_context, "cancel_event", None)
+
+class ToolTimeout(Exception):
+    """Raised when a tool does not finish within its time limit."""
+
+class ToolExecutor:
+    """Fixed-size pool of daemon worker threads that replaces workers stuck in timed-out calls."""
+    
+    def __init__(self,
+                 max_workers: int = TOOL_EXECUTOR_WORKERS,
+                 max_abandoned: int = TOOL_EXECUTOR_MAX_ABANDONED):
+        self.max_workers = max_workers
+        self.max_abandoned = max_abandoned
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._workers = 0
+        # Boşta bekleyen ve henüz bir çağrıya ayrılmamış işçi sayısı; kuyrukta
+        # işçisiz bekleyen çağrılar varken eksiye düşebilir
+        self._idle = 0
+        self._abandoned = 0
+        self._retired: set = set()
+        # Future -> onu çalıştıran iş parçacığının kimliği
+        self._running: Dict[Future, int] = {}
+    
+    def _can_spawn(self) -> bool:
+        """
+        Yeni işçi açılabilir mi (kilit tutulurken çağrılır).
+        
+        Emekli işçiler de iş parçacığı tuttuğu için toplam sayıya dahildir;
+        sınır dolunca yeni çağrılar kuyrukta bekler.
+        """
+        return (self._workers < self.max_workers and
+                self._workers + self._abandoned < self.max_workers + self.max_abandoned)
+    
+    def _spawn_worker(self, idle: bool = False) -> None:
+        """
+        Yeni bir işçi başlat (kilit tutulurken çağrılır).
+        
+        Args:
+            idle: İşçi boşta sayılsın mı; bir çağrı için açılan işçi o çağrıya
+                ayrılmıştır ve başkası tarafından sayılmamalıdır
+        """
+        self._workers += 1
+        if idle:
+            self._idle += 1
+        threading.Thread(target=self._worker_loop, name="tool-worker", daemon=True).start()
+    
+    def _worker_loop(self) -> None:
+        """
+        Kuyruktaki çağrıları çalıştır; zaman aşımı nedeniyle emekliye ayrılan
+        işçi, elindeki çağrı bitince çıkar.
+        """
+        ident = threading.get_ident()
+        while True:
+            future, fn, cancel_event, reserved = self._queue.get()
+            # Kayıt, çağrı başlamadan yapılır ki _abandon çalışan işçiyi her zaman bulsun
+            with self._lock:
+                # Ayrılmış çağrılar boştaki işçiyi submit sırasında zaten düşürdü
+                # ya da kendi işçisini açtı
+                if not reserved:
+                    self._idle -= 1
+                self._running[future] = ident
+            if not future.set_running_or_notify_cancel():
+                with self._lock:
+                    self._running.pop(future, None)
+            else:
+                _execution_context.cancel_event = cancel_event
+                try:
+                    future.set_result(fn())
+                except BaseException as e:
+                    future.set_exception(e)
+                finally:
+                    _execution_context.cancel_event = None
+                    with self._lock:
+                        self._running.pop(future, None)
+            
+            with self._lock:
+                if ident in self._retired:
+                    self._retired.discard(ident)
+                    self._abandoned -= 1
+                    # Sınır yüzünden kuyrukta bekleyen çağrılar için yerine işçi aç
+                    if self._idle <= 0 and not self._queue.empty() and self._can_spawn():
+                        self._spawn_worker(idle=True)
+                    return
+                self._idle += 1
+    
+    def submit(self, fn: Callable[[], Any], cancel_event: threading.Event) -> Future:
+        """
+        Bir çağrıyı havuza gönder.
+        
+        Boşta bir işçi varsa çağrı için hemen ayrılır; yoksa (sınır izin
+        veriyorsa) yeni işçi açılır. Böylece aynı anda gelen çağrılar aynı
+        boştaki işçiyi sayıp birbirinin arkasında kuyrukta beklemez.
+        
+        Args:
+            fn: Argümansız çağrılacak fonksiyon
+            cancel_event: Çağrı içinde current_cancel_event() ile okunabilen iptal sinyali
+        
+        Returns:
+            Future: Çağrının sonucu
+        """
+        future: Future = Future()
+        with self._lock:
+            reserved = self._idle > 0
+            if reserved:
+                self._idle -= 1
+            elif self._can_spawn():
+                self._spawn_worker()
+                reserved = True
+        self._queue.put((future, fn, cancel_event, reserved))
+        return future
+    
+    def _abandon(self, future: Future) -> None:
+        """
+        Zaman aşımına uğrayan çağrıyı bırak; hâlâ çalışıyorsa işçisini emekliye
+        ayır ve havuz kapasitesi düşmesin diye yerine yenisini aç.
+        """
+        if future.cancel():
+            return
+        
+        with self._lock:
+            ident = self._running.get(future)
+            if ident is None or ident in self._retired:
+                return
+            
+            self._retired.add(ident)
+            self._workers -= 1
+            self._abandoned += 1
+            if self._can_spawn():
+                self._spawn_worker(idle=True)
+            else:
+                print(
+                    f"Uyarı: {self._abandoned} araç çağrısı zaman aşımından sonra hâlâ çalışıyor; "
+                    f"havuz kapasitesi geçici olarak azaldı"
+                )
+    
+    def run(self, fn: Callable[[], Any], timeout: Optional[float]) -> Any:
+        """
+        Çağrıyı havuzda çalıştır ve en fazla timeout saniye bekle.
+        
+        Süre dolarsa çağrının iptal sinyali verilir; henüz başlamadıysa hiç
+        çalıştırılmaz, başladıysa sonucu beklenmeden bırakılır.
+        
+        Args:
+            fn: Argümansız çağrılacak fonksiyon
+            timeout: Saniye cinsinden süre sınırı (None veya 0 = sınırsız)
+        
+        Returns:
+            Any: Fonksiyonun sonucu (fonksiyonun istisnası olduğu gibi yükseltilir)
+        
+        Raises:
+            ToolTimeout: Süre dolduğunda
+        """
+        cancel_event = threading.Event()
+        future = self.submit(fn, cancel_event)
+        try:
+            return future.result(timeout=timeout or None)
+        except FutureTimeoutError:
+            # Fonksiyonun kendi TimeoutError'ı (ör. soket) Future tamamlandıktan sonra gelir
+            if future.done():
+                raise
+            cancel_event.set()
+            self._abandon(future)
+            raise ToolTimeout(f"Zaman aşımı: {timeout:g} saniye içinde tamamlanmadı")
+    
+    async def arun(self, fn: Callable[[], Any], timeout: Optional[float]) -> Any:
+        """
+        run ile aynı, ancak sonucu olay döngüsünü bloklamadan bekler.
+        
+        Args:
+            fn: Argümansız çağrılacak fonksiyon
+            timeout: Saniye cinsinden süre sınırı (None veya 0 = sınırsız)
+        
+        Returns:
+            Any: Fonksiyonun sonucu (fonksiyonun istisnası olduğu gibi yükseltilir)
+        
+        Raises:
+            ToolTimeout: Süre dolduğunda
+        """
+        cancel_event = threading.Event()
+        future = self.submit(fn, cancel_event)
+        waiter = asyncio.wrap_future(future)
+        done, _ = await asyncio.wait({waiter}, timeout=timeout or None)
+        if not done:
+            cancel_event.set()
+            self._abandon(future)
+            waiter.cancel()
+            raise ToolTimeout(f"Zaman aşımı: {timeout:g} saniye içinde tamamlanmadı")
+        return waiter.result()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Havuzun anlık durumunu döndür.
+        
+        Returns:
+            Dict: workers, idle, running, queued ve abandoned sayıları
+        """
+        with self._lock:
+            return {
+                "workers": self._workers,
+                "idle": max(self._idle, 0),
+                "running": len(self._running),
+                "queued": self._queue.qsize(),
+                "abandoned": self._abandoned
+            }
@@ -0,0 +1,264 @@
+"""
+Manifest of dynamic tool modules so their tools can be registered without importing them.
+"""
+import ast
+import hashlib
+import importlib
+import inspect
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Union
+
+# Manifest biçimi değişirse eski dosya yok sayılır ve yeniden oluşturulur
+MANIFEST_VERSION = 1
+# Sınıf gövdesinden okunan araç özellikleri
+TOOL_ATTRIBUTES = ("input_schema", "cache_ttl", "cache_stale_ttl", "timeout")
+
+class _NotStatic(Exception):
+    """Raised when a tool's metadata cannot be read from the source without running it."""
+
+def _literal(node: ast.AST) -> Any:
+    """Düğümü çalıştırmadan değerine çevir (yalnızca sabitler ve sabit kapsayıcılar)."""
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        raise _NotStatic()
+
+def _is_tool_base(node: ast.expr) -> bool:
+    """Taban sınıf ifadesi MCPTool mu (MCPTool veya mcp_server.MCPTool)."""
+    if isinstance(node, ast.Name):
+        return node.id == "MCPTool"
+    return isinstance(node, ast.Attribute) and node.attr == "MCPTool"
+
+def _is_super_init(node: ast.AST) -> bool:
+    """Düğüm super().__init__(...) çağrısı mı."""
+    return (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and
+            node.func.attr == "__init__" and isinstance(node.func.value, ast.Call) and
+            isinstance(node.func.value.func, ast.Name) and node.func.value.func.id == "super")
+
+class ToolManifest:
+    """Cached name, description and schema of each dynamic tool, refreshed incrementally from file mtimes and hashes."""
+    
+    def __init__(self, package_dir: Union[str, Path], manifest_path: Union[str, Path], package: str = "dynamic_tools"):
+        self.package_dir = Path(package_dir)
+        self.manifest_path = Path(manifest_path)
+        self.package = package
+        # dosya adı -> {module, mtime_ns, size, sha256, tools}
+        self.modules: Dict[str, Dict[str, Any]] = {}
+    
+    def load(self) -> None:
+        """Kaydedilmiş manifesti oku (yoksa veya bozuksa boş başlar)."""
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION and isinstance(data.get("modules"), dict):
+                self.modules = data["modules"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Araç manifesti okunurken hata, yeniden oluşturulacak: {str(e)}")
+    
+    def save(self) -> None:
+        """Manifesti geçici dosyaya yazıp yerine taşı (eşzamanlı okuyucular yarım dosya görmez)."""
+        temp_path = self.manifest_path.with_name(f"{self.manifest_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "modules": self.modules}, f, ensure_ascii=False, indent=1)
+            os.replace(temp_path, self.manifest_path)
+        except Exception as e:
+            print(f"Araç manifesti kaydedilirken hata: {str(e)}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def file_hash(path: Union[str, Path]) -> str:
+        """
+        Modül dosyasının içerik özetini hesapla.
+        
+        Args:
+            path: Dosya yolu
+        
+        Returns:
+            str: SHA-256 özeti (hex)
+        """
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    
+    def refresh(self, base_class: type) -> List[Dict[str, Any]]:
+        """
+        Manifesti paket dizinindeki dosyalarla eşitle ve araç kayıtlarını döndür.
+        
+        Boyutu ve mtime değeri değişmeyen dosyalar okunmaz; değişenlerin
+        özeti karşılaştırılır ve yalnızca içeriği farklı olanlar yeniden
+        incelenir. Araç bilgileri önce kaynak koddan (AST) okunur; sabit
+        olmayan değerler içeren modüller bir kez içe aktarılarak incelenir.
+        
+        Args:
+            base_class: Araçların taban sınıfı (içe aktarmaya geri dönüldüğünde kullanılır)
+        
+        Returns:
+            List: module, path, class_name, name, description ve varsa input_schema,
+                parameters, cache_ttl, cache_stale_ttl, timeout alanlı kayıtlar
+        """
+        if not self.modules:
+            self.load()
+        
+        modules: Dict[str, Dict[str, Any]] = {}
+        changed = False
+        try:
+            entries = sorted(os.scandir(self.package_dir), key=lambda entry: entry.name)
+        except FileNotFoundError:
+            entries = []
+        
+        for entry in entries:
+            if not entry.name.endswith(".py") or entry.name.startswith("__") or not entry.is_file():
+                continue
+            
+            stat = entry.stat()
+            record = self.modules.get(entry.name)
+            if record and record["mtime_ns"] == stat.st_mtime_ns and record["size"] == stat.st_size:
+                modules[entry.name] = record
+                continue
+            
+            digest = self.file_hash(entry.path)
+            changed = True
+            if record and record["sha256"] == digest:
+                # Sadece dokunulmuş (ör. git checkout), içerik aynı
+                record.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                modules[entry.name] = record
+                continue
+            
+            module_name = f"{self.package}.{entry.name[:-3]}"
+            modules[entry.name] = {
+                "module": module_name,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": digest,
+                "tools": self._extract(Path(entry.path), module_name, base_class)
+            }
+        
+        if changed or set(modules) != set(self.modules):
+            self.modules = modules
+            self.save()
+        
+        return [
+            dict(tool, module=record["module"], path=str(self.package_dir / file_name))
+            for file_name, record in self.modules.items()
+            for tool in record["tools"]
+        ]
+    
+    def module_names(self) -> List[str]:
+        """
+        Kayıtlı araç içeren modüllerin adlarını döndür (manifest yenilenmez).
+        
+        Returns:
+            List: Modül adları (ör. 'dynamic_tools.currency_tool')
+        """
+        return [record["module"] for record in self.modules.values() if record["tools"]]
+    
+    @classmethod
+    def _extract(cls, path: Path, module_name: str, base_class: type) -> List[Dict[str, Any]]:
+        """Modüldeki araçların bilgilerini önce kaynaktan, olmazsa içe aktararak çıkar."""
+        try:
+            tools = cls.extract_static(path.read_text(encoding="utf-8"))
+            if tools:
+                return tools
+        except _NotStatic:
+            pass
+        except SyntaxError as e:
+            print(f"Error loading dynamic tool module {module_name}: {str(e)}")
+            return []
+        
+        try:
+            return cls.extract_by_import(module_name, base_class)
+        except Exception as e:
+            print(f"Error loading dynamic tool module {module_name}: {str(e)}")
+            return []
+    
+    @staticmethod
+    def extract_static(source: str) -> List[Dict[str, Any]]:
+        """
+        MCPTool alt sınıflarının bilgilerini kodu çalıştırmadan oku.
+        
+        Ad ve açıklama super().__init__(...) çağrısından, input_schema gibi
+        özellikler sınıf gövdesinden, eski araçların parametre listesi
+        self.parameters atamasından alınır.
+        
+        Args:
+            source: Modülün kaynak kodu
+        
+        Returns:
+            List: Her araç sınıfı için bir kayıt
+        
+        Raises:
+            _NotStatic: Bir değer sabit değilse (ör. f-string veya hesaplanan açıklama)
+        """
+        tools = []
+        for node in ast.parse(source).body:
+            if not isinstance(node, ast.ClassDef) or not any(_is_tool_base(base) for base in node.bases):
+                continue
+            
+            tool: Dict[str, Any] = {"class_name": node.name}
+            for statement in node.body:
+                if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+                    target, value = statement.targets[0], statement.value
+                elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+                    target, value = statement.target, statement.value
+                elif isinstance(statement, ast.FunctionDef) and statement.name == "__init__":
+                    for inner in ast.walk(statement):
+                        if _is_super_init(inner):
+                            keywords = {kw.arg: kw.value for kw in inner.keywords if kw.arg}
+                            for position, field in enumerate(("name", "description")):
+                                value_node = inner.args[position] if position < len(inner.args) else keywords.get(field)
+                                if value_node is not None:
+                                    tool[field] = _literal(value_node)
+                        elif (isinstance(inner, ast.Assign) and len(inner.targets) == 1 and
+                              isinstance(inner.targets[0], ast.Attribute) and
+                              isinstance(inner.targets[0].value, ast.Name) and
+                              inner.targets[0].value.id == "self" and inner.targets[0].attr == "parameters"):
+                            tool["parameters"] = _literal(inner.value)
+                    continue
+                else:
+                    continue
+                
+                if isinstance(target, ast.Name) and target.id in TOOL_ATTRIBUTES:
+                    tool[target.id] = _literal(value)
+            
+            if not isinstance(tool.get("name"), str) or not isinstance(tool.get("description", ""), str):
+                raise _NotStatic()
+            tools.append(tool)
+        return tools
+    
+    @staticmethod
+    def extract_by_import(module_name: str, base_class: type) -> List[Dict[str, Any]]:
+        """
+        Modülü içe aktarıp araç örneklerinden bilgileri oku.
+        
+        Args:
+            module_name: Modül adı (ör. 'dynamic_tools.currency_tool')
+            base_class: Araçların taban sınıfı
+        
+        Returns:
+            List: Her araç sınıfı için bir kayıt (JSON'a çevrilemeyen değerler atlanır)
+        """
+        module = importlib.import_module(module_name)
+        tools = []
+        for _, obj in inspect.getmembers(module, inspect.isclass):
+            if not issubclass(obj, base_class) or obj is base_class or obj.__module__ != module.__name__:
+                continue
+            
+            instance = obj()
+            tool = {"class_name": obj.__name__, "name": instance.name, "description": instance.description}
+            for attribute in TOOL_ATTRIBUTES + ("parameters",):
+                value = getattr(instance, attribute, None)
+                try:
+                    json.dumps(value)
+                except (TypeError, ValueError):
+                    continue
+                if value is not None:
+                    tool[attribute] = value
+            tools.append(tool)
+        return tools
@@ -0,0 +1,262 @@
+"""
+Process pool utilities for running dynamic tools outside the web server process.
+"""
+import asyncio
+import atexit
+import importlib
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: kaynak sınırları uygulanmaz
+    resource = None
+
+from utils.config import (
+    DYNAMIC_TOOL_PROCESS_WORKERS,
+    DYNAMIC_TOOL_MAX_CALLS_PER_WORKER,
+    DYNAMIC_TOOL_MEMORY_LIMIT_MB,
+    DYNAMIC_TOOL_CPU_LIMIT_SECONDS,
+    TOOL_MANIFEST_PATH
+)
+from utils.tool_executor import ToolTimeout
+from utils.tool_manifest import ToolManifest
+
+class ToolWorkerError(Exception):
+    """Raised in the server process for an error that happened inside a tool worker."""
+    
+    def __init__(self, error_class: str, message: str):
+        super().__init__(message)
+        self.error_class = error_class
+
+def _set_memory_limit(memory_limit_mb: int) -> None:
+    """İşçi sürecin adres alanını sınırla (sert sınırın üstüne çıkılmaz)."""
+    if resource is None or not memory_limit_mb:
+        return
+    
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = memory_limit_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+def _set_cpu_limit(cpu_limit_seconds: int) -> None:
+    """
+    Bir sonraki çağrı için CPU süresi sınırı koy.
+    
+    RLIMIT_CPU süreç ömrü boyunca birikir; bu yüzden sınır, şu ana kadar
+    kullanılan CPU süresinin üstüne eklenir. Aşılırsa süreç SIGXCPU ile sonlanır.
+    """
+    if resource is None or not cpu_limit_seconds:
+        return
+    
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + 1 + cpu_limit_seconds
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def _worker_main(conn, memory_limit_mb: int, cpu_limit_seconds: int) -> None:
+    """
+    İşçi sürecin ana döngüsü.
+    
+    Araç manifestindeki dynamic_tools modüllerini önceden içe aktarır (ilk
+    çağrı içe aktarma süresini aracın zaman aşımı bütçesinden ödemez),
+    ardından borudan gelen (modül, sınıf, sürüm, argümanlar) isteklerini
+    çalıştırıp sonucu geri yazar. Modül dosyası değiştiyse (sürüm farklıysa)
+    modül yeniden yüklenir.
+    """
+    _set_memory_limit(memory_limit_mb)
+    
+    manifest = ToolManifest(TOOL_MANIFEST_PATH.parent, TOOL_MANIFEST_PATH)
+    manifest.load()
+    for module_name in manifest.module_names():
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            print(f"Araç işçisi {module_name} modülünü yüklerken hata: {str(e)}")
+    
+    # (modül, sınıf) -> (sürüm, araç örneği)
+    instances: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+        
+        module_name, class_name, version, args = request
+        try:
+            cached = instances.get((module_name, class_name))
+            if cached is None or cached[0] != version:
+                module = importlib.import_module(module_name)
+                if cached is not None:
+                    module = importlib.reload(module)
+                cached = (version, getattr(module, class_name)())
+                instances[(module_name, class_name)] = cached
+            
+            _set_cpu_limit(cpu_limit_seconds)
+            tool = cached[1]
+            reply = ("ok", asyncio.run(tool.aexecute(args)) if tool.is_async else tool.execute(args))
+        except BaseException as e:
+            reply = ("error", type(e).__name__, str(e) or type(e).__name__)
+        
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # Sonuç pickle edilemiyorsa boru temiz kalır (send önce serileştirir)
+            conn.send(("error", type(e).__name__, f"Sonuç aktarılamadı: {str(e)}"))
+
+class _Worker:
+    """Handle for one worker process and the parent end of its pipe."""
+    
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.calls = 0
+
+class ToolProcessPool:
+    """Pre-started worker processes that execute dynamic tools over pipes and are recycled after N calls."""
+    
+    def __init__(self,
+                 workers: int = DYNAMIC_TOOL_PROCESS_WORKERS,
+                 max_calls_per_worker: int = DYNAMIC_TOOL_MAX_CALLS_PER_WORKER,
+                 memory_limit_mb: int = DYNAMIC_TOOL_MEMORY_LIMIT_MB,
+                 cpu_limit_seconds: int = DYNAMIC_TOOL_CPU_LIMIT_SECONDS):
+        self.max_calls_per_worker = max_calls_per_worker
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_limit_seconds = cpu_limit_seconds
+        
+        # forkserver: işçiler, mcp_server'ı önceden içe aktarmış temiz bir süreçten
+        # çatallanır (sunucunun thread'leri ve kilitleri kopyalanmaz)
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context("forkserver")
+            self._context.set_forkserver_preload(["mcp_server"])
+        else:
+            self._context = multiprocessing.get_context("spawn")
+        
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.recycled = 0
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+    
+    def _spawn(self) -> _Worker:
+        """Yeni bir işçi süreç başlat."""
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.memory_limit_mb, self.cpu_limit_seconds),
+            name="tool-process",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+    
+    @staticmethod
+    def _stop(worker: _Worker, graceful: bool) -> None:
+        """İşçiyi durdur; kibarca kapanmazsa sonlandır."""
+        try:
+            if graceful:
+                worker.conn.send(None)
+                worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join(timeout=1)
+        except Exception:
+            pass
+        finally:
+            worker.conn.close()
+    
+    def _replace(self, worker: _Worker, graceful: bool) -> _Worker:
+        """İşçiyi durdur ve yerine yenisini başlat."""
+        self._stop(worker, graceful)
+        with self._lock:
+            self.recycled += 1
+        return self._spawn()
+    
+    def call(self, module_name: str, class_name: str, version: Any,
+             args: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        """
+        Bir dinamik aracı boştaki bir işçi süreçte çalıştır.
+        
+        Süre dolarsa işçi süreç öldürülür (çağrı gerçekten iptal edilir) ve
+        yerine yenisi başlatılır.
+        
+        Args:
+            module_name: Aracın modülü (ör. 'dynamic_tools.currency')
+            class_name: Araç sınıfının adı
+            version: Modülün sürümü (değişirse işçi modülü yeniden yükler)
+            args: Araca verilen argümanlar
+            timeout: Saniye cinsinden süre sınırı (None veya 0 = sınırsız)
+        
+        Returns:
+            Any: Aracın sonucu
+        
+        Raises:
+            ToolTimeout: Boş işçi bulunamadığında veya süre dolduğunda
+            ToolWorkerError: Araç hata verdiğinde veya işçi süreç sonlandığında
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            worker = self._idle.get(timeout=timeout or None)
+        except queue.Empty:
+            raise ToolTimeout(f"Zaman aşımı: {timeout:g} saniye içinde boş araç işçisi bulunamadı")
+        
+        try:
+            worker.conn.send((module_name, class_name, version, args))
+            remaining = max(0, deadline - time.monotonic()) if deadline else None
+            if not worker.conn.poll(remaining):
+                worker = self._replace(worker, graceful=False)
+                raise ToolTimeout(f"Zaman aşımı: {timeout:g} saniye içinde tamamlanmadı")
+            reply = worker.conn.recv()
+        except (EOFError, OSError):
+            # Bellek/CPU sınırı veya çökme nedeniyle işçi sonlandı
+            worker.process.join(timeout=1)
+            exitcode = worker.process.exitcode
+            worker = self._replace(worker, graceful=False)
+            raise ToolWorkerError("ToolWorkerExited", f"Araç işçisi sonlandı (çıkış kodu {exitcode})")
+        finally:
+            worker.calls += 1
+            if worker.calls >= self.max_calls_per_worker:
+                # Yenileme, yanıt beklenmesin diye arka planda yapılır
+                threading.Thread(
+                    target=lambda old=worker: self._idle.put(self._replace(old, graceful=True)),
+                    daemon=True
+                ).start()
+            else:
+                self._idle.put(worker)
+        
+        if reply[0] == "ok":
+            return reply[1]
+        raise ToolWorkerError(reply[1], reply[2])
+    
+    def close(self) -> None:
+        """Boştaki tüm işçi süreçleri durdur."""
+        while True:
+            try:
+                self._stop(self._idle.get_nowait(), graceful=True)
+            except queue.Empty:
+                break
+
+_default_pool: Optional[ToolProcessPool] = None
+_default_pool_lock = threading.Lock()
+
+def get_tool_process_pool() -> ToolProcessPool:
+    """
+    Süreç genelinde paylaşılan araç süreç havuzunu döndür (ilk çağrıda işçiler başlatılır).
+    """
+    global _default_pool
+    
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = ToolProcessPool()
+                atexit.register(_default_pool.close)
+    return _default_pool
@@ -0,0 +1,304 @@
+"""
+Tool argument schema utilities: JSON-schema subsets compiled once into coercing validators.
+"""
+import math
+import re
+from typing import Dict, Any, Optional, List, Callable, Tuple
+
+# LLM'in ürettiği tür adlarının JSON Schema karşılıkları
+TYPE_ALIASES = {
+    "string": "string", "str": "string", "text": "string",
+    "number": "number", "float": "number", "double": "number", "decimal": "number",
+    "integer": "integer", "int": "integer",
+    "boolean": "boolean", "bool": "boolean",
+    "array": "array", "list": "array",
+    "object": "object", "dict": "object",
+    "null": "null"
+}
+
+TRUE_STRINGS = {"true", "yes", "1", "evet", "on"}
+FALSE_STRINGS = {"false", "no", "0", "hayır", "hayir", "off"}
+
+class ToolArgumentError(Exception):
+    """Raised when tool arguments do not match the tool's input schema."""
+    
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+class _Invalid(Exception):
+    """Tek bir değerin doğrulama hatası (yol bilgisi üst seviyede eklenir)."""
+
+def schema_from_parameters(parameters: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    detect_tool_need'in tool_parameters listesini JSON Schema'ya çevir.
+    
+    Args:
+        parameters: {"name", "type", "description", "required"} kayıtları
+            ('string/number' gibi belirsiz türlerde ilki kullanılır)
+    
+    Returns:
+        Dict: type 'object' olan JSON Schema
+    """
+    properties: Dict[str, Any] = {}
+    required = []
+    for parameter in parameters or []:
+        if not isinstance(parameter, dict) or not parameter.get("name"):
+            continue
+        
+        name = str(parameter["name"])
+        prop: Dict[str, Any] = {}
+        type_name = re.split(r"[/|,\s]+", str(parameter.get("type", "")).strip().lower())[0]
+        if type_name in TYPE_ALIASES:
+            prop["type"] = TYPE_ALIASES[type_name]
+        if parameter.get("description"):
+            prop["description"] = str(parameter["description"])
+        if "default" in parameter:
+            prop["default"] = parameter["default"]
+        if "enum" in parameter and isinstance(parameter["enum"], list):
+            prop["enum"] = parameter["enum"]
+        properties[name] = prop
+        
+        if parameter.get("required") in (True, "true", "True", "yes"):
+            required.append(name)
+    
+    return {"type": "object", "properties": properties, "required": required}
+
+def _describe(value: Any) -> str:
+    return "null" if value is None else type(value).__name__
+
+def _coerce_string(value: Any) -> Any:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise _Invalid(f"expected string, got {_describe(value)}")
+
+def _parse_number(text: str) -> float:
+    text = text.strip().replace("_", "")
+    if text.count(",") == 1 and "." not in text:
+        # '1,000' hem binlik ayırıcı hem ondalık virgül olabilir; tahmin etmek
+        # tutarı 1000 kat kaydırabileceği için reddedilir
+        if re.fullmatch(r"[-+]?\d{1,3},\d{3}", text):
+            raise _Invalid(f"ambiguous number '{text}' (write '{text.replace(',', '')}' or '{text.replace(',', '.')}')")
+        # Ondalık virgül (ör. '1,5')
+        text = text.replace(",", ".")
+    number = float(text)
+    if not math.isfinite(number):
+        raise _Invalid(f"expected finite number, got '{text}'")
+    return number
+
+def _coerce_number(value: Any) -> Any:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if isinstance(value, float) and not math.isfinite(value):
+            raise _Invalid(f"expected finite number, got {value!r}")
+        return value
+    if isinstance(value, str):
+        try:
+            number = _parse_number(value)
+        except ValueError:
+            raise _Invalid(f"expected number, got '{value}'")
+        return int(number) if number.is_integer() and re.fullmatch(r"\s*-?\d+\s*", value) else number
+    raise _Invalid(f"expected number, got {_describe(value)}")
+
+def _coerce_integer(value: Any) -> Any:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and math.isfinite(value) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            number = _parse_number(value)
+        except ValueError:
+            raise _Invalid(f"expected integer, got '{value}'")
+        if number.is_integer():
+            return int(number)
+    raise _Invalid(f"expected integer, got {value!r}")
+
+def _coerce_boolean(value: Any) -> Any:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in TRUE_STRINGS:
+            return True
+        if lowered in FALSE_STRINGS:
+            return False
+    raise _Invalid(f"expected boolean, got {value!r}")
+
+def _coerce_null(value: Any) -> Any:
+    if value is None:
+        return None
+    raise _Invalid(f"expected null, got {_describe(value)}")
+
+def _compile(schema: Dict[str, Any]) -> Callable[[Any], Any]:
+    """
+    Bir şemayı değer -> dönüştürülmüş değer fonksiyonuna derle.
+    
+    Desteklenen anahtarlar: type (tekil veya liste), enum, minimum, maximum,
+    minLength, maxLength, pattern, items, properties, required,
+    additionalProperties (False ise fazla anahtarlar reddedilir), default.
+    """
+    checks: List[Callable[[Any], Any]] = []
+    
+    types = schema.get("type")
+    if isinstance(types, str):
+        types = [types]
+    if types:
+        coercers = []
+        for type_name in types:
+            type_name = TYPE_ALIASES.get(type_name, type_name)
+            if type_name == "object":
+                coercers.append(_compile_object(schema))
+            elif type_name == "array":
+                coercers.append(_compile_array(schema))
+            else:
+                coercers.append({
+                    "string": _coerce_string,
+                    "number": _coerce_number,
+                    "integer": _coerce_integer,
+                    "boolean": _coerce_boolean,
+                    "null": _coerce_null
+                }[type_name])
+        
+        def check_type(value):
+            errors = []
+            for coerce in coercers:
+                try:
+                    return coerce(value)
+                except _Invalid as e:
+                    errors.append(str(e))
+            raise _Invalid(errors[0] if len(errors) == 1 else " or ".join(errors))
+        checks.append(check_type)
+    elif "properties" in schema:
+        checks.append(_compile_object(schema))
+    
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+        # Büyük/küçük harf farkı olan metinler kanonik değere çevrilir
+        folded = {item.casefold(): item for item in allowed if isinstance(item, str)}
+        
+        def check_enum(value):
+            if value in allowed:
+                return value
+            if isinstance(value, str) and value.casefold() in folded:
+                return folded[value.casefold()]
+            raise _Invalid(f"must be one of {allowed}, got {value!r}")
+        checks.append(check_enum)
+    
+    minimum, maximum = schema.get("minimum"), schema.get("maximum")
+    if minimum is not None or maximum is not None:
+        def check_range(value):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                if minimum is not None and value < minimum:
+                    raise _Invalid(f"must be >= {minimum}, got {value}")
+                if maximum is not None and value > maximum:
+                    raise _Invalid(f"must be <= {maximum}, got {value}")
+            return value
+        checks.append(check_range)
+    
+    min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+    pattern = re.compile(schema["pattern"]) if schema.get("pattern") else None
+    if min_length is not None or max_length is not None or pattern is not None:
+        def check_string(value):
+            if isinstance(value, str):
+                if min_length is not None and len(value) < min_length:
+                    raise _Invalid(f"must be at least {min_length} characters")
+                if max_length is not None and len(value) > max_length:
+                    raise _Invalid(f"must be at most {max_length} characters")
+                if pattern is not None and not pattern.search(value):
+                    raise _Invalid(f"must match pattern {pattern.pattern!r}")
+            return value
+        checks.append(check_string)
+    
+    def validate(value):
+        for check in checks:
+            value = check(value)
+        return value
+    return validate
+
+def _compile_array(schema: Dict[str, Any]) -> Callable[[Any], Any]:
+    item_validator = _compile(schema["items"]) if isinstance(schema.get("items"), dict) else None
+    
+    def coerce_array(value):
+        if isinstance(value, tuple):
+            value = list(value)
+        if not isinstance(value, list):
+            raise _Invalid(f"expected array, got {_describe(value)}")
+        if item_validator is None:
+            return value
+        
+        items = []
+        for index, item in enumerate(value):
+            try:
+                items.append(item_validator(item))
+            except _Invalid as e:
+                raise _Invalid(f"[{index}]: {str(e)}")
+        return items
+    return coerce_array
+
+def _compile_object(schema: Dict[str, Any]) -> Callable[[Any], Any]:
+    properties: List[Tuple[str, Callable[[Any], Any], bool, bool, Any]] = []
+    required = set(schema.get("required") or [])
+    for name, prop in (schema.get("properties") or {}).items():
+        prop = prop if isinstance(prop, dict) else {}
+        properties.append((name, _compile(prop), name in required, "default" in prop, prop.get("default")))
+    known = {name for name, *_ in properties}
+    allow_additional = schema.get("additionalProperties", True) is not False
+    
+    def coerce_object(value):
+        if not isinstance(value, dict):
+            raise _Invalid(f"expected object, got {_describe(value)}")
+        
+        result = dict(value) if allow_additional else {}
+        errors = []
+        for name, validator, is_required, has_default, default in properties:
+            # LLM'ler boş bıraktıkları alanlar için null üretebilir
+            if value.get(name) is None:
+                result.pop(name, None)
+                if has_default:
+                    result[name] = default
+                elif is_required:
+                    errors.append(f"'{name}' is required")
+                continue
+            
+            try:
+                result[name] = validator(value[name])
+            except _Invalid as e:
+                errors.append(f"'{name}'{str(e)}" if str(e).startswith("[") else f"'{name}': {str(e)}")
+        
+        if not allow_additional:
+            unexpected = sorted(set(value) - known)
+            if unexpected:
+                errors.append(f"unexpected arguments: {', '.join(unexpected)}")
+        if errors:
+            raise _Invalid("; ".join(errors))
+        return result
+    return coerce_object
+
+class CompiledSchema:
+    """Input schema compiled once into a validator that coerces arguments."""
+    
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self._validate = _compile_object(schema)
+    
+    def validate(self, args: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Argümanları doğrula ve dönüştürülmüş bir kopyasını döndür.
+        
+        Args:
+            args: Araca verilecek argümanlar
+        
+        Returns:
+            Dict: Türleri dönüştürülmüş, varsayılanları eklenmiş argümanlar
+        
+        Raises:
+            ToolArgumentError: Argümanlar şemaya uymuyorsa
+        """
+        try:
+            return self._validate(args if args is not None else {})
+        except _Invalid as e:
+            raise ToolArgumentError(str(e).split("; "))
@@ -0,0 +1,385 @@
+"""
+Tool telemetry utilities for recording tool executions off the request path.
+"""
+import atexit
+import json
+import queue
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+
+from utils.config import (
+    TOOL_TELEMETRY_ENABLED,
+    TOOL_TELEMETRY_FLUSH_INTERVAL,
+    TOOL_TELEMETRY_BATCH_SIZE,
+    TOOL_TELEMETRY_QUEUE_SIZE,
+    TOOL_TELEMETRY_MAX_RESULT_BYTES,
+    TOOL_TELEMETRY_PERCENTILE_WINDOW
+)
+from utils.session_service import SessionService
+
+class ToolTelemetry:
+    """Buffered writer for tool_executions rows and tools aggregates."""
+    
+    _queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=TOOL_TELEMETRY_QUEUE_SIZE)
+    _thread: Optional[threading.Thread] = None
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _flush_event = threading.Event()
+    
+    # Araç adı -> tool_id (tools satırları bir kez oluşturulur)
+    _tool_ids: Dict[str, str] = {}
+    
+    # Tampon dolduğu için atılan kayıt sayısı
+    dropped = 0
+    
+    @staticmethod
+    def record(tool_name: str,
+               tool_type: str,
+               tool_description: str,
+               args: Dict[str, Any],
+               result: Any,
+               duration_ms: float,
+               status: str,
+               error_class: str = None,
+               error_message: str = None,
+               session_id: str = None,
+               message_id: str = None) -> None:
+        """
+        Bir araç çalıştırmasını tampona ekle (asla bloklamaz).
+        
+        Argüman ve sonuçların serileştirilmesi, boyut hesabı ve veritabanı
+        yazımı arka plan thread'inde yapılır.
+        
+        Args:
+            tool_name: Araç adı
+            tool_type: 'builtin', 'dynamic' veya 'external'
+            tool_description: Araç açıklaması (tools satırı ilk kez oluşturulurken kullanılır)
+            args: Araca verilen argümanlar
+            result: Aracın döndürdüğü sonuç
+            duration_ms: Çalışma süresi (milisaniye)
+            status: 'success', 'error' veya 'timeout'
+            error_class: Hata sınıfı (ör. istisna tipi)
+            error_message: Hata mesajı
+            session_id: Aracı çağıran oturum
+            message_id: Araç çağrısının bağlı olduğu mesaj
+        """
+        if not TOOL_TELEMETRY_ENABLED:
+            return
+        
+        try:
+            ToolTelemetry._queue.put_nowait({
+                "tool_name": tool_name,
+                "tool_type": tool_type,
+                "tool_description": tool_description,
+                "args": args,
+                "result": result,
+                "duration_ms": duration_ms,
+                "status": status,
+                "error_class": error_class,
+                "error_message": error_message,
+                "session_id": session_id,
+                "message_id": message_id
+            })
+        except queue.Full:
+            ToolTelemetry.dropped += 1
+            return
+        
+        ToolTelemetry._ensure_started()
+        if ToolTelemetry._queue.qsize() >= TOOL_TELEMETRY_BATCH_SIZE:
+            ToolTelemetry._flush_event.set()
+    
+    @staticmethod
+    def _serialize(value: Any, max_bytes: int = None) -> Tuple[str, int]:
+        """
+        Değeri JSON'a çevir ve bayt boyutunu döndür.
+        
+        max_bytes aşılırsa sadece boyut saklanır.
+        """
+        try:
+            serialized = json.dumps(value, ensure_ascii=False, default=str)
+        except Exception:
+            serialized = json.dumps(str(value), ensure_ascii=False)
+        
+        size = len(serialized.encode("utf-8"))
+        if max_bytes is not None and size > max_bytes:
+            serialized = json.dumps({"truncated": True, "size_bytes": size})
+        return serialized, size
+    
+    @staticmethod
+    def _resolve_tool_ids(cursor, records: List[Dict[str, Any]]) -> None:
+        """
+        Kayıtlardaki araçlar için tools satırlarını oluştur ve tool_id'leri önbelleğe al.
+        """
+        for record in records:
+            tool_name = record["tool_name"]
+            if tool_name in ToolTelemetry._tool_ids:
+                continue
+            
+            cursor.execute("""
+                INSERT INTO tools (tool_name, tool_type, tool_description, creation_method)
+                VALUES (?, ?, ?, 'manual')
+                ON CONFLICT(tool_name) DO NOTHING
+            """, (tool_name, record["tool_type"], record["tool_description"] or tool_name))
+            cursor.execute("SELECT tool_id FROM tools WHERE tool_name = ?", (tool_name,))
+            ToolTelemetry._tool_ids[tool_name] = cursor.fetchone()[0]
+    
+    @staticmethod
+    def _write(cursor, records: List[Dict[str, Any]]) -> int:
+        """
+        Kayıtları ekle ve araç toplamlarını güncelle (işlemi çağıran commit eder).
+        
+        tool_executions satırları executemany ile eklenir; tools üzerindeki
+        usage_count, success_rate (0-1) ve average_execution_time_ms araç
+        başına tek bir UPDATE ile artımlı olarak güncellenir.
+        """
+        ToolTelemetry._resolve_tool_ids(cursor, records)
+        
+        rows = []
+        aggregates: Dict[str, Dict[str, float]] = {}
+        for record in records:
+            tool_id = ToolTelemetry._tool_ids[record["tool_name"]]
+            args_json, args_size = ToolTelemetry._serialize(record["args"])
+            result_json, result_size = ToolTelemetry._serialize(
+                record["result"], TOOL_TELEMETRY_MAX_RESULT_BYTES
+            )
+            duration_ms = int(round(record["duration_ms"]))
+            
+            rows.append((
+                tool_id, record["session_id"], record["message_id"],
+                args_json, result_json, record["status"], duration_ms,
+                record["error_message"], record["error_class"],
+                args_size, result_size
+            ))
+            
+            aggregate = aggregates.setdefault(tool_id, {"count": 0, "success": 0, "time_ms": 0})
+            aggregate["count"] += 1
+            aggregate["success"] += 1 if record["status"] == "success" else 0
+            aggregate["time_ms"] += duration_ms
+        
+        cursor.executemany("""
+            INSERT INTO tool_executions (
+                tool_id, session_id, message_id, execution_args, execution_result,
+                execution_status, execution_time_ms, error_message, error_class,
+                args_size_bytes, result_size_bytes, completed_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, rows)
+        
+        # SET ifadelerindeki sütunlar güncelleme öncesi değerleri okur
+        cursor.executemany("""
+            UPDATE tools
+            SET usage_count = usage_count + ?,
+                success_rate = (success_rate * usage_count + ?) / (usage_count + ?),
+                average_execution_time_ms = (average_execution_time_ms * usage_count + ?) / (usage_count + ?),
+                last_used_at = CURRENT_TIMESTAMP,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE tool_id = ?
+        """, [
+            (a["count"], a["success"], a["count"], a["time_ms"], a["count"], tool_id)
+            for tool_id, a in aggregates.items()
+        ])
+        return len(rows)
+    
+    @staticmethod
+    def _write_each(conn, records: List[Dict[str, Any]]) -> int:
+        """
+        Toplu yazım başarısız olunca kayıtları tek tek yaz.
+        
+        Yazılamayan bir kayıt (ör. istemcinin verdiği, var olmayan bir
+        session_id yabancı anahtarı) oturum/mesaj bağlantısı olmadan bir kez
+        daha denenir; yine yazılamazsa yalnızca o kayıt atılır.
+        """
+        cursor = conn.cursor()
+        written = 0
+        for record in records:
+            attempts = [record]
+            if record["session_id"] is not None or record["message_id"] is not None:
+                attempts.append(dict(record, session_id=None, message_id=None))
+            
+            for attempt in attempts:
+                try:
+                    written += ToolTelemetry._write(cursor, [attempt])
+                    conn.commit()
+                    break
+                except Exception as e:
+                    conn.rollback()
+                    ToolTelemetry._tool_ids.clear()
+                    error = e
+            else:
+                print(f"Araç telemetrisi kaydı atıldı ({record['tool_name']}): {str(error)}")
+        return written
+    
+    @staticmethod
+    def flush() -> int:
+        """
+        Tampondaki kayıtları tek işlemde veritabanına yaz.
+        
+        Toplu yazım başarısız olursa kayıtlar tek tek yazılır; böylece hatalı
+        bir kayıt diğer oturumların kayıtlarını da kaybettirmez. Veritabanına
+        hiç bağlanılamazsa kayıtlar bir sonraki yazım için tampona geri konur.
+        
+        Returns:
+            int: Yazılan kayıt sayısı
+        """
+        with ToolTelemetry._flush_lock:
+            records = []
+            while True:
+                try:
+                    records.append(ToolTelemetry._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            if not records:
+                return 0
+            
+            try:
+                conn = SessionService.get_db_connection()
+            except Exception as e:
+                print(f"Araç telemetrisi yazılırken hata: {str(e)}")
+                ToolTelemetry._requeue(records)
+                return 0
+            
+            try:
+                written = ToolTelemetry._write(conn.cursor(), records)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                # Silinmiş/yeniden oluşturulmuş araçlar için önbelleği tazele
+                ToolTelemetry._tool_ids.clear()
+                print(f"Araç telemetrisi toplu yazılamadı, kayıtlar tek tek yazılıyor: {str(e)}")
+                try:
+                    written = ToolTelemetry._write_each(conn, records)
+                except Exception as e:
+                    print(f"Araç telemetrisi yazılırken hata: {str(e)}")
+                    ToolTelemetry._requeue(records)
+                    written = 0
+            finally:
+                conn.close()
+            return written
+    
+    @staticmethod
+    def _requeue(records: List[Dict[str, Any]]) -> None:
+        """Yazılamayan kayıtları tampona geri koy (tampon doluysa atılır)."""
+        for record in records:
+            try:
+                ToolTelemetry._queue.put_nowait(record)
+            except queue.Full:
+                ToolTelemetry.dropped += 1
+    
+    @staticmethod
+    def _run_loop() -> None:
+        """
+        Aralık dolduğunda veya tampon parti boyutuna ulaştığında yaz.
+        """
+        while True:
+            ToolTelemetry._flush_event.wait(TOOL_TELEMETRY_FLUSH_INTERVAL)
+            ToolTelemetry._flush_event.clear()
+            ToolTelemetry.flush()
+    
+    @staticmethod
+    def _ensure_started() -> None:
+        """
+        Yazıcı thread'ini ilk kayıtta başlat.
+        """
+        if ToolTelemetry._thread and ToolTelemetry._thread.is_alive():
+            return
+        
+        with ToolTelemetry._lock:
+            if ToolTelemetry._thread and ToolTelemetry._thread.is_alive():
+                return
+            
+            ToolTelemetry._thread = threading.Thread(
+                target=ToolTelemetry._run_loop,
+                name="tool-telemetry",
+                daemon=True
+            )
+            ToolTelemetry._thread.start()
+    
+    @staticmethod
+    def get_latency_percentiles(tool_name: str,
+                                percentiles: Tuple[float, ...] = (50, 90, 95, 99),
+                                window: int = TOOL_TELEMETRY_PERCENTILE_WINDOW) -> Dict[str, Any]:
+        """
+        Bir aracın çalışma süresi yüzdeliklerini hesapla.
+        
+        Yüzdelikler aracın son TOOL_TELEMETRY_PERCENTILE_WINDOW çalıştırmasından
+        hesaplanır: pencere (tool_id, created_at, execution_time_ms) indeksinden
+        sondan başa en fazla window satır okunur, tablonun boyutundan bağımsızdır.
+        
+        Args:
+            tool_name: Araç adı
+            percentiles: Hesaplanacak yüzdelikler (0-100)
+            window: Kullanılacak en fazla son çalıştırma sayısı
+        
+        Returns:
+            Dict: count (penceredeki çalıştırma sayısı) ve her yüzdelik için
+                'p50' gibi anahtarlar (milisaniye)
+        """
+        try:
+            conn = SessionService.get_read_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT tool_id FROM tools WHERE tool_name = ?", (tool_name,))
+            row = cursor.fetchone()
+            if not row:
+                conn.close()
+                return {"count": 0}
+            
+            cursor.execute("""
+                SELECT execution_time_ms FROM tool_executions
+                WHERE tool_id = ? AND execution_time_ms IS NOT NULL
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, (row[0], window))
+            samples = sorted(sample[0] for sample in cursor.fetchall())
+            count = len(samples)
+            
+            latencies: Dict[str, Any] = {"count": count}
+            for percentile in percentiles:
+                if not count:
+                    latencies[f"p{percentile:g}"] = None
+                    continue
+                
+                # En yakın sıra (nearest-rank) yöntemi
+                rank = max(0, min(count - 1, int(-(-percentile * count // 100)) - 1))
+                latencies[f"p{percentile:g}"] = samples[rank]
+            
+            conn.close()
+            return latencies
+        except Exception as e:
+            print(f"Araç gecikme yüzdelikleri hesaplanırken hata: {str(e)}")
+            return {"count": 0}
+    
+    @staticmethod
+    def get_slowest_tools(percentile: float = 95, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Verilen yüzdelikte en yavaş araçları listele.
+        
+        Args:
+            percentile: Karşılaştırılacak yüzdelik (0-100)
+            limit: Döndürülecek en fazla araç
+        
+        Returns:
+            List: tool_name, tool_type, count ve yüzdelik değerini içeren kayıtlar
+        """
+        try:
+            conn = SessionService.get_read_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT tool_name, tool_type FROM tools WHERE usage_count > 0")
+            tools = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+        except Exception as e:
+            print(f"Araç listesi alınırken hata: {str(e)}")
+            return []
+        
+        key = f"p{percentile:g}"
+        slowest = []
+        for tool in tools:
+            latencies = ToolTelemetry.get_latency_percentiles(tool["tool_name"], (percentile,))
+            if latencies.get(key) is not None:
+                slowest.append({**tool, "count": latencies["count"], key: latencies[key]})
+        
+        slowest.sort(key=lambda tool: tool[key], reverse=True)
+        return slowest[:limit]
+
+# Uygulama kapanırken tamponda kalan kayıtları yaz
+atexit.register(ToolTelemetry.flush)